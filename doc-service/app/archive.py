@@ -0,0 +1,53 @@
+"""Incremental ZIP writer for streaming multi-report responses."""
+
+from __future__ import annotations
+
+import zipfile
+from typing import Iterator
+
+# Rendered PDFs, DOCX and XLSX files are already compressed — store them as-is
+_COMPRESSION = zipfile.ZIP_STORED
+_COPY_CHUNK = 256 * 1024
+
+
+class _Sink:
+    """Write-only target; zipfile falls back to data descriptors when it cannot seek."""
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def write(self, data) -> int:
+        self.buf += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+class ZipStream:
+    """Builds a ZIP archive part by part; :meth:`drain` returns the bytes written since the last call."""
+
+    def __init__(self):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=_COMPRESSION)
+
+    def drain(self) -> bytes:
+        data = bytes(self._sink.buf)
+        self._sink.buf.clear()
+        return data
+
+    def add_bytes(self, name: str, data: bytes, compress: bool = False) -> None:
+        compression = zipfile.ZIP_DEFLATED if compress else _COMPRESSION
+        self._zip.writestr(name, data, compress_type=compression)
+
+    def add_file(self, name: str, path: str) -> Iterator[bytes]:
+        """Copy ``path`` into the archive, yielding output as it is produced."""
+        with open(path, "rb") as src, self._zip.open(name, "w", force_zip64=True) as dest:
+            while chunk := src.read(_COPY_CHUNK):
+                dest.write(chunk)
+                yield self.drain()
+
+    def close(self) -> bytes:
+        """Write the central directory and return the remaining bytes."""
+        self._zip.close()
+        return self.drain()
@@ -0,0 +1,198 @@
+"""Content-addressed cache of rendered reports.
+
+Entries are keyed on a hash of the ``ReportRequest`` so identical
+payloads are served without re-rendering. The timestamp printed in a report is
+stamped at render time and is not part of the request, so a cached document
+keeps the generation time of its first render.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from app.config import settings
+from app.models.schemas import ReportRequest
+from app.services.records import RecordColumns, RecordFile
+
+
+def cache_key(req: ReportRequest) -> str:
+    """SHA-256 over the request's canonical JSON form.
+
+    Dict keys are sorted at every level, so payloads that only differ in key
+    order share an entry. Records from an NDJSON or msgpack upload are
+    represented by the hash of their bytes computed at ingestion.
+    """
+    if isinstance(req.records, (RecordFile, RecordColumns)):
+        data = req.model_dump(mode="json", exclude={"records"})
+        data["records"] = req.records.digest
+    else:
+        data = req.model_dump(mode="json")
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """Two-tier LRU cache: a byte-bounded memory tier and an optional disk tier.
+
+    Both tiers evict least-recently-used entries once their byte limit is
+    exceeded, and entries older than ``ttl`` seconds are treated as misses.
+    A memory miss that hits on disk promotes the entry back into memory.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, disk_dir: str = "", disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or bool(self.disk_dir)
+
+    async def get(self, key: str) -> bytes | None:
+        content = self._get_memory(key)
+        if content is None:
+            content = await self._get_disk(key)
+            if content is not None:
+                self._put_memory(key, content)
+        if content is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        self._put_memory(key, content)
+        self._put_disk(key, content)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    # ── memory tier ─────────────────────────────────────────────────────
+
+    def _get_memory(self, key: str) -> bytes | None:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        stored_at, content = entry
+        if time.monotonic() - stored_at > self.ttl:
+            self._drop_memory(key)
+            return None
+        self._memory.move_to_end(key)
+        return content
+
+    def _put_memory(self, key: str, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        self._drop_memory(key)
+        self._memory[key] = (time.monotonic(), content)
+        self._memory_bytes += len(content)
+        while self._memory_bytes > self.max_bytes:
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+
+    def _drop_memory(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[1])
+
+    # ── disk tier ───────────────────────────────────────────────────────
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key)
+
+    def _load_disk_index(self) -> None:
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                st = os.stat(self._path(name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self._disk_bytes += size
+
+    async def _get_disk(self, key: str) -> bytes | None:
+        if key not in self._disk:
+            return None
+        # A cached report can be many MB; the event loop serves others while it is read
+        content = await asyncio.to_thread(self._read_disk, key)
+        if key not in self._disk:
+            return content
+        if content is None:
+            self._drop_disk(key)
+        else:
+            self._disk.move_to_end(key)
+        return content
+
+    def _read_disk(self, key: str) -> bytes | None:
+        """The entry's file contents, or ``None`` if it expired or cannot be read."""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _put_disk(self, key: str, content: bytes) -> None:
+        if not self.disk_dir or len(content) > self.disk_max_bytes:
+            return
+        self._drop_disk(key)
+        tmp_path = f"{self._path(key)}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return
+        self._disk[key] = len(content)
+        self._disk_bytes += len(content)
+        while self._disk_bytes > self.disk_max_bytes:
+            oldest = next(iter(self._disk))
+            self._drop_disk(oldest)
+
+    def _drop_disk(self, key: str) -> None:
+        size = self._disk.pop(key, None)
+        if size is None:
+            return
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+report_cache = ReportCache(
+    max_bytes=settings.CACHE_MAX_BYTES,
+    ttl=settings.CACHE_TTL,
+    disk_dir=settings.CACHE_DIR,
+    disk_max_bytes=settings.CACHE_DISK_MAX_BYTES,
+)
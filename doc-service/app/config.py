@@ -5,9 +5,69 @@ class Settings:
     HOST: str = os.getenv("DOC_SERVICE_HOST", "0.0.0.0")
     PORT: int = int(os.getenv("DOC_SERVICE_PORT", "5000"))
     OUTPUT_DIR: str = os.getenv("DOC_OUTPUT_DIR", "/tmp/doc-service")
+    # Documents larger than this are spilled to OUTPUT_DIR instead of held in memory
+    SPILL_THRESHOLD: int = int(os.getenv("DOC_SPILL_THRESHOLD_BYTES", str(16 * 1024 * 1024)))
+    # Single-format CSV reports with at least this many records are sent while
+    # the worker writes them, with chunked transfer; 0 turns streaming off
+    STREAM_MIN_RECORDS: int = int(os.getenv("DOC_STREAM_MIN_RECORDS", "5000"))
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
     # Shared secret for service-to-service auth
     SERVICE_SECRET: str = os.getenv("DOC_SERVICE_SECRET", "")
+    # Rendering executor — "process" (default) or "thread"; 0 workers = one per core
+    RENDER_EXECUTOR: str = os.getenv("DOC_RENDER_EXECUTOR", "process")
+    RENDER_WORKERS: int = int(os.getenv("DOC_RENDER_WORKERS", "0")) or (os.cpu_count() or 1)
+    RENDER_START_METHOD: str = os.getenv("DOC_RENDER_START_METHOD", "spawn")
+    # Formats whose engines each worker imports at start ("pdf,xlsx", "all");
+    # others load on first use. Preloading trades start-up time for first-report latency
+    PRELOAD_FORMATS: str = os.getenv("DOC_PRELOAD_FORMATS", "")
+    # Renders allowed to wait for a free worker before requests are turned away
+    RENDER_MAX_QUEUE: int = int(os.getenv("DOC_RENDER_MAX_QUEUE", "32"))
+
+    # Job API — jobs running at once (0 = one per render worker), jobs allowed to
+    # wait before POST /jobs answers 429, and how long finished results are kept
+    JOB_CONCURRENCY: int = int(os.getenv("DOC_JOB_CONCURRENCY", "0")) or RENDER_WORKERS
+    JOB_MAX_QUEUED: int = int(os.getenv("DOC_JOB_MAX_QUEUED", "100"))
+    JOB_RESULT_TTL: float = float(os.getenv("DOC_JOB_RESULT_TTL_SECONDS", "900"))
+    # Finished jobs kept for fetching, by count and by total result bytes; past
+    # either limit the oldest are dropped before their TTL
+    JOB_MAX_RETAINED: int = int(os.getenv("DOC_JOB_MAX_RETAINED", "500"))
+    JOB_RETAINED_MAX_BYTES: int = int(os.getenv("DOC_JOB_RETAINED_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+    # Longest record line accepted by /generate-report/ndjson
+    NDJSON_MAX_LINE_BYTES: int = int(os.getenv("DOC_NDJSON_MAX_LINE_BYTES", str(1024 * 1024)))
+    # Opt-in render profiling (X-Profile header) — profiles kept for GET /profiles/{id}
+    # (0 disables profiling) and functions listed per profile, by cumulative time
+    PROFILE_KEEP: int = int(os.getenv("DOC_PROFILE_KEEP", "20"))
+    PROFILE_TOP_FUNCTIONS: int = int(os.getenv("DOC_PROFILE_TOP_FUNCTIONS", "60"))
+    # Upper bound on items in one /generate-reports batch
+    BATCH_MAX_REPORTS: int = int(os.getenv("DOC_BATCH_MAX_REPORTS", "500"))
+
+    # XLSX exports above this many records stream rows in constant-memory mode
+    XLSX_STREAMING_ROWS: int = int(os.getenv("DOC_XLSX_STREAMING_ROWS", "5000"))
+    # AUTO PDF engine switches from WeasyPrint to ReportLab above this many records
+    PDF_REPORTLAB_ROWS: int = int(os.getenv("DOC_PDF_REPORTLAB_ROWS", "500"))
+    # WeasyPrint table reports above this many records render as parallel chunks
+    PDF_CHUNK_ROWS: int = int(os.getenv("DOC_PDF_CHUNK_ROWS", "5000"))
+    # Upper bound on pages laid out by one chunk, which bounds worker memory
+    PDF_CHUNK_PAGES: int = int(os.getenv("DOC_PDF_CHUNK_PAGES", "50"))
+    # Jinja bytecode cache shared by the workers — empty uses Jinja's per-user temp dir
+    TEMPLATE_CACHE_DIR: str = os.getenv("DOC_TEMPLATE_CACHE_DIR", "")
+    # Base DOCX documents (styles + logo) kept per template design and brand
+    DOCX_BASE_CACHE_SIZE: int = int(os.getenv("DOC_DOCX_BASE_CACHE_SIZE", "32"))
+    # Parsed AI-analysis markdown trees kept per worker, keyed by content hash
+    MARKDOWN_CACHE_SIZE: int = int(os.getenv("DOC_MARKDOWN_CACHE_SIZE", "64"))
+    # Rendered-report cache — 0 bytes disables the memory tier, empty dir the disk tier
+    CACHE_MAX_BYTES: int = int(os.getenv("DOC_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    CACHE_TTL: float = float(os.getenv("DOC_CACHE_TTL_SECONDS", "900"))
+    CACHE_DIR: str = os.getenv("DOC_CACHE_DIR", "")
+    CACHE_DISK_MAX_BYTES: int = int(os.getenv("DOC_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+    # Remote assets (logos) — cached per worker, revalidated after ASSET_TTL
+    ASSET_CACHE_ENTRIES: int = int(os.getenv("DOC_ASSET_CACHE_ENTRIES", "64"))
+    ASSET_MAX_BYTES: int = int(os.getenv("DOC_ASSET_MAX_BYTES", str(5 * 1024 * 1024)))
+    ASSET_TTL: float = float(os.getenv("DOC_ASSET_TTL_SECONDS", "3600"))
+    ASSET_NEGATIVE_TTL: float = float(os.getenv("DOC_ASSET_NEGATIVE_TTL_SECONDS", "60"))
+    ASSET_CONNECT_TIMEOUT: float = float(os.getenv("DOC_ASSET_CONNECT_TIMEOUT", "2"))
+    ASSET_READ_TIMEOUT: float = float(os.getenv("DOC_ASSET_READ_TIMEOUT", "5"))
 
 
 settings = Settings()
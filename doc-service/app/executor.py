@@ -0,0 +1,102 @@
+"""Rendering executor — keeps CPU-bound report rendering off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from app.config import settings
+from app.services import renderer
+
+
+class RenderQueueFull(Exception):
+    """Raised when every worker is busy and the waiting queue is at capacity."""
+
+
+class RenderExecutor:
+    """Bounded pool of rendering workers shared by all requests.
+
+    At most ``workers`` renders run at once; up to ``max_queue`` more may wait
+    for a free worker. Anything beyond that is rejected immediately so a burst
+    of large reports cannot pile up unbounded work in the service.
+
+    A worker process that dies (killed for memory, a crash in a native
+    library) breaks the whole process pool. The calls that were running on it
+    fail, and the pool is replaced by a fresh, warmed one for the next call.
+    """
+
+    def __init__(self, kind: str, workers: int, max_queue: int, start_method: str = "spawn"):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.start_method = start_method
+        self._pool: Executor | None = None
+        self._pending = 0
+        # Held while a broken pool is replaced; new calls wait for the fresh one
+        self._lock = asyncio.Lock()
+
+    @property
+    def depth(self) -> int:
+        """Renders currently running or waiting for a worker."""
+        return self._pending
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = self._new_pool()
+
+    def _new_pool(self) -> Executor:
+        if self.kind == "thread":
+            pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+        else:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=renderer.warm_up,
+            )
+        # Submitting one task per worker spawns the whole pool up front, so the
+        # first real requests don't pay for interpreter start-up and imports.
+        wait([pool.submit(renderer.warm_up) for _ in range(self.workers)])
+        return pool
+
+    async def _replace(self, broken: Executor) -> None:
+        """Swap ``broken`` for a new pool, once however many of its calls failed."""
+        async with self._lock:
+            if self._pool is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = await asyncio.to_thread(self._new_pool)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on a worker without blocking the event loop."""
+        if self._pool is None:
+            self.start()
+        if self._pending >= self.workers + self.max_queue:
+            raise RenderQueueFull
+        self._pending += 1
+        try:
+            async with self._lock:
+                pool = self._pool
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(pool, fn, *args)
+            except BrokenProcessPool:
+                await self._replace(pool)
+                raise
+        finally:
+            self._pending -= 1
+
+
+executor = RenderExecutor(
+    kind=settings.RENDER_EXECUTOR,
+    workers=settings.RENDER_WORKERS,
+    max_queue=settings.RENDER_MAX_QUEUE,
+    start_method=settings.RENDER_START_METHOD,
+)
@@ -0,0 +1,137 @@
+"""Ingestion of uploads that do not fit the JSON ``ReportRequest`` body well.
+
+NDJSON: the request metadata (every ``ReportRequest`` field except
+``records``) comes as JSON in the ``X-Report-Meta`` header, or as the first
+line of the body. Each following line is one record. Lines are split,
+indexed and hashed in a thread, one received chunk at a time, so the event
+loop does no per-record work. They are not parsed here; the rendering
+workers parse them lazily through :class:`~app.services.records.RecordFile`.
+
+msgpack: one map with the metadata fields and a ``columns`` map of record
+key -> array of values, so keys are sent once instead of once per record.
+The arrays become a :class:`~app.services.records.RecordColumns` as-is.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from typing import AsyncIterator
+
+import msgpack
+
+from app.config import settings
+from app.models.schemas import ReportRequest
+from app.services.columns import TABLE_KEYS
+from app.services.records import INDEX_STEP, RecordColumns, RecordFile
+
+
+class IngestError(ValueError):
+    """The upload does not have the shape its format requires."""
+
+
+def _validate_meta(meta: dict) -> ReportRequest:
+    # ValidationError propagates to the caller, like a JSON body would
+    return ReportRequest.model_validate({**meta, "records": []})
+
+
+def _parse_meta(raw: bytes | str) -> ReportRequest:
+    try:
+        meta = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise IngestError(f"Report metadata is not valid JSON: {exc.msg}") from None
+    if not isinstance(meta, dict):
+        raise IngestError("Report metadata must be a JSON object")
+    if "records" in meta:
+        raise IngestError("Records go on their own lines after the metadata, not in it")
+    return _validate_meta(meta)
+
+
+async def spool(body: AsyncIterator[bytes], meta_header: str | None = None) -> ReportRequest:
+    """Read an NDJSON upload into a temp file and return the request reading from it.
+
+    The returned request's ``records`` is a ``RecordFile``; the caller deletes
+    ``request.records.path`` once rendering is done.
+    """
+    request = _parse_meta(meta_header) if meta_header else None
+    fd, path = tempfile.mkstemp(suffix=".ndjson", dir=settings.OUTPUT_DIR)
+    digest = hashlib.sha256()
+    offsets: list[int] = []
+    count = written = 0
+
+    def add(line: bytes) -> None:
+        nonlocal request, count, written
+        line = line.strip()
+        if not line:
+            return
+        if request is None:
+            request = _parse_meta(line)
+            return
+        if count % INDEX_STEP == 0:
+            offsets.append(written)
+        f.write(line)
+        f.write(b"\n")
+        digest.update(line)
+        digest.update(b"\n")
+        written += len(line) + 1
+        count += 1
+
+    def add_lines(pending: bytes, data: bytes) -> bytes:
+        """Add every complete line of ``pending + data``; returns the unfinished last one."""
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        if len(pending) > settings.NDJSON_MAX_LINE_BYTES:
+            raise IngestError(f"Line longer than {settings.NDJSON_MAX_LINE_BYTES} bytes")
+        for line in lines:
+            add(line)
+        return pending
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pending = b""
+            # One chunk at a time, so the threads never touch the state together
+            async for data in body:
+                pending = await asyncio.to_thread(add_lines, pending, data)
+            await asyncio.to_thread(add, pending)
+        if request is None:
+            raise IngestError("Missing report metadata")
+    except BaseException:
+        os.remove(path)
+        raise
+
+    request.records = RecordFile(path=path, count=count, offsets=offsets, digest=digest.hexdigest())
+    return request
+
+
+def unpack_columns(body: bytes) -> ReportRequest:
+    """Decode a msgpack columnar upload into a request whose records are a ``RecordColumns``."""
+    try:
+        meta = msgpack.unpackb(body, raw=False)
+    except (msgpack.UnpackException, ValueError) as exc:
+        raise IngestError("Body is not valid msgpack") from exc
+    if not isinstance(meta, dict):
+        raise IngestError("Body must be a msgpack map")
+    if "records" in meta:
+        raise IngestError("Send records as a columns map of key -> array, not as records")
+
+    columns = meta.pop("columns", None)
+    if not isinstance(columns, dict) or not all(
+        isinstance(k, str) and isinstance(v, list) for k, v in columns.items()
+    ):
+        raise IngestError("columns must be a map of record key -> array")
+    lengths = {len(v) for v in columns.values()}
+    if len(lengths) > 1:
+        raise IngestError(f"Every column needs the same length, got {sorted(lengths)}")
+
+    request = _validate_meta(meta)
+    if request.report_type not in TABLE_KEYS:
+        raise IngestError(f"Columnar records are only accepted for table reports, not {request.report_type.value}")
+    request.records = RecordColumns(
+        columns=columns,
+        count=lengths.pop() if lengths else 0,
+        digest=hashlib.sha256(body).hexdigest(),
+    )
+    return request
@@ -0,0 +1,217 @@
+"""In-process job queue for reports that may outlive a client's request timeout.
+
+Jobs wait in an ``asyncio.PriorityQueue`` and ``concurrency`` consumer tasks
+run them on the rendering executor. The queue is bounded: once
+``max_queued`` jobs are waiting, new submissions are refused with
+:class:`JobQueueFull` so the caller can answer ``429``.
+
+Finished jobs are kept for ``ttl`` seconds so their result can be fetched.
+Their documents are spilled to files in ``spill_dir`` and their records are
+released, so a waiting result costs no memory. At most ``max_retained``
+finished jobs and ``max_retained_bytes`` of results are kept; past either
+limit the oldest are dropped early. A background task expires them even
+when no requests come in.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.models.schemas import ReportRequest
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Longest wait between expiry sweeps; shorter when ``ttl`` is
+_EXPIRE_INTERVAL = 30.0
+
+
+class JobQueueFull(Exception):
+    """Raised when ``max_queued`` jobs are already waiting."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    request: ReportRequest
+    priority: int = 0
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    progress: float = 0.0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    # (filename, RenderedReport) pairs set by the runner; several for multi-format jobs
+    files: list = field(default_factory=list)
+    cache: str | None = None
+
+    @property
+    def size(self) -> int:
+        return sum(report.size for _, report in self.files)
+
+    def spill_files(self, directory: str) -> None:
+        """Write results still held in memory to files in ``directory``."""
+        for name, report in self.files:
+            if report.content is not None and not report.path:
+                fd, path = tempfile.mkstemp(prefix="job_", suffix=os.path.splitext(name)[1], dir=directory)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(report.content)
+                report.path, report.content = path, None
+
+    def discard_files(self) -> None:
+        for _, report in self.files:
+            if report.path and os.path.exists(report.path):
+                os.remove(report.path)
+        self.files = []
+
+
+class JobQueue:
+    def __init__(
+        self, concurrency: int, max_queued: int, ttl: float, max_retained: int, max_retained_bytes: int, spill_dir: str
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max(0, max_queued)
+        self.ttl = ttl
+        self.max_retained = max(0, max_retained)
+        self.max_retained_bytes = max(0, max_retained_bytes)
+        self.spill_dir = spill_dir
+        self._jobs: dict[str, Job] = {}
+        self._queue: asyncio.PriorityQueue | None = None
+        self._consumers: list[asyncio.Task] = []
+        self._expirer: asyncio.Task | None = None
+        # Result bytes of every finished job, oldest first
+        self._finished: OrderedDict[str, int] = OrderedDict()
+        self._retained_bytes = 0
+        self._seq = itertools.count()
+        # Queue key of every waiting job, for reporting queue positions
+        self._waiting: dict[str, tuple[int, int]] = {}
+        # Smoothed job duration, used to suggest a Retry-After when full
+        self._avg_seconds = 1.0
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self, runner: Callable[[Job], Awaitable[None]]) -> None:
+        """Start the consumers; ``runner`` renders a job and fills in ``job.files``."""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._consumers = [asyncio.create_task(self._consume(runner)) for _ in range(self.concurrency)]
+        self._expirer = asyncio.create_task(self._expire_periodically())
+
+    async def stop(self) -> None:
+        tasks = [*self._consumers, *([self._expirer] if self._expirer else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._consumers = []
+        self._expirer = None
+        self._queue = None
+        self._waiting.clear()
+        for job in self._jobs.values():
+            job.discard_files()
+        self._jobs.clear()
+        self._finished.clear()
+        self._retained_bytes = 0
+
+    def submit(self, request: ReportRequest, priority: int = 0) -> Job:
+        """Queue a job; higher ``priority`` runs first, ties in submission order."""
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        self._expire()
+        if self.queued >= self.max_queued:
+            wait = self._avg_seconds * (self.queued + 1) / self.concurrency
+            raise JobQueueFull(retry_after=max(1, round(wait)))
+        job = Job(request=request, priority=priority)
+        key = (-priority, next(self._seq))
+        self._jobs[job.id] = job
+        self._waiting[job.id] = key
+        self._queue.put_nowait((*key, job))
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> int | None:
+        """Number of queued jobs that will start before ``job``."""
+        key = self._waiting.get(job.id)
+        if key is None:
+            return None
+        return sum(1 for other in self._waiting.values() if other < key)
+
+    def _expire(self) -> None:
+        """Drop finished jobs older than ``ttl``, then the oldest while over either retention limit."""
+        cutoff = time.time() - self.ttl
+        while self._finished:
+            job_id = next(iter(self._finished))
+            if (
+                self._jobs[job_id].finished_at >= cutoff
+                and len(self._finished) <= self.max_retained
+                and self._retained_bytes <= self.max_retained_bytes
+            ):
+                break
+            self._retained_bytes -= self._finished.pop(job_id)
+            self._jobs.pop(job_id).discard_files()
+
+    async def _expire_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, min(self.ttl, _EXPIRE_INTERVAL)))
+            self._expire()
+
+    def _retain(self, job: Job) -> None:
+        """Count a finished job against the retention limits."""
+        # Only the report type and format are read once a job is over
+        job.request = job.request.model_copy(update={"records": []})
+        self._finished[job.id] = job.size
+        self._retained_bytes += job.size
+        self._expire()
+
+    async def _consume(self, runner: Callable[[Job], Awaitable[None]]) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            self._waiting.pop(job.id, None)
+            job.status = RUNNING
+            job.started_at = time.time()
+            try:
+                await runner(job)
+                await asyncio.to_thread(job.spill_files, self.spill_dir)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                job.status = FAILED
+                job.error = f"{type(exc).__name__}: {exc}"
+            else:
+                job.status = DONE
+                job.progress = 1.0
+            finally:
+                job.finished_at = time.time()
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (job.finished_at - job.started_at)
+                self._retain(job)
+                self._queue.task_done()
+
+
+jobs = JobQueue(
+    concurrency=settings.JOB_CONCURRENCY,
+    max_queued=settings.JOB_MAX_QUEUED,
+    ttl=settings.JOB_RESULT_TTL,
+    max_retained=settings.JOB_MAX_RETAINED,
+    max_retained_bytes=settings.JOB_RETAINED_MAX_BYTES,
+    spill_dir=settings.OUTPUT_DIR,
+)
@@ -1,67 +1,564 @@
+import asyncio
+import json
 import os
+import tempfile
+import time
 import uuid
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Header, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from starlette.background import BackgroundTask
 
+from app import metrics
+from app.archive import ZipStream
+from app.cache import cache_key, report_cache
 from app.config import settings
-from app.models.schemas import ReportFormat, ReportRequest
-from app.services import excel_service, pdf_service, word_service
+from app.executor import RenderQueueFull, executor
+from app.ingest import IngestError, spool, unpack_columns
+from app.jobs import DONE, Job, JobQueueFull, jobs
+from app.models.schemas import BatchReportRequest, RecordSource, ReportRequest
+from app.profiles import profiles
+from app.services import pdf_chunks, renderer
+from app.services.columns import TABLE_KEYS
+from app.services.prepared import PreparedTable, prepare
+from app.services.records import RecordError, RecordFile
+from app.streaming import RenderStream
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    executor.start()
+    jobs.start(_run_job)
+    yield
+    await jobs.stop()
+    executor.shutdown()
+
 
 app = FastAPI(
     title="Nexa Document Generation Service",
     version="1.0.0",
-    description="Microservice for generating PDF, Word, and Excel reports",
+    description="Microservice for generating PDF, Word, Excel, and CSV reports",
+    lifespan=lifespan,
 )
+app.add_middleware(metrics.RequestTimer)
 
 os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
 
 
+@app.exception_handler(RecordError)
+async def record_error(_request: Request, exc: RecordError):
+    # Raised by the rendering workers when a record fails validation
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+
+def require_secret(x_service_secret: str | None = Header(default=None)) -> None:
+    if settings.SERVICE_SECRET and x_service_secret != settings.SERVICE_SECRET:
+        raise HTTPException(status_code=401, detail="Invalid service secret")
+
+
 @app.get("/healthz")
 async def health():
     return {"status": "ok", "service": "doc-service"}
 
 
-@app.post("/generate-report")
-async def generate_report(
-    request: ReportRequest,
-    x_service_secret: str | None = Header(default=None),
-):
-    if settings.SERVICE_SECRET and x_service_secret != settings.SERVICE_SECRET:
-        raise HTTPException(status_code=401, detail="Invalid service secret")
+@app.get("/cache/stats", dependencies=[Depends(require_secret)])
+async def cache_stats():
+    return report_cache.stats()
+
+
+@app.get("/metrics", dependencies=[Depends(require_secret)])
+async def prometheus_metrics():
+    """Prometheus scrape endpoint; the scraper sends ``X-Service-Secret`` like any other caller."""
+    return PlainTextResponse(metrics.expose(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/profiles/{profile_id}", dependencies=[Depends(require_secret)])
+async def get_profile(profile_id: str):
+    """cProfile statistics of a report rendered with ``X-Profile: 1``."""
+    text = profiles.get(profile_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    return PlainTextResponse(text)
+
+
+async def _aggregate(request: ReportRequest) -> ReportRequest:
+    """Compute rows and totals on a worker when the records are raw shifts."""
+    if request.record_source == RecordSource.SHIFTS:
+        # Imported on first use — it pulls in pandas, which the API process otherwise never loads
+        from app.services import aggregate
+
+        return await executor.run(aggregate.resolve, request)
+    return request
+
+
+async def _render(
+    request: ReportRequest, prepared: PreparedTable | None = None, progress=None, profile: bool = False
+) -> tuple[renderer.RenderedReport, str]:
+    """Serve ``request`` from the report cache or render it; returns the report and X-Cache status.
+
+    ``progress`` receives the finished fraction of a chunked PDF render.
+    ``profile`` renders under cProfile in one worker call, bypassing the cache
+    and PDF chunking so the profile covers the whole render.
+    """
+    # Hashing 100k records still takes ~0.15 s; a thread keeps the event loop serving meanwhile
+    key = await asyncio.to_thread(cache_key, request) if report_cache.enabled else None
+    cached = await report_cache.get(key) if key and not profile else None
+    if cached is not None:
+        report = renderer.RenderedReport(size=len(cached), content=cached)
+        metrics.observe_report(request, report)
+        return report, "HIT"
+
+    started = time.perf_counter()
+    resolved = await _aggregate(request)
+    aggregated = time.perf_counter() - started
+    if not profile and pdf_chunks.wants_chunks(resolved):
+        report = await pdf_chunks.render(resolved, executor, progress)
+    else:
+        report = await executor.run(renderer.render, resolved, prepared, profile)
+    if resolved is not request:
+        report.stages["aggregate"] = aggregated
+    if key and report.content is not None:
+        report_cache.put(key, report.content)
+    metrics.observe_report(resolved, report)
+    return report, "BYPASS" if profile else "MISS"
+
+
+def _streams(request: ReportRequest, profile: bool) -> bool:
+    """Whether ``request`` is sent while it renders instead of once it is finished."""
+    return (
+        not profile
+        and settings.STREAM_MIN_RECORDS > 0
+        and request.report_format in renderer.STREAMING_FORMATS
+        and len(request.records) >= settings.STREAM_MIN_RECORDS
+    )
+
+
+async def _render_stream(request: ReportRequest, stages: dict[str, float]) -> RenderStream:
+    """Start rendering ``request`` into a file and return its ``RenderStream`` once the first bytes are written.
+
+    Streamed reports bypass the report cache, which holds whole documents
+    in memory. Time spent before the render starts (aggregating shift
+    records) is added to ``stages``.
+    """
+    started = time.perf_counter()
+    resolved = await _aggregate(request)
+    if resolved is not request:
+        stages["aggregate"] = time.perf_counter() - started
+    fd, path = tempfile.mkstemp(suffix=renderer.EXTENSIONS[resolved.report_format], dir=settings.OUTPUT_DIR)
+    os.close(fd)
+
+    def finished(report: renderer.RenderedReport) -> None:
+        if "aggregate" in stages:
+            report.stages["aggregate"] = stages["aggregate"]
+        metrics.observe_report(resolved, report)
+
+    task = asyncio.ensure_future(executor.run(renderer.render_file, resolved, path))
+    stream = RenderStream(path, task, finished)
+    await stream.first()
+    return stream
+
+
+async def _render_formats(
+    request: ReportRequest, progress=None, profile: bool = False
+) -> list[tuple[ReportRequest, renderer.RenderedReport, str]]:
+    """Render every format in ``request.report_formats`` in parallel from one prepared table."""
+    shared = {}
+    started = time.perf_counter()
+    resolved = await _aggregate(request)
+    if resolved is not request:
+        shared["aggregate"] = time.perf_counter() - started
+    request = resolved
+    parts = [request.model_copy(update={"report_format": f, "report_formats": None}) for f in request.report_formats]
+    prepared = None
+    # NDJSON uploads are not prepared up front; each format streams the spool file itself
+    if request.report_type in TABLE_KEYS and not isinstance(request.records, RecordFile):
+        started = time.perf_counter()
+        prepared = await executor.run(prepare, request)
+        shared["prepare"] = time.perf_counter() - started
+    finished = 0
+
+    async def render_part(part: ReportRequest):
+        nonlocal finished
+        result = await _render(part, prepared, profile=profile)
+        finished += 1
+        if progress:
+            progress(finished / len(parts))
+        return result
+
+    results = await asyncio.gather(*(render_part(part) for part in parts), return_exceptions=True)
+    failed = [r for r in results if isinstance(r, BaseException)]
+    if failed:
+        for result in results:
+            if not isinstance(result, BaseException) and result[0].path:
+                os.remove(result[0].path)
+        raise failed[0]
+    # Work shared by every format is counted once, on the first one
+    results[0][0].stages.update(shared)
+    metrics.observe_stages(shared, parts[0].report_format.value)
+    return [(part, report, cache_status) for part, (report, cache_status) in zip(parts, results)]
+
+
+async def _stream_zip(files: list[tuple[str, renderer.RenderedReport]], cleanup: bool = True):
+    archive = ZipStream()
+    try:
+        for name, report in files:
+            if report.path:
+                for chunk in archive.add_file(name, report.path):
+                    yield chunk
+            else:
+                archive.add_bytes(name, report.content)
+                yield archive.drain()
+        yield archive.close()
+    finally:
+        for _, report in files if cleanup else ():
+            if report.path and os.path.exists(report.path):
+                os.remove(report.path)
+
+
+def _add_stages(stages: dict[str, float], more: dict[str, float]) -> None:
+    for name, seconds in more.items():
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+@app.post("/generate-report", dependencies=[Depends(require_secret)])
+async def generate_report(request: ReportRequest, http: Request, x_profile: str | None = Header(default=None)):
+    """Render one report.
+
+    The ``Server-Timing`` header breaks the time down by stage (parse, prepare,
+    context, template, layout, serialize, ...). With ``X-Profile: 1`` the
+    render runs under cProfile and ``X-Profile-Id`` names the stored profile;
+    see ``GET /profiles/{id}``.
+
+    Large CSV reports (``settings.STREAM_MIN_RECORDS``) are sent with
+    chunked transfer while the worker is still writing them. Their
+    ``Server-Timing`` ends at the first byte, and a render that fails
+    part-way cuts the body short.
+    """
+    started = http.state.request_started
+    # Arrival to handler: reading the body and validating the request
+    stages = {"parse": time.perf_counter() - started}
+    multi = bool(request.report_formats) and len(request.report_formats) > 1
+    report_format = "+".join(f.value for f in request.report_formats) if multi else request.report_format.value
+    http.state.metric_labels = (request.report_type.value, report_format, request.template_design.value)
+    metrics.observe_stages(stages, report_format)
+
+    profile = x_profile in ("1", "true")
+    if profile and not profiles.enabled:
+        raise HTTPException(status_code=403, detail="Profiling is disabled")
+    if multi:
+        return await _generate_formats(request, stages, started, profile)
+
+    try:
+        if _streams(request, profile):
+            report, cache_status = await _render_stream(request, stages), "BYPASS"
+        else:
+            report, cache_status = await _render(request, profile=profile)
+    except RenderQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Rendering queue is full",
+            headers={"Retry-After": "1"},
+        )
 
     file_id = uuid.uuid4().hex[:12]
-    ext_map = {
-        ReportFormat.PDF: ".pdf",
-        ReportFormat.DOCX: ".docx",
-        ReportFormat.XLSX: ".xlsx",
-    }
-    ext = ext_map[request.report_format]
+    ext = renderer.EXTENSIONS[request.report_format]
     filename = f"{request.report_type.value}_{file_id}{ext}"
-    filepath = os.path.join(settings.OUTPUT_DIR, filename)
-
-    if request.report_format == ReportFormat.PDF:
-        pdf_service.create_report(request, filepath)
-    elif request.report_format == ReportFormat.DOCX:
-        word_service.create_report(request, filepath)
-    elif request.report_format == ReportFormat.XLSX:
-        excel_service.create_report(request, filepath)
+    media_type = renderer.MEDIA_TYPES[request.report_format]
+    if isinstance(report, RenderStream):
+        headers = {
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Cache": cache_status,
+            "Server-Timing": metrics.server_timing(stages, cache_status, started),
+        }
+        return StreamingResponse(report, media_type=media_type, headers=headers)
+
+    _add_stages(stages, report.stages)
+    headers = {"X-Cache": cache_status, "Server-Timing": metrics.server_timing(stages, cache_status, started)}
+    if report.profile:
+        headers["X-Profile-Id"] = profiles.add(report.profile)
+
+    if report.path:
+        # Spilled to disk — serve it, then remove it once the response is sent
+        return FileResponse(
+            path=report.path,
+            filename=filename,
+            media_type=media_type,
+            background=BackgroundTask(os.remove, report.path),
+            headers=headers,
+        )
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(content=report.content, media_type=media_type, headers=headers)
+
+
+@app.post("/generate-report/ndjson", dependencies=[Depends(require_secret)])
+async def generate_report_ndjson(
+    body: Request, x_report_meta: str | None = Header(default=None), x_profile: str | None = Header(default=None)
+):
+    """``/generate-report`` for large exports, with the records uploaded as NDJSON.
+
+    The request fields other than ``records`` go in the ``X-Report-Meta``
+    header as JSON, or on the first line of the body; every further line is
+    one record. Records are spooled to disk as they arrive and read back
+    lazily, so the XLSX, CSV and chunked PDF paths never hold them all.
+    """
+    try:
+        request = await spool(body.stream(), x_report_meta)
+    except IngestError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+
+    try:
+        response = await generate_report(request, body, x_profile)
+    except BaseException:
+        os.remove(request.records.path)
+        raise
+    if isinstance(getattr(response, "body_iterator", None), RenderStream):
+        # The worker may still be reading the spool file; the stream deletes it after the render
+        response.body_iterator.cleanup.append(request.records.path)
     else:
-        raise HTTPException(status_code=400, detail="Invalid report format")
+        os.remove(request.records.path)
+    return response
+
+
+@app.post("/generate-report/msgpack", dependencies=[Depends(require_secret)])
+async def generate_report_msgpack(body: Request, x_profile: str | None = Header(default=None)):
+    """``/generate-report`` with a columnar msgpack body (table reports only).
+
+    The body is one map holding the request fields, with ``records`` replaced
+    by ``columns``: a map of record key -> array of that key's values. The
+    arrays are handed to the renderers as columns, without per-record dicts.
+    """
+    try:
+        request = unpack_columns(await body.body())
+    except IngestError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+    return await generate_report(request, body, x_profile)
+
 
-    content_type_map = {
-        ReportFormat.PDF: "application/pdf",
-        ReportFormat.DOCX: "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        ReportFormat.XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+async def _generate_formats(request: ReportRequest, stages: dict[str, float], started: float, profile: bool):
+    """Several formats of one report, returned together as a ZIP.
+
+    ``Server-Timing`` sums each stage over the formats, which render in parallel.
+    """
+    try:
+        results = await _render_formats(request, profile=profile)
+    except RenderQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Rendering queue is full",
+            headers={"Retry-After": "1"},
+        )
+
+    file_id = uuid.uuid4().hex[:12]
+    files = [
+        (f"{request.report_type.value}_{file_id}{renderer.EXTENSIONS[part.report_format]}", report)
+        for part, report, _ in results
+    ]
+    cache_status = ",".join(cache_status for _, _, cache_status in results)
+    for _, report, _ in results:
+        _add_stages(stages, report.stages)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{request.report_type.value}_{file_id}.zip"',
+        "X-Cache": cache_status,
+        "Server-Timing": metrics.server_timing(stages, cache_status, started),
     }
+    if profile:
+        headers["X-Profile-Id"] = ",".join(profiles.add(report.profile) for _, report, _ in results)
+    return StreamingResponse(_stream_zip(files), media_type="application/zip", headers=headers)
+
+
+async def _render_waiting(request: ReportRequest) -> tuple[renderer.RenderedReport, str]:
+    """``_render``, but waiting with backoff while the render queue is full instead of failing."""
+    delay = 0.5
+    while True:
+        try:
+            return await _render(request)
+        except RenderQueueFull:
+            # Single-report requests got the workers first — wait for one to free up
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 4.0)
+
+
+async def _render_item(index: int, item: dict, slots: asyncio.Semaphore) -> dict:
+    """Render one batch item; failures are recorded in the returned entry instead of raised."""
+    entry = {"index": index, "status": "error"}
+    try:
+        request = ReportRequest.model_validate(item)
+    except ValidationError as exc:
+        entry["error"] = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+        return entry
+
+    if request.report_formats and len(request.report_formats) > 1:
+        entry["error"] = "report_formats is not supported in a batch; add one item per format"
+        return entry
+
+    ext = renderer.EXTENSIONS[request.report_format]
+    entry["filename"] = f"{index:04d}_{request.report_type.value}{ext}"
+    try:
+        async with slots:
+            report, entry["cache"] = await _render_waiting(request)
+    except Exception as exc:
+        entry["error"] = f"{type(exc).__name__}: {exc}"
+    else:
+        entry.update(status="ok", size=report.size, report=report)
+    return entry
+
 
-    return FileResponse(
-        path=filepath,
-        filename=filename,
-        media_type=content_type_map[request.report_format],
+async def _stream_batch(items: list[dict]):
+    """Yield a ZIP of the batch, adding each report as soon as it finishes."""
+    # A batch keeps at most one render per worker in flight so it cannot fill
+    # the queue on its own; other requests still interleave with it.
+    slots = asyncio.Semaphore(executor.workers)
+    tasks = [asyncio.create_task(_render_item(i, item, slots)) for i, item in enumerate(items)]
+    archive = ZipStream()
+    manifest = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            entry = await next_done
+            report = entry.pop("report", None)
+            if report is not None and report.path:
+                try:
+                    for chunk in archive.add_file(entry["filename"], report.path):
+                        yield chunk
+                finally:
+                    os.remove(report.path)
+            elif report is not None:
+                archive.add_bytes(entry["filename"], report.content)
+                yield archive.drain()
+            manifest.append(entry)
+        manifest.sort(key=lambda e: e["index"])
+        archive.add_bytes("manifest.json", json.dumps({"reports": manifest}, indent=2).encode(), compress=True)
+        yield archive.close()
+    finally:
+        # Client went away mid-stream: stop outstanding renders and drop their spill files
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            if task.done() and not task.cancelled() and (leftover := task.result().get("report")) and leftover.path:
+                os.remove(leftover.path)
+
+
+@app.post("/generate-reports", dependencies=[Depends(require_secret)])
+async def generate_reports(batch: BatchReportRequest):
+    """Render many reports concurrently and stream them back as one ZIP.
+
+    ``manifest.json`` (written last) lists every item with its file name, or
+    the error that prevented it from rendering.
+    """
+    if not batch.reports:
+        raise HTTPException(status_code=422, detail="No reports requested")
+    if len(batch.reports) > settings.BATCH_MAX_REPORTS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_REPORTS} reports per batch")
+
+    return StreamingResponse(
+        _stream_batch(batch.reports),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="reports_{uuid.uuid4().hex[:12]}.zip"'},
     )
 
 
+async def _run_job(job: Job) -> None:
+    """Job queue runner — renders like /generate-report and keeps the files on the job."""
+    request = job.request
+
+    def progress(fraction: float) -> None:
+        job.progress = round(fraction, 3)
+
+    while True:
+        try:
+            if request.report_formats and len(request.report_formats) > 1:
+                results = await _render_formats(request, progress)
+            else:
+                report, cache_status = await _render(request, progress=progress)
+                results = [(request, report, cache_status)]
+            break
+        except RenderQueueFull:
+            # Synchronous requests got the workers first — wait for one to free up
+            await asyncio.sleep(0.5)
+
+    file_id = job.id[:12]
+    job.files = [
+        (f"{request.report_type.value}_{file_id}{renderer.EXTENSIONS[part.report_format]}", report)
+        for part, report, _ in results
+    ]
+    job.cache = ",".join(cache_status for _, _, cache_status in results)
+
+
+def _job_status(job: Job) -> dict:
+    status = {
+        "id": job.id,
+        "status": job.status,
+        "priority": job.priority,
+        "progress": job.progress,
+        "queue_position": jobs.position(job),
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    }
+    if job.error:
+        status["error"] = job.error
+    if job.status == DONE:
+        status["files"] = [{"filename": name, "size": report.size} for name, report in job.files]
+        status["cache"] = job.cache
+    return status
+
+
+def _get_job(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.post("/jobs", status_code=202, dependencies=[Depends(require_secret)])
+async def create_job(request: ReportRequest, priority: int = 0):
+    """Queue a report for background rendering; higher ``priority`` runs first."""
+    try:
+        job = jobs.submit(request, priority)
+    except JobQueueFull as exc:
+        raise HTTPException(
+            status_code=429,
+            detail="Job queue is full",
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    return _job_status(job)
+
+
+@app.get("/jobs/{job_id}", dependencies=[Depends(require_secret)])
+async def get_job(job_id: str):
+    return _job_status(_get_job(job_id))
+
+
+@app.get("/jobs/{job_id}/result", dependencies=[Depends(require_secret)])
+async def get_job_result(job_id: str):
+    """The finished document (a ZIP for multi-format jobs); 409 until the job is done."""
+    job = _get_job(job_id)
+    if job.status != DONE:
+        detail = f"Job {job.status}" + (f": {job.error}" if job.error else "")
+        raise HTTPException(status_code=409, detail=detail)
+
+    headers = {"X-Cache": job.cache or ""}
+    if len(job.files) > 1:
+        headers["Content-Disposition"] = f'attachment; filename="{job.request.report_type.value}_{job.id[:12]}.zip"'
+        # Files stay on the job until it expires, so the result can be fetched again
+        return StreamingResponse(_stream_zip(job.files, cleanup=False), media_type="application/zip", headers=headers)
+
+    filename, report = job.files[0]
+    media_type = renderer.MEDIA_TYPES[job.request.report_format]
+    if report.path:
+        return FileResponse(path=report.path, filename=filename, media_type=media_type, headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(content=report.content, media_type=media_type, headers=headers)
+
+
 if __name__ == "__main__":
     import uvicorn
 
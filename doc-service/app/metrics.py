@@ -0,0 +1,172 @@
+"""Prometheus metrics, kept in-process and served as text by ``/metrics``.
+
+Histograms are plain Python objects: an observation is one bisect and three
+additions, and every observation happens on the event loop, so nothing needs
+a lock. Render stage timings are measured inside the workers (``app.timing``)
+and observed here when the report comes back. Queue depths and report cache
+counters are read from their owners at scrape time.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+
+from app.cache import report_cache
+from app.executor import executor
+from app.jobs import jobs
+from app.models.schemas import ReportRequest
+from app.services.renderer import RenderedReport
+
+# Server-Timing order; stages not listed here follow in the order they were recorded
+STAGES = ("parse", "aggregate", "prepare", "context", "template", "layout", "serialize", "merge")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# 1 KiB to 256 MiB in steps of 4
+SIZE_BUCKETS = tuple(1024 * 4**i for i in range(10))
+RECORD_BUCKETS = (10, 100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    """A Prometheus histogram with one series per combination of label values."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(float(b) for b in buckets)
+        # label values -> per-bucket counts (last one is +Inf), then the sum
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self._series.items()):
+            count = 0
+            for bound, hits in zip((*self.buckets, "+Inf"), series):
+                count += hits
+                le = 'le="{}"'.format(bound if isinstance(bound, str) else _number(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {count}")
+        return lines
+
+
+def _sample(name: str, kind: str, help: str, values: dict[tuple[tuple[str, str], ...], float]) -> list[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in values.items():
+        names, label_values = tuple(n for n, _ in labels), tuple(v for _, v in labels)
+        lines.append(f"{name}{_labels(names, label_values)} {_number(value)}")
+    return lines
+
+
+request_seconds = Histogram(
+    "doc_request_duration_seconds",
+    "Report requests from arrival until the last byte of the response was sent.",
+    ("report_type", "report_format", "template_design"),
+    DURATION_BUCKETS,
+)
+stage_seconds = Histogram(
+    "doc_render_stage_seconds",
+    "Time spent in each render stage; stages of chunked PDFs are summed over the chunks.",
+    ("stage", "report_format"),
+    DURATION_BUCKETS,
+)
+report_bytes = Histogram("doc_report_size_bytes", "Size of each rendered document.", ("report_format",), SIZE_BUCKETS)
+report_records = Histogram("doc_report_records", "Records per rendered document.", ("report_type",), RECORD_BUCKETS)
+
+
+def observe_stages(stages: dict[str, float], report_format: str) -> None:
+    for name, seconds in stages.items():
+        stage_seconds.observe(seconds, name, report_format)
+
+
+def observe_report(req: ReportRequest, report: RenderedReport) -> None:
+    """Record a finished document: its size, record count and stage timings."""
+    report_bytes.observe(report.size, req.report_format.value)
+    report_records.observe(len(req.records), req.report_type.value)
+    observe_stages(report.stages, req.report_format.value)
+
+
+def server_timing(stages: dict[str, float], cache_status: str, started: float) -> str:
+    """``Server-Timing`` value: each stage, the cache result and the total, in milliseconds."""
+    names = [s for s in STAGES if s in stages] + [s for s in stages if s not in STAGES]
+    entries = [f"{name};dur={stages[name] * 1000:.1f}" for name in names]
+    entries.append(f'cache;desc="{cache_status}"')
+    entries.append(f"total;dur={(time.perf_counter() - started) * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def expose() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    cache = report_cache.stats()
+    lines = []
+    for histogram in (request_seconds, stage_seconds, report_bytes, report_records):
+        lines += histogram.expose()
+    lines += _sample("doc_render_queue_depth", "gauge", "Renders running or waiting for a worker.", {(): executor.depth})
+    lines += _sample("doc_render_workers", "gauge", "Rendering workers.", {(): executor.workers})
+    lines += _sample("doc_jobs_queued", "gauge", "Jobs waiting to start.", {(): jobs.queued})
+    lines += _sample(
+        "doc_cache_lookups_total",
+        "counter",
+        "Report cache lookups by result.",
+        {(("result", "hit"),): cache["hits"], (("result", "miss"),): cache["misses"]},
+    )
+    lines += _sample(
+        "doc_cache_bytes",
+        "gauge",
+        "Bytes held by each report cache tier.",
+        {(("tier", "memory"),): cache["memory_bytes"], (("tier", "disk"),): cache["disk_bytes"]},
+    )
+    return "\n".join(lines) + "\n"
+
+
+class RequestTimer:
+    """ASGI middleware that times every request from arrival to the last body byte sent.
+
+    It stamps the arrival time in the request state (``request_started``). A
+    handler that sets ``request.state.metric_labels`` to its
+    ``(report_type, report_format, template_design)`` gets the full latency,
+    including a streamed body, observed in ``doc_request_duration_seconds``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        state = scope.setdefault("state", {})
+        state["request_started"] = started
+
+        async def timed_send(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                labels = state.get("metric_labels")
+                if labels:
+                    request_seconds.observe(time.perf_counter() - started, *labels)
+
+        await self.app(scope, receive, timed_send)
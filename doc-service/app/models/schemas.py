@@ -3,13 +3,14 @@ from __future__ import annotations
 from enum import Enum
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 
 
 class ReportFormat(str, Enum):
     PDF = "pdf"
     DOCX = "docx"
     XLSX = "xlsx"
+    CSV = "csv"
 
 
 class TemplateDesign(str, Enum):
@@ -19,6 +20,19 @@ class TemplateDesign(str, Enum):
     MODERN = "modern"
 
 
+class PdfEngine(str, Enum):
+    AUTO = "auto"
+    WEASYPRINT = "weasyprint"
+    REPORTLAB = "reportlab"
+
+
+class RecordSource(str, Enum):
+    # records are the report's rows; the caller computes summary
+    ROWS = "rows"
+    # records are raw shifts; rows and summary totals are computed by the service
+    SHIFTS = "shifts"
+
+
 class ReportType(str, Enum):
     STAFF_SHIFTS = "staff-shifts"
     PAYROLL = "payroll"
@@ -68,6 +82,27 @@ class AttendanceRecord(BaseModel):
     status: str = "unknown"
 
 
+class ShiftRecord(BaseModel):
+    """One worked shift, the raw input for ``record_source="shifts"``."""
+
+    date: str
+    eventName: str = "Event"
+    staffName: str = "Unknown"
+    email: str = ""
+    clientName: str = ""
+    venueName: str = ""
+    role: str = "Staff"
+    scheduledStart: str = ""
+    scheduledEnd: str = ""
+    clockIn: str = ""
+    clockOut: str = ""
+    hoursWorked: float = 0
+    hourlyRate: float = 0
+    # hoursWorked * hourlyRate when not sent
+    earnings: float | None = None
+    status: str = "unknown"
+
+
 class BrandConfig(BaseModel):
     primary_color: str = "#1e293b"
     secondary_color: str = "#334155"
@@ -79,14 +114,40 @@ class BrandConfig(BaseModel):
 
 class ReportRequest(BaseModel):
     report_type: ReportType
-    report_format: ReportFormat
+    # Either one format, or several in report_formats (the first becomes report_format)
+    report_format: ReportFormat | None = None
     title: str
     period: Period
+    # A RecordFile instead of a list when the records were uploaded as NDJSON
     records: list[dict[str, Any]]
     summary: dict[str, Any] = {}
     company_name: str = "Nexa"
     brand_config: BrandConfig | None = None
     template_design: TemplateDesign = TemplateDesign.CLASSIC
+    pdf_engine: PdfEngine = PdfEngine.AUTO
+    report_formats: list[ReportFormat] | None = None
+    record_source: RecordSource = RecordSource.ROWS
+
+    @model_validator(mode="after")
+    def _resolve_format(self) -> ReportRequest:
+        if self.report_formats:
+            self.report_formats = list(dict.fromkeys(self.report_formats))
+            if self.report_format is None:
+                self.report_format = self.report_formats[0]
+        if self.report_format is None:
+            raise ValueError("report_format or report_formats is required")
+        if self.report_type in (ReportType.AI_ANALYSIS, ReportType.WORKING_HOURS) and ReportFormat.CSV in (
+            self.report_formats or [self.report_format]
+        ):
+            raise ValueError(f"csv is only available for table reports, not {self.report_type.value}")
+        if self.report_type in (ReportType.AI_ANALYSIS, ReportType.WORKING_HOURS) and self.record_source != RecordSource.ROWS:
+            raise ValueError(f"record_source=shifts is only available for table reports, not {self.report_type.value}")
+        return self
+
+
+class BatchReportRequest(BaseModel):
+    # Items are validated one by one so a bad item is reported, not fatal to the batch
+    reports: list[dict[str, Any]]
 
 
 class ReportResponse(BaseModel):
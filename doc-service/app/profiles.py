@@ -0,0 +1,37 @@
+"""Render profiles kept in memory for ``GET /profiles/{id}``.
+
+A report requested with the ``X-Profile: 1`` header renders under cProfile
+(see ``renderer.render``). Its statistics are stored here under a fresh id,
+which the response returns in ``X-Profile-Id``. Only the ``max_entries`` most
+recent profiles are kept.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections import OrderedDict
+
+from app.config import settings
+
+
+class ProfileStore:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._profiles: OrderedDict[str, str] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def add(self, text: str) -> str:
+        profile_id = uuid.uuid4().hex
+        self._profiles[profile_id] = text
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> str | None:
+        return self._profiles.get(profile_id)
+
+
+profiles = ProfileStore(settings.PROFILE_KEEP)
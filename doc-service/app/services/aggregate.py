@@ -0,0 +1,155 @@
+"""Report rows and summary totals computed from raw shift records.
+
+With ``record_source="shifts"`` the caller sends every worked shift
+(``ShiftRecord``) instead of pre-aggregated rows, and the same shift list can
+produce any table report:
+
+* staff-shifts — one row per shift;
+* payroll — one row per staff member (name and email), summed with a pandas
+  group-by: shift count, hours, pay, and the hours-weighted average rate;
+* attendance — one row per shift with its schedule and status, plus a
+  per-(event, date) breakdown in ``summary["events"]``: distinct staff, hours
+  and a count of each status, printed as a "By Event" table in PDF, DOCX and XLSX.
+
+The ``summary`` totals each report shows are computed too. Keys the caller did
+send in ``summary`` win over the computed ones. The rows come back as a
+``RecordColumns``, so ``prepare`` reads them without building record dicts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from app.models.schemas import RecordSource, ReportRequest, ReportType, ShiftRecord
+from app.services.columns import TABLE_KEYS
+from app.services.records import RecordColumns, RecordError
+
+_FIELDS = ShiftRecord.model_fields
+_NUMERIC = ("hoursWorked", "hourlyRate", "earnings")
+
+
+def _round(value) -> float | int:
+    # Whole totals stay ints so they print as "120", like totals the backend sends
+    value = round(float(value), 2)
+    return int(value) if value.is_integer() else value
+
+
+def _shifts(req: ReportRequest) -> pd.DataFrame:
+    """The request's shifts as a frame with every ShiftRecord field, defaults filled in."""
+    records = req.records
+    if isinstance(records, RecordColumns):
+        df = pd.DataFrame({k: records.column(k) for k in _FIELDS})
+    else:
+        df = pd.DataFrame.from_records(list(records), columns=list(_FIELDS))
+
+    for key, field in _FIELDS.items():
+        col = df[key]
+        missing = col.isna()
+        if key in _NUMERIC:
+            values = pd.to_numeric(col, errors="coerce")
+            bad = np.flatnonzero(values.isna() & ~missing)
+            if bad.size:
+                i = int(bad[0])
+                raise RecordError(f"Record {i + 1}: {key} must be a number, got {col.iat[i]!r}")
+            df[key] = values
+        elif field.is_required() and missing.any():
+            raise RecordError(f"Record {int(np.flatnonzero(missing)[0]) + 1}: {key} is required")
+        else:
+            # Text fields: a number sent as a name or email is printed as sent, not rejected
+            df[key] = col.where(~missing, field.default).astype(str)
+
+    df["earnings"] = df["earnings"].fillna(df["hoursWorked"].fillna(0) * df["hourlyRate"].fillna(0))
+    df[["hoursWorked", "hourlyRate"]] = df[["hoursWorked", "hourlyRate"]].fillna(0)
+    return df
+
+
+def _payroll(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    staff = df.groupby(["staffName", "email"], sort=False).agg(
+        shifts=("date", "size"),
+        hours=("hoursWorked", "sum"),
+        totalPay=("earnings", "sum"),
+    ).reset_index()
+    hours = staff["hours"].to_numpy()
+    rate = np.divide(staff["totalPay"].to_numpy(), hours, out=np.zeros(len(staff)), where=hours > 0)
+    rows = pd.DataFrame({
+        "name": staff["staffName"],
+        "email": staff["email"],
+        "shifts": staff["shifts"],
+        "hours": staff["hours"].round(2),
+        "averageRate": rate.round(2),
+        "totalPay": staff["totalPay"].round(2),
+    })
+    summary = {
+        "staffCount": len(rows),
+        "totalShifts": len(df),
+        "totalHours": _round(df["hoursWorked"].sum()),
+        "totalPayroll": _round(df["earnings"].sum()),
+    }
+    return rows, summary
+
+
+def _staff_shifts(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    summary = {
+        "totalShifts": len(df),
+        "totalHours": _round(df["hoursWorked"].sum()),
+        "totalEarnings": _round(df["earnings"].sum()),
+    }
+    return df, summary
+
+
+def _attendance(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    # Staff are told apart by name and email, as on the payroll report
+    df = df.assign(_staff=df["staffName"] + "\x00" + df["email"])
+    groups = df.groupby(["eventName", "date"], sort=False)
+    events = groups.agg(staffCount=("_staff", "nunique"), totalHours=("hoursWorked", "sum"))
+    status_counts = df["status"].value_counts()
+    statuses = groups["status"].value_counts().unstack(fill_value=0).reindex(
+        index=events.index, columns=status_counts.index, fill_value=0
+    )
+    summary = {
+        "totalRecords": len(df),
+        "totalHours": _round(df["hoursWorked"].sum()),
+        "totalEvents": len(events),
+        "statusCounts": {status: int(n) for status, n in status_counts.items()},
+        "events": [
+            {
+                "eventName": event,
+                "date": date,
+                "staffCount": int(staff),
+                "totalHours": _round(hours),
+                "statuses": {status: int(n) for status, n in zip(statuses.columns, counts)},
+            }
+            for (event, date), staff, hours, counts in zip(
+                events.index, events["staffCount"], events["totalHours"], statuses.to_numpy()
+            )
+        ],
+    }
+    return df, summary
+
+
+_AGGREGATORS = {
+    ReportType.STAFF_SHIFTS: _staff_shifts,
+    ReportType.PAYROLL: _payroll,
+    ReportType.ATTENDANCE: _attendance,
+}
+
+
+def resolve(req: ReportRequest) -> ReportRequest:
+    """Turn a ``record_source="shifts"`` request into one carrying its report's rows and totals."""
+    if req.record_source != RecordSource.SHIFTS:
+        return req
+    aggregator = _AGGREGATORS.get(req.report_type)
+    if aggregator is None:
+        raise ValueError(f"Shift records cannot produce a {req.report_type.value} report")
+
+    rows, summary = aggregator(_shifts(req))
+    rows = rows[list(TABLE_KEYS[req.report_type])]
+    # Rows hash stands in for the records in the report cache key
+    digest = hashlib.sha256(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()
+    records = RecordColumns(columns={k: rows[k].tolist() for k in rows.columns}, count=len(rows), digest=digest)
+    return req.model_copy(
+        update={"records": records, "summary": {**summary, **req.summary}, "record_source": RecordSource.ROWS}
+    )
@@ -0,0 +1,163 @@
+"""Remote asset fetching (logos, images) shared by the PDF and Word engines.
+
+Assets are cached per process in an LRU keyed by URL. Entries older than
+``ttl`` are revalidated with ``If-None-Match`` / ``If-Modified-Since`` so an
+unchanged logo costs a 304 instead of a download, and URLs that fail are
+remembered for ``negative_ttl`` so a dead CDN doesn't stall every render.
+If revalidation fails (timeout, 5xx) the stale copy keeps being served; only
+a 404 or 410 drops it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urljoin, urlsplit
+
+from app.config import settings
+
+_MAX_REDIRECTS = 3
+# Statuses that mean the asset is gone, rather than the server being unwell
+_GONE = (404, 410)
+
+
+@dataclass
+class Asset:
+    content: bytes
+    content_type: str
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = 0.0
+
+
+class AssetError(Exception):
+    """Raised internally when an asset cannot be fetched."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class AssetFetcher:
+    def __init__(
+        self,
+        max_entries: int = 64,
+        max_bytes: int = 5 * 1024 * 1024,
+        ttl: float = 3600,
+        negative_ttl: float = 60,
+        connect_timeout: float = 2.0,
+        read_timeout: float = 5.0,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._cache: OrderedDict[str, Asset] = OrderedDict()
+        self._failures: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str) -> Asset | None:
+        """Return the asset at ``url`` (http/https only), or None if unavailable.
+
+        A stale copy is returned while the URL fails for any reason but 404/410.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(url)
+            if cached is not None:
+                self._cache.move_to_end(url)
+                if now - cached.fetched_at < self.ttl:
+                    return cached
+            failed_at = self._failures.get(url)
+            if failed_at is not None and now - failed_at < self.negative_ttl:
+                return cached
+
+        try:
+            asset = self._download(url, cached)
+        except (AssetError, HTTPException, OSError, ValueError) as exc:
+            with self._lock:
+                self._failures[url] = time.monotonic()
+                if isinstance(exc, AssetError) and exc.status in _GONE:
+                    self._cache.pop(url, None)
+                    return None
+            return cached
+
+        with self._lock:
+            self._failures.pop(url, None)
+            self._cache[url] = asset
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return asset
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._failures.clear()
+
+    def _download(self, url: str, cached: Asset | None) -> Asset:
+        headers = {"User-Agent": "nexa-doc-service"}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        for _ in range(_MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme == "https":
+                conn = HTTPSConnection(parts.hostname, parts.port, timeout=self.connect_timeout)
+            elif parts.scheme == "http":
+                conn = HTTPConnection(parts.hostname, parts.port, timeout=self.connect_timeout)
+            else:
+                raise AssetError(f"Unsupported scheme: {parts.scheme}")
+            try:
+                conn.connect()
+                conn.sock.settimeout(self.read_timeout)
+                path = parts.path or "/"
+                if parts.query:
+                    path = f"{path}?{parts.query}"
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+
+                if resp.status in (301, 302, 303, 307, 308) and resp.getheader("Location"):
+                    url = urljoin(url, resp.getheader("Location"))
+                    continue
+                if resp.status == 304 and cached is not None:
+                    cached.fetched_at = time.monotonic()
+                    return cached
+                if resp.status != 200:
+                    raise AssetError(f"HTTP {resp.status} for {url}", resp.status)
+
+                length = resp.getheader("Content-Length")
+                if length and int(length) > self.max_bytes:
+                    raise AssetError(f"Asset too large: {length} bytes")
+                content = resp.read(self.max_bytes + 1)
+                if len(content) > self.max_bytes:
+                    raise AssetError(f"Asset too large: >{self.max_bytes} bytes")
+
+                return Asset(
+                    content=content,
+                    content_type=resp.getheader("Content-Type", "application/octet-stream").split(";")[0].strip(),
+                    etag=resp.getheader("ETag"),
+                    last_modified=resp.getheader("Last-Modified"),
+                    fetched_at=time.monotonic(),
+                )
+            finally:
+                conn.close()
+        raise AssetError(f"Too many redirects for {url}")
+
+
+fetcher = AssetFetcher(
+    max_entries=settings.ASSET_CACHE_ENTRIES,
+    max_bytes=settings.ASSET_MAX_BYTES,
+    ttl=settings.ASSET_TTL,
+    negative_ttl=settings.ASSET_NEGATIVE_TTL,
+    connect_timeout=settings.ASSET_CONNECT_TIMEOUT,
+    read_timeout=settings.ASSET_READ_TIMEOUT,
+)
@@ -0,0 +1,151 @@
+"""Column registry for the table reports, shared by every engine.
+
+Each staff-shift, payroll and attendance column is declared once, with its
+header label, alignment and spreadsheet number format. The field type,
+default and required flag come from the matching record model in
+``app.models.schemas``. The PDF context builders, the DOCX tables, the XLSX
+sheets and the CSV header all read their columns from here.
+
+``format_column`` turns a whole column of values into display strings at
+once. Each distinct value is formatted a single time and the results are
+spread back over the rows. Rates, hours and earnings repeat heavily in real
+exports, so this is far fewer format calls than one per cell.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Callable
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.models.schemas import AttendanceRecord, PayrollRecord, ReportType, StaffShiftRecord
+
+MONEY_FORMAT = "$#,##0.00"
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    key: str
+    label: str
+    align: str = "left"
+    # Shown as "$1,234.50" in documents, with ``num_format`` in spreadsheets
+    money: bool = False
+    # XlsxWriter number format for the data cells; None keeps Excel's General
+    num_format: str | None = None
+    # Spreadsheet and CSV header, where it differs from ``label``
+    sheet_label: str | None = None
+    # Bound from the record model: str, float or int, default, and required flag
+    kind: type = str
+    default: object = ""
+    required: bool = False
+
+
+def _money(key: str, label: str, **kwargs) -> ColumnSpec:
+    return ColumnSpec(key, label, align="right", money=True, num_format=MONEY_FORMAT, **kwargs)
+
+
+_LAYOUTS = {
+    ReportType.STAFF_SHIFTS: (
+        ColumnSpec("date", "Date"),
+        ColumnSpec("eventName", "Event"),
+        ColumnSpec("clientName", "Client"),
+        ColumnSpec("venueName", "Venue"),
+        ColumnSpec("role", "Role"),
+        ColumnSpec("clockIn", "Clock In"),
+        ColumnSpec("clockOut", "Clock Out"),
+        ColumnSpec("hoursWorked", "Hours", align="right"),
+        _money("hourlyRate", "Rate", sheet_label="Pay Rate"),
+        _money("earnings", "Earnings"),
+    ),
+    ReportType.PAYROLL: (
+        ColumnSpec("name", "Staff Name"),
+        ColumnSpec("email", "Email"),
+        ColumnSpec("shifts", "Shifts", align="right"),
+        ColumnSpec("hours", "Hours", align="right"),
+        _money("averageRate", "Avg Rate"),
+        _money("totalPay", "Total Pay"),
+    ),
+    ReportType.ATTENDANCE: (
+        ColumnSpec("date", "Date"),
+        ColumnSpec("eventName", "Event"),
+        ColumnSpec("staffName", "Staff"),
+        ColumnSpec("role", "Role"),
+        ColumnSpec("scheduledStart", "Sched. Start"),
+        ColumnSpec("scheduledEnd", "Sched. End"),
+        ColumnSpec("clockIn", "Clock In"),
+        ColumnSpec("clockOut", "Clock Out"),
+        ColumnSpec("hoursWorked", "Hours", align="right"),
+        ColumnSpec("status", "Status"),
+    ),
+}
+
+RECORD_MODELS: dict[ReportType, type[BaseModel]] = {
+    ReportType.STAFF_SHIFTS: StaffShiftRecord,
+    ReportType.PAYROLL: PayrollRecord,
+    ReportType.ATTENDANCE: AttendanceRecord,
+}
+
+
+def _bind(model: type[BaseModel], layout: tuple[ColumnSpec, ...]) -> tuple[ColumnSpec, ...]:
+    """Fill in each column's type, default and required flag from ``model``."""
+    fields = model.model_fields
+    if [c.key for c in layout] != list(fields):
+        raise TypeError(f"{model.__name__} fields do not match its column layout")
+    columns = []
+    for column in layout:
+        field = fields[column.key]
+        if field.annotation not in (str, float, int):
+            raise TypeError(f"{model.__name__}.{column.key}: unsupported column type {field.annotation}")
+        columns.append(replace(column, kind=field.annotation, default=field.default, required=field.is_required()))
+    return tuple(columns)
+
+
+COLUMNS = {report_type: _bind(RECORD_MODELS[report_type], layout) for report_type, layout in _LAYOUTS.items()}
+
+TABLE_KEYS = {report_type: tuple(c.key for c in columns) for report_type, columns in COLUMNS.items()}
+
+
+def sheet_labels(report_type: ReportType) -> dict[str, str]:
+    """Record key -> spreadsheet/CSV header."""
+    return {c.key: c.sheet_label or c.label for c in COLUMNS[report_type]}
+
+
+def context_columns(report_type: ReportType) -> list[dict]:
+    """Column dicts as the PDF templates and the ReportLab engine read them."""
+    return [{"key": c.key, "label": c.label, "align": c.align} for c in COLUMNS[report_type]]
+
+
+def money(value) -> str:
+    return f"${value or 0:,.2f}"
+
+
+def number(value) -> str:
+    """Plain number text; whole floats drop the ".0", as in the backend's JSON."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def format_column(values: np.ndarray, fmt: Callable[[object], str]) -> list[str]:
+    """``fmt`` applied to every value, calling it once per distinct value."""
+    if len(values) == 0:
+        return []
+    distinct, inverse = np.unique(values, return_inverse=True)
+    if len(distinct) * 2 > len(values):
+        # Mostly unique: the lookup would cost more than it saves
+        return [fmt(v) for v in values.tolist()]
+    texts = np.array([fmt(v) for v in distinct.tolist()], dtype=object)
+    return texts[inverse].tolist()
+
+
+def event_table(summary: dict) -> tuple[list[str], list[list]]:
+    """Header and rows of the per-event breakdown in an attendance ``summary``; no rows when it has none."""
+    statuses = list(summary.get("statusCounts") or {})
+    header = ["Event", "Date", "Staff", "Hours", *(status.title() for status in statuses)]
+    rows = [
+        [e["eventName"], e["date"], e["staffCount"], e["totalHours"], *(e["statuses"].get(s, 0) for s in statuses)]
+        for e in summary.get("events") or []
+    ]
+    return header, rows
@@ -0,0 +1,38 @@
+"""CSV export of table reports — one header row, then one row per record.
+
+Rows are written as they are read, so NDJSON uploads stream straight from
+the spool file into the output. Values are written raw, like the spreadsheet
+cells; title, summary and totals are left out so the file loads as plain data.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from typing import BinaryIO
+
+from app.models.schemas import ReportRequest
+from app.services.columns import TABLE_KEYS, sheet_labels
+from app.services.prepared import PreparedTable, iter_value_rows
+from app.timing import stage
+
+
+def create_report(req: ReportRequest, output: str | BinaryIO, prepared: PreparedTable | None = None) -> None:
+    if req.report_type not in TABLE_KEYS:
+        raise ValueError(f"CSV is not available for {req.report_type.value} reports")
+
+    labels = sheet_labels(req.report_type)
+    own_file = isinstance(output, str)
+    raw = open(output, "wb") if own_file else output
+    # utf-8-sig so Excel detects the encoding when the file is opened directly
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    try:
+        with stage("serialize"):
+            writer = csv.writer(text)
+            writer.writerow(labels.values())
+            writer.writerows(iter_value_rows(req, labels, prepared))
+            text.flush()
+    finally:
+        text.detach()
+        if own_file:
+            raw.close()
@@ -1,12 +1,25 @@
-"""Excel spreadsheet generation using pandas + XlsxWriter."""
+"""Excel spreadsheet generation using pandas + XlsxWriter.
+
+Large exports skip pandas entirely and stream rows straight from the records
+into a ``constant_memory`` XlsxWriter workbook, rolling over to a new sheet
+when Excel's row limit is reached.
+"""
 
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import BinaryIO, Iterable
 
+import numpy as np
 import pandas as pd
+import xlsxwriter
 
+from app.config import settings
 from app.models.schemas import BrandConfig, ReportRequest, ReportType, TemplateDesign
+from app.services.columns import COLUMNS, MONEY_FORMAT, ColumnSpec, event_table
+from app.services.prepared import PreparedTable, iter_value_rows, prepare
+from app.services.records import RecordFile
+from app.timing import stage
 
 
 def _get_brand_colors(req: ReportRequest) -> dict[str, str]:
@@ -52,47 +65,41 @@ def _get_brand_colors(req: ReportRequest) -> dict[str, str]:
         }
 
 
-def _write_staff_shifts(req: ReportRequest, writer: pd.ExcelWriter):
-    df = pd.DataFrame(req.records)
-    col_map = {
-        "date": "Date",
-        "eventName": "Event",
-        "clientName": "Client",
-        "venueName": "Venue",
-        "role": "Role",
-        "clockIn": "Clock In",
-        "clockOut": "Clock Out",
-        "hoursWorked": "Hours",
-        "hourlyRate": "Pay Rate",
-        "earnings": "Earnings",
-    }
-    cols = [c for c in col_map if c in df.columns]
-    df = df[cols].rename(columns=col_map)
-    sheet = "Shift History"
+_XLSX_MAX_ROWS = 1_048_576
+# Title, header, blank spacer and TOTAL row surround the data on every sheet
+_ROWS_PER_SHEET = _XLSX_MAX_ROWS - 4
+
+
+def _write_frame(req: ReportRequest, prepared: PreparedTable, writer: pd.ExcelWriter, sheet: str):
+    columns = [c for c in prepared.columns if c.key in prepared.present]
+    df = pd.DataFrame({c.sheet_label or c.label: prepared.values[c.key] for c in columns})
     df.to_excel(writer, sheet_name=sheet, index=False, startrow=1)
 
     workbook = writer.book
     worksheet = writer.sheets[sheet]
     bc = _get_brand_colors(req)
     _write_title(workbook, worksheet, req.title, len(df.columns), bc)
-    _style_sheet(workbook, worksheet, df, bc)
+    _style_sheet(workbook, worksheet, df, bc, [c.num_format for c in columns])
+    return workbook, worksheet, len(df)
+
 
+def _finish_staff_shifts(req: ReportRequest, workbook, worksheet, sheet: str, n_rows: int, _totals: dict):
     # Summary row
-    summary_row = len(df) + 3
+    summary_row = n_rows + 3
     bold = workbook.add_format({"bold": True, "font_size": 11})
-    money = workbook.add_format({"bold": True, "num_format": "$#,##0.00", "font_size": 11})
+    money = workbook.add_format({"bold": True, "num_format": MONEY_FORMAT, "font_size": 11})
     worksheet.write(summary_row, 0, "TOTAL", bold)
     worksheet.write(summary_row, 7, req.summary.get("totalHours", 0), bold)
     worksheet.write(summary_row, 9, req.summary.get("totalEarnings", 0), money)
 
     # Chart
-    if len(df) > 0 and len(df) <= 50:
+    if n_rows > 0 and n_rows <= 50:
         chart = workbook.add_chart({"type": "bar"})
         chart.add_series(
             {
                 "name": "Earnings",
-                "categories": [sheet, 2, 1, len(df) + 1, 1],
-                "values": [sheet, 2, 9, len(df) + 1, 9],
+                "categories": [sheet, 2, 1, n_rows + 1, 1],
+                "values": [sheet, 2, 9, n_rows + 1, 9],
             }
         )
         chart.set_title({"name": "Earnings by Event"})
@@ -100,44 +107,24 @@ def _write_staff_shifts(req: ReportRequest, writer: pd.ExcelWriter):
         worksheet.insert_chart(f"A{summary_row + 3}", chart, {"x_scale": 1.5, "y_scale": 1.2})
 
 
-def _write_payroll(req: ReportRequest, writer: pd.ExcelWriter):
-    df = pd.DataFrame(req.records)
-    col_map = {
-        "name": "Staff Name",
-        "email": "Email",
-        "shifts": "Shifts",
-        "hours": "Hours",
-        "averageRate": "Avg Rate",
-        "totalPay": "Total Pay",
-    }
-    cols = [c for c in col_map if c in df.columns]
-    df = df[cols].rename(columns=col_map)
-    sheet = "Payroll Report"
-    df.to_excel(writer, sheet_name=sheet, index=False, startrow=1)
-
-    workbook = writer.book
-    worksheet = writer.sheets[sheet]
-    bc = _get_brand_colors(req)
-    _write_title(workbook, worksheet, req.title, len(df.columns), bc)
-    _style_sheet(workbook, worksheet, df, bc)
-
+def _finish_payroll(req: ReportRequest, workbook, worksheet, sheet: str, n_rows: int, totals: dict):
     # Summary
-    summary_row = len(df) + 3
+    summary_row = n_rows + 3
     bold = workbook.add_format({"bold": True, "font_size": 11})
-    money = workbook.add_format({"bold": True, "num_format": "$#,##0.00", "font_size": 11})
+    money = workbook.add_format({"bold": True, "num_format": MONEY_FORMAT, "font_size": 11})
     worksheet.write(summary_row, 0, "TOTAL", bold)
-    worksheet.write(summary_row, 2, sum(r.get("shifts", 0) for r in req.records), bold)
+    worksheet.write(summary_row, 2, totals.get("shifts", 0), bold)
     worksheet.write(summary_row, 3, req.summary.get("totalHours", 0), bold)
     worksheet.write(summary_row, 5, req.summary.get("totalPayroll", 0), money)
 
     # Chart
-    if len(df) > 0 and len(df) <= 50:
+    if n_rows > 0 and n_rows <= 50:
         chart = workbook.add_chart({"type": "bar"})
         chart.add_series(
             {
                 "name": "Total Pay",
-                "categories": [sheet, 2, 0, len(df) + 1, 0],
-                "values": [sheet, 2, 5, len(df) + 1, 5],
+                "categories": [sheet, 2, 0, n_rows + 1, 0],
+                "values": [sheet, 2, 5, n_rows + 1, 5],
             }
         )
         chart.set_title({"name": "Pay by Staff Member"})
@@ -145,37 +132,45 @@ def _write_payroll(req: ReportRequest, writer: pd.ExcelWriter):
         worksheet.insert_chart(f"A{summary_row + 3}", chart, {"x_scale": 1.5, "y_scale": 1.2})
 
 
-def _write_attendance(req: ReportRequest, writer: pd.ExcelWriter):
-    df = pd.DataFrame(req.records)
-    col_map = {
-        "date": "Date",
-        "eventName": "Event",
-        "staffName": "Staff",
-        "role": "Role",
-        "scheduledStart": "Sched. Start",
-        "scheduledEnd": "Sched. End",
-        "clockIn": "Clock In",
-        "clockOut": "Clock Out",
-        "hoursWorked": "Hours",
-        "status": "Status",
-    }
-    cols = [c for c in col_map if c in df.columns]
-    df = df[cols].rename(columns=col_map)
-    sheet = "Attendance Report"
-    df.to_excel(writer, sheet_name=sheet, index=False, startrow=1)
-
-    workbook = writer.book
-    worksheet = writer.sheets[sheet]
-    bc = _get_brand_colors(req)
-    _write_title(workbook, worksheet, req.title, len(df.columns), bc)
-    _style_sheet(workbook, worksheet, df, bc)
-
+def _finish_attendance(req: ReportRequest, workbook, worksheet, sheet: str, n_rows: int, _totals: dict):
     # Summary
-    summary_row = len(df) + 3
+    summary_row = n_rows + 3
     bold = workbook.add_format({"bold": True, "font_size": 11})
     worksheet.write(summary_row, 0, "TOTAL", bold)
     worksheet.write(summary_row, 8, req.summary.get("totalHours", 0), bold)
 
+    # Per-event breakdown, when the service aggregated raw shifts
+    header, rows = event_table(req.summary)
+    if rows:
+        bc = _get_brand_colors(req)
+        events = workbook.add_worksheet("By Event")
+        _write_title(workbook, events, f"{req.title} — By Event", len(header), bc)
+        _write_header_row(workbook, events, header, bc)
+        for i, row in enumerate(rows):
+            events.write_row(i + 2, 0, row)
+        max_lens = [max(len(str(v)) for v in column) for column in zip(header, *rows)]
+        _set_columns(workbook, events, max_lens, [None] * len(header))
+        _apply_zebra(workbook, events, len(rows), len(header), bc)
+
+
+def _write_staff_shifts(req: ReportRequest, prepared: PreparedTable, writer: pd.ExcelWriter):
+    sheet = "Shift History"
+    workbook, worksheet, n_rows = _write_frame(req, prepared, writer, sheet)
+    _finish_staff_shifts(req, workbook, worksheet, sheet, n_rows, {})
+
+
+def _write_payroll(req: ReportRequest, prepared: PreparedTable, writer: pd.ExcelWriter):
+    sheet = "Payroll Report"
+    workbook, worksheet, n_rows = _write_frame(req, prepared, writer, sheet)
+    totals = {"shifts": int(prepared.values["shifts"].sum())}
+    _finish_payroll(req, workbook, worksheet, sheet, n_rows, totals)
+
+
+def _write_attendance(req: ReportRequest, prepared: PreparedTable, writer: pd.ExcelWriter):
+    sheet = "Attendance Report"
+    workbook, worksheet, n_rows = _write_frame(req, prepared, writer, sheet)
+    _finish_attendance(req, workbook, worksheet, sheet, n_rows, {})
+
 
 def _write_title(workbook, worksheet, title: str, num_cols: int, bc: dict[str, str] | None = None):
     primary = (bc or {}).get("primary", "#1E293B")
@@ -191,13 +186,9 @@ def _write_title(workbook, worksheet, title: str, num_cols: int, bc: dict[str, s
     worksheet.merge_range(0, 0, 0, num_cols - 1, title, title_fmt)
 
 
-def _style_sheet(workbook, worksheet, df: pd.DataFrame, bc: dict[str, str] | None = None):
-    bc = bc or {}
+def _write_header_row(workbook, worksheet, labels: list[str], bc: dict[str, str]):
     header_bg = bc.get("header_bg", bc.get("primary", "#1E293B"))
     header_fg = bc.get("header_fg", "#FFFFFF")
-    neutral = bc.get("neutral", "#F8FAFC")
-    use_zebra = bc.get("use_zebra", True)
-
     header_fmt = workbook.add_format(
         {
             "bold": True,
@@ -209,26 +200,94 @@ def _style_sheet(workbook, worksheet, df: pd.DataFrame, bc: dict[str, str] | Non
             "text_wrap": True,
         }
     )
-    # Write header row with format
-    for col_num, col_name in enumerate(df.columns):
-        worksheet.write(1, col_num, col_name, header_fmt)
-
-    # Auto-fit column widths (approximate)
-    for col_num, col_name in enumerate(df.columns):
-        max_len = max(
-            len(str(col_name)),
-            df.iloc[:, col_num].astype(str).str.len().max() if len(df) > 0 else 0,
-        )
-        worksheet.set_column(col_num, col_num, min(max_len + 4, 30))
+    worksheet.write_row(1, 0, labels, header_fmt)
+
+
+def _set_columns(workbook, worksheet, max_lens: list[int], num_formats: list[str | None]):
+    """Column widths, plus each column's number format from the registry."""
+    formats = {}
+    for col_num, (max_len, num_format) in enumerate(zip(max_lens, num_formats)):
+        if num_format and num_format not in formats:
+            formats[num_format] = workbook.add_format({"num_format": num_format})
+        worksheet.set_column(col_num, col_num, min(max_len + 4, 30), formats.get(num_format))
+
+
+def _apply_zebra(workbook, worksheet, n_rows: int, n_cols: int, bc: dict[str, str]):
+    # Zebra striping (skipped for plain design) — a single conditional format
+    # over the data range instead of rewriting every other row cell by cell.
+    # Data starts on sheet row 3, so the striped (even-index) records are odd rows.
+    if not bc.get("use_zebra", True) or n_rows == 0 or n_cols == 0:
+        return
+    alt_fmt = workbook.add_format({"bg_color": bc.get("neutral", "#F8FAFC")})
+    worksheet.conditional_format(
+        2, 0, n_rows + 1, n_cols - 1,
+        {"type": "formula", "criteria": "=MOD(ROW(),2)=1", "format": alt_fmt},
+    )
+
+
+def _style_sheet(workbook, worksheet, df: pd.DataFrame, bc: dict[str, str] | None, num_formats: list[str | None]):
+    bc = bc or {}
+    _write_header_row(workbook, worksheet, list(df.columns), bc)
 
-    # Zebra striping (skipped for plain design)
-    if use_zebra:
-        alt_fmt = workbook.add_format({"bg_color": neutral})
-        for row_idx in range(len(df)):
-            if row_idx % 2 == 0:
-                for col_idx in range(len(df.columns)):
-                    val = df.iloc[row_idx, col_idx]
-                    worksheet.write(row_idx + 2, col_idx, val, alt_fmt)
+    # Auto-fit column widths (approximate) — one vectorized pass over all cells
+    max_lens = np.array([len(str(c)) for c in df.columns])
+    if len(df) > 0:
+        max_lens = np.maximum(max_lens, np.char.str_len(df.to_numpy(dtype=str)).max(axis=0))
+    _set_columns(workbook, worksheet, max_lens.tolist(), num_formats)
+
+    _apply_zebra(workbook, worksheet, len(df), len(df.columns), bc)
+
+
+def _stream_sheet(req: ReportRequest, rows: Iterable[tuple], workbook, sheet: str, columns: tuple[ColumnSpec, ...], finish) -> None:
+    """Write rows one by one, without a DataFrame, into constant-memory sheets.
+
+    ``rows`` yields one tuple of raw values per record, in ``columns`` order.
+    Every registry column is written, including keys no record has. When a sheet
+    reaches Excel's row limit the stream continues on "<sheet> (2)", "(3)", ...;
+    the TOTAL row and chart go on the last sheet. ``finish`` is the same summary
+    writer the pandas path uses.
+    """
+    keys = [c.key for c in columns]
+    labels = [c.sheet_label or c.label for c in columns]
+    num_formats = [c.num_format for c in columns]
+    bc = _get_brand_colors(req)
+    shifts_col = keys.index("shifts") if "shifts" in keys else None
+    shifts = 0
+
+    def open_sheet(index: int):
+        name = sheet if index == 1 else f"{sheet} ({index})"
+        ws = workbook.add_worksheet(name)
+        _write_title(workbook, ws, req.title, len(keys), bc)
+        _write_header_row(workbook, ws, labels, bc)
+        return name, ws
+
+    def close_sheet(ws, n_rows: int, max_lens: list[int]):
+        _set_columns(workbook, ws, max_lens, num_formats)
+        _apply_zebra(workbook, ws, n_rows, len(keys), bc)
+
+    sheet_index = 1
+    name, worksheet = open_sheet(sheet_index)
+    max_lens = [len(label) for label in labels]
+    n_rows = 0
+    for values in rows:
+        if n_rows == _ROWS_PER_SHEET:
+            close_sheet(worksheet, n_rows, max_lens)
+            sheet_index += 1
+            name, worksheet = open_sheet(sheet_index)
+            max_lens = [len(label) for label in labels]
+            n_rows = 0
+        worksheet.write_row(n_rows + 2, 0, values)
+        for i, v in enumerate(values):
+            if v is not None:
+                n = len(str(v))
+                if n > max_lens[i]:
+                    max_lens[i] = n
+        if shifts_col is not None:
+            shifts += values[shifts_col] or 0
+        n_rows += 1
+
+    close_sheet(worksheet, n_rows, max_lens)
+    finish(req, workbook, worksheet, name, n_rows, {"shifts": shifts} if shifts_col is not None else {})
 
 
 _WRITERS = {
@@ -237,26 +296,64 @@ _WRITERS = {
     ReportType.ATTENDANCE: _write_attendance,
 }
 
+# Sheet name and summary writer per table report
+_STREAM_LAYOUTS = {
+    ReportType.STAFF_SHIFTS: ("Shift History", _finish_staff_shifts),
+    ReportType.PAYROLL: ("Payroll Report", _finish_payroll),
+    ReportType.ATTENDANCE: ("Attendance Report", _finish_attendance),
+}
+
+
+def _write_info_sheet(req: ReportRequest, workbook) -> None:
+    meta_sheet = workbook.add_worksheet("Info")
+    bold = workbook.add_format({"bold": True, "font_size": 11})
+    meta_sheet.write(0, 0, "Report", bold)
+    meta_sheet.write(0, 1, req.title)
+    meta_sheet.write(1, 0, "Period", bold)
+    meta_sheet.write(1, 1, req.period.label)
+    meta_sheet.write(2, 0, "Generated", bold)
+    meta_sheet.write(2, 1, datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"))
+    meta_sheet.write(3, 0, "Company", bold)
+    meta_sheet.write(3, 1, req.company_name)
+    meta_sheet.set_column(0, 0, 12)
+    meta_sheet.set_column(1, 1, 40)
+
+
+def _use_streaming(req: ReportRequest) -> bool:
+    # Records uploaded as NDJSON always stream, straight from the spool file
+    return (
+        isinstance(req.records, RecordFile)
+        or len(req.records) > settings.XLSX_STREAMING_ROWS
+        or len(req.records) > _ROWS_PER_SHEET
+    )
+
 
-def create_report(req: ReportRequest, output_path: str) -> None:
+def create_report(req: ReportRequest, output: str | BinaryIO, prepared: PreparedTable | None = None) -> None:
     writer_fn = _WRITERS.get(req.report_type)
     if not writer_fn:
         raise ValueError(f"Unknown report type: {req.report_type}")
 
-    with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
-        writer_fn(req, writer)
-
-        # Add metadata sheet
-        workbook = writer.book
-        meta_sheet = workbook.add_worksheet("Info")
-        bold = workbook.add_format({"bold": True, "font_size": 11})
-        meta_sheet.write(0, 0, "Report", bold)
-        meta_sheet.write(0, 1, req.title)
-        meta_sheet.write(1, 0, "Period", bold)
-        meta_sheet.write(1, 1, req.period.label)
-        meta_sheet.write(2, 0, "Generated", bold)
-        meta_sheet.write(2, 1, datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"))
-        meta_sheet.write(3, 0, "Company", bold)
-        meta_sheet.write(3, 1, req.company_name)
-        meta_sheet.set_column(0, 0, 12)
-        meta_sheet.set_column(1, 1, 40)
+    if _use_streaming(req):
+        sheet, finish = _STREAM_LAYOUTS[req.report_type]
+        columns = COLUMNS[req.report_type]
+        # constant_memory flushes each row to a temp file as soon as the next
+        # one starts, so memory stays flat regardless of record count.
+        workbook = xlsxwriter.Workbook(output, {"constant_memory": True, "tmpdir": settings.OUTPUT_DIR})
+        try:
+            with stage("layout"):
+                rows = iter_value_rows(req, [c.key for c in columns], prepared)
+                _stream_sheet(req, rows, workbook, sheet, columns, finish)
+                _write_info_sheet(req, workbook)
+        finally:
+            with stage("serialize"):
+                workbook.close()
+        return
+
+    prepared = prepared or prepare(req)
+    # Closing the writer assembles the workbook — that is the serialize stage
+    with stage("serialize"), pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        with stage("layout"):
+            writer_fn(req, prepared, writer)
+
+            # Add metadata sheet
+            _write_info_sheet(req, writer.book)
@@ -0,0 +1,330 @@
+"""AI-analysis markdown, parsed once into a document tree shared by the PDF and DOCX engines.
+
+Python-Markdown (``tables`` and ``fenced_code``) does the parsing. Its element
+tree is converted into the immutable ``Node`` tree below, and raw HTML and
+fenced code blocks are resolved from its stash. ``to_html`` emits the same
+HTML that ``markdown.markdown`` produced for the WeasyPrint template, except
+that email autolinks are written as plain text rather than entity-obfuscated.
+``word_service`` walks the same tree, so DOCX output gets the same tables
+and code blocks as the PDF.
+
+Trees are cached per process by a hash of the content. Re-rendering the same
+analysis, or rendering it in a second format, skips the parse.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from xml.etree.ElementTree import Element
+
+import markdown
+from markdown.serializers import to_html_string
+from markdown.util import AMP_SUBSTITUTE, HTML_PLACEHOLDER_RE, STX
+
+from app.config import settings
+from app.models.schemas import ReportRequest
+
+_EXTENSIONS = ["tables", "fenced_code"]
+
+# How fenced_code stashes a block: <pre><code class="language-x">escaped</code></pre>
+_CODE_BLOCK = re.compile(r"<pre[^>]*><code([^>]*)>(.*)</code></pre>\s*", re.S)
+_LANGUAGE = re.compile(r'class="language-([^"]+)"')
+_TAG = re.compile(r"<[^>]*>")
+_ALIGN = re.compile(r"text-align:\s*(\w+)")
+# Entities that inline processors (email autolinks) write with ``AMP_SUBSTITUTE`` for ``&``;
+# the postprocessors this module does not run would restore them
+_SUBSTITUTED_ENTITY = re.compile(re.escape(AMP_SUBSTITUTE) + r"(#\d+|#x[0-9a-fA-F]+|\w+);")
+
+_BLOCK_KINDS = {"p": "paragraph", "ul": "bullet_list", "ol": "ordered_list", "li": "item", "blockquote": "quote"}
+_BLOCK_TAGS = {"p", "ul", "ol", "blockquote", "pre", "table", "hr", "h1", "h2", "h3", "h4", "h5", "h6", "div"}
+_INLINE_KINDS = {"strong": "strong", "b": "strong", "em": "em", "i": "em", "code": "code", "a": "link"}
+_HTML_TAGS = {
+    "paragraph": "p",
+    "bullet_list": "ul",
+    "ordered_list": "ol",
+    "item": "li",
+    "quote": "blockquote",
+    "strong": "strong",
+    "em": "em",
+    "code": "code",
+}
+
+# Node kinds laid out as blocks; ``html`` is a block at the top level and inline elsewhere
+BLOCKS = {"heading", "paragraph", "bullet_list", "ordered_list", "item", "table", "code_block", "quote", "rule"}
+
+_CACHE: OrderedDict[str, Node] = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Node:
+    """One block or inline element.
+
+    Blocks: ``document``, ``heading`` (``level``), ``paragraph``,
+    ``bullet_list``, ``ordered_list`` (``start``), ``item``, ``table``,
+    ``header`` and ``row`` (of ``cell`` with ``align``), ``code_block``
+    (``text``, ``language``), ``quote``, ``rule`` and ``html`` (raw ``text``).
+    Inlines: ``text``, ``strong``, ``em``, ``code``, ``link`` (``href``,
+    ``title``), ``image`` (``href``, ``text`` as alt), ``break`` and ``html``.
+    """
+
+    kind: str
+    children: tuple[Node, ...] = ()
+    text: str = ""
+    level: int = 0
+    start: int = 1
+    align: str = ""
+    href: str = ""
+    title: str = ""
+    language: str = ""
+
+
+def _unsubstitute(text: str) -> str:
+    """Text or attribute value with Python-Markdown's ``AMP_SUBSTITUTE`` entities decoded."""
+    if AMP_SUBSTITUTE not in text:
+        return text
+    text = _SUBSTITUTED_ENTITY.sub(lambda m: html.unescape(f"&{m.group(1)};"), text)
+    return text.replace(AMP_SUBSTITUTE, "&")
+
+
+def _raw_html(markup: str) -> str:
+    """Raw HTML as ``AndSubstitutePostprocessor`` would leave it."""
+    return markup.replace(AMP_SUBSTITUTE, "&")
+
+
+def plain_text(node: Node) -> str:
+    """The visible text under ``node``, with markup and raw HTML tags dropped."""
+    if node.kind == "html":
+        return html.unescape(_TAG.sub("", node.text))
+    if node.kind == "break":
+        return "\n"
+    if node.kind in ("text", "code", "code_block") or (node.kind == "image" and node.text):
+        return node.text
+    return "".join(plain_text(child) for child in node.children)
+
+
+class _Converter:
+    """Python-Markdown element tree -> ``Node``, resolving stash placeholders."""
+
+    def __init__(self, stash: list[str]):
+        self.stash = stash
+
+    def _raw(self, text: str) -> list[Node]:
+        """``text`` split into ``text`` and ``html`` inlines at stash placeholders."""
+        if STX not in text:
+            return [Node("text", text=_unsubstitute(text))] if text else []
+        nodes = []
+        pos = 0
+        for m in HTML_PLACEHOLDER_RE.finditer(text):
+            if m.start() > pos:
+                nodes.append(Node("text", text=_unsubstitute(text[pos : m.start()])))
+            nodes.append(Node("html", text=self._stashed(m)))
+            pos = m.end()
+        if pos < len(text):
+            nodes.append(Node("text", text=_unsubstitute(text[pos:])))
+        return nodes
+
+    def _stashed(self, m: re.Match) -> str:
+        raw = self.stash[int(m.group(1))]
+        return _raw_html(raw if isinstance(raw, str) else to_html_string(raw))
+
+    def inlines(self, el: Element) -> tuple[Node, ...]:
+        nodes = self._raw(el.text or "")
+        for child in el:
+            nodes.append(self.inline(child))
+            nodes += self._raw(child.tail or "")
+        return tuple(nodes)
+
+    def inline(self, el: Element) -> Node:
+        if el.tag == "br":
+            return Node("break")
+        if el.tag == "img":
+            return Node(
+                "image",
+                href=_unsubstitute(el.get("src", "")),
+                text=_unsubstitute(el.get("alt", "")),
+                title=_unsubstitute(el.get("title", "")),
+            )
+        kind = _INLINE_KINDS.get(el.tag)
+        if kind is None:
+            return Node("html", text=_raw_html(to_html_string(el)))
+        children = self.inlines(el)
+        if kind == "code":
+            # Code spans arrive HTML-escaped (``util.code_escape``)
+            return Node("code", text=html.unescape("".join(n.text for n in children)))
+        if kind == "link":
+            href, title = _unsubstitute(el.get("href", "")), _unsubstitute(el.get("title", ""))
+            return Node("link", children, href=href, title=title)
+        return Node(kind, children)
+
+    def blocks(self, el: Element) -> tuple[Node, ...]:
+        return tuple(self.block(child) for child in el)
+
+    def block(self, el: Element) -> Node:
+        tag = el.tag
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            return Node("heading", self.inlines(el), level=int(tag[1]))
+        if tag == "p":
+            m = HTML_PLACEHOLDER_RE.fullmatch((el.text or "").strip())
+            if m and len(el) == 0:
+                return self._stashed_block(self._stashed(m))
+            return Node("paragraph", self.inlines(el))
+        if tag == "li":
+            return Node("item", self._item(el))
+        if tag in ("ul", "ol", "blockquote"):
+            return Node(_BLOCK_KINDS[tag], self.blocks(el), start=int(el.get("start", 1)))
+        if tag == "table":
+            rows = (self._row(tr, "header" if section.tag == "thead" else "row") for section in el for tr in section)
+            return Node("table", tuple(rows))
+        if tag == "pre":
+            code = el.find("code")
+            text = (code.text if code is not None else el.text) or ""
+            return Node("code_block", text=html.unescape(text))
+        if tag == "hr":
+            return Node("rule")
+        return Node("html", text=_raw_html(to_html_string(el)))
+
+    def _item(self, li: Element) -> tuple[Node, ...]:
+        """Tight items hold inlines (then any nested list), loose ones hold blocks."""
+        nodes = [] if (li.text or "").isspace() else self._raw(li.text or "")
+        for child in li:
+            if child.tag in _BLOCK_TAGS:
+                nodes.append(self.block(child))
+            else:
+                nodes.append(self.inline(child))
+                nodes += self._raw(child.tail or "")
+        return tuple(nodes)
+
+    def _row(self, tr: Element, kind: str) -> Node:
+        cells = []
+        for cell in tr:
+            style = cell.get("style")
+            m = _ALIGN.search(style) if style else None
+            cells.append(Node("cell", self.inlines(cell), align=m.group(1) if m else cell.get("align", "")))
+        return Node(kind, tuple(cells))
+
+    def _stashed_block(self, raw: str) -> Node:
+        m = _CODE_BLOCK.fullmatch(raw)
+        if m is None:
+            return Node("html", text=raw)
+        language = _LANGUAGE.search(m.group(1))
+        return Node("code_block", text=html.unescape(m.group(2)), language=language.group(1) if language else "")
+
+
+def _parse(source: str) -> Node:
+    """Run Python-Markdown up to its final element tree — ``Markdown.convert`` minus serializing."""
+    md = markdown.Markdown(extensions=_EXTENSIONS)
+    lines = source.split("\n")
+    for prep in md.preprocessors:
+        lines = prep.run(lines)
+    root = md.parser.parseDocument(lines).getroot()
+    for treeprocessor in md.treeprocessors:
+        new_root = treeprocessor.run(root)
+        if new_root is not None:
+            root = new_root
+    return Node("document", _Converter(md.htmlStash.rawHtmlBlocks).blocks(root))
+
+
+def parse(source: str) -> Node:
+    """The document tree for ``source``, from the per-process cache when possible."""
+    key = hashlib.sha256(source.encode("utf-8", "surrogatepass")).hexdigest()
+    with _CACHE_LOCK:
+        tree = _CACHE.get(key)
+        if tree is not None:
+            _CACHE.move_to_end(key)
+            return tree
+    tree = _parse(source)
+    with _CACHE_LOCK:
+        _CACHE[key] = tree
+        while len(_CACHE) > settings.MARKDOWN_CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return tree
+
+
+def analysis(req: ReportRequest) -> Node:
+    """The parsed markdown of an ``ai-analysis`` request (``records[0]["content"]``)."""
+    source = ""
+    if req.records and len(req.records) > 0:
+        source = req.records[0].get("content", "")
+    return parse(source)
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _attr(value: str) -> str:
+    return _escape(value).replace('"', "&quot;")
+
+
+def _inline_html(node: Node) -> str:
+    kind = node.kind
+    if kind == "text":
+        return _escape(node.text)
+    if kind == "html":
+        return node.text
+    if kind == "break":
+        return "<br />"
+    if kind == "code":
+        return f"<code>{_escape(node.text)}</code>"
+    if kind == "image":
+        title = f' title="{_attr(node.title)}"' if node.title else ""
+        return f'<img alt="{_attr(node.text)}" src="{_attr(node.href)}"{title} />'
+    inner = "".join(_inline_html(child) for child in node.children)
+    if kind == "link":
+        title = f' title="{_attr(node.title)}"' if node.title else ""
+        return f'<a href="{_attr(node.href)}"{title}>{inner}</a>'
+    tag = _HTML_TAGS[kind]
+    return f"<{tag}>{inner}</{tag}>"
+
+
+def _row_html(row: Node) -> str:
+    tag = "th" if row.kind == "header" else "td"
+    cells = []
+    for cell in row.children:
+        style = f' style="text-align: {cell.align};"' if cell.align else ""
+        cells.append(f"<{tag}{style}>{''.join(_inline_html(c) for c in cell.children)}</{tag}>")
+    return "<tr>\n" + "\n".join(cells) + "\n</tr>"
+
+
+def _block_html(node: Node) -> str:
+    kind = node.kind
+    if kind == "heading":
+        inner = "".join(_inline_html(child) for child in node.children)
+        return f"<h{node.level}>{inner}</h{node.level}>"
+    if kind == "paragraph":
+        return f"<p>{''.join(_inline_html(child) for child in node.children)}</p>"
+    if kind == "item":
+        return "<li>" + "".join(_node_html(child) for child in node.children) + "</li>"
+    if kind in ("bullet_list", "ordered_list", "quote"):
+        tag = _HTML_TAGS[kind]
+        start = f' start="{node.start}"' if node.start != 1 else ""
+        return f"<{tag}{start}>\n" + "\n".join(_block_html(child) for child in node.children) + f"\n</{tag}>"
+    if kind == "table":
+        head = [r for r in node.children if r.kind == "header"]
+        body = [r for r in node.children if r.kind == "row"]
+        parts = ["<table>"]
+        if head:
+            parts += ["<thead>", *map(_row_html, head), "</thead>"]
+        parts += ["<tbody>", *map(_row_html, body), "</tbody>", "</table>"]
+        return "\n".join(parts)
+    if kind == "code_block":
+        language = f' class="language-{_attr(node.language)}"' if node.language else ""
+        return f"<pre><code{language}>{_attr(node.text)}</code></pre>"
+    if kind == "rule":
+        return "<hr />"
+    return node.text
+
+
+def _node_html(node: Node) -> str:
+    return _block_html(node) if node.kind in BLOCKS else _inline_html(node)
+
+
+def to_html(tree: Node) -> str:
+    """HTML for the WeasyPrint template, as ``markdown.markdown`` would write it."""
+    return "\n".join(_block_html(child) for child in tree.children)
@@ -0,0 +1,193 @@
+"""Chunked, parallel WeasyPrint rendering for very large table reports.
+
+A single ``write_pdf`` call lays out the whole ``report.html`` table on one
+core and keeps every page box in memory until the end. Here the records are
+cut into page-aligned chunks that the rendering workers lay out at the same
+time, each holding at most ``PDF_CHUNK_PAGES`` pages. The chunk PDFs are then
+joined with pypdf and stamped with continuous "Page X of Y" footers.
+
+Only the workers run the layout and merge steps, so WeasyPrint, pypdf and
+ReportLab are imported inside them rather than by the API process. Each
+chunk task carries only its own records, so a worker's memory and the data
+sent to it grow with the chunk rather than the report.
+
+Each chunk starts on a fresh page. Chunks are cut at the fewest rows the
+sample fitted on a page, so a chunk whose rows wrap more than the sample's
+never spills onto an extra page. Its last page may end a few rows short
+instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import tempfile
+import time
+from io import BytesIO
+from typing import TYPE_CHECKING, Callable
+
+from app import timing
+from app.config import settings
+from app.models.schemas import ReportFormat, ReportRequest
+from app.services import renderer, report_context
+from app.services.records import RecordFile, window
+
+if TYPE_CHECKING:
+    from pypdf import PdfWriter
+
+# Records laid out to measure how many rows fit on a page
+_SAMPLE_ROWS = 200
+
+
+def wants_chunks(req: ReportRequest) -> bool:
+    return (
+        req.report_type in report_context.CONTEXT_BUILDERS
+        and renderer.engine_name(req) == "pdf_service"
+        and len(req.records) > settings.PDF_CHUNK_ROWS
+    )
+
+
+def _part(req: ReportRequest, start: int, stop: int) -> tuple[ReportRequest, int, int, int]:
+    """The request a worker needs for records ``start:stop``, with the range and offset within it.
+
+    Spooled NDJSON records are read in place from their file, so that request
+    is sent whole; its pickle is only the path and index.
+    """
+    if isinstance(req.records, RecordFile):
+        return req, start, stop, 0
+    part = req.model_copy(update={"records": window(req.records, start, stop)})
+    return part, 0, stop - start, start
+
+
+def plan(sample: ReportRequest, workers: int, sums: dict) -> list[tuple[int, int]]:
+    """Row ranges that each fill whole pages, about one per worker.
+
+    ``sample`` carries at least the first ``_SAMPLE_ROWS`` records; ``sums``
+    are the whole report's column totals.
+    """
+    from app.services import pdf_service
+
+    n = sums["count"]
+    first, per_page = pdf_service.measure_table_rows(sample, _SAMPLE_ROWS, sums)
+    if not per_page:
+        return [(0, n)]
+
+    total_pages = 1 + math.ceil(max(n - first, 0) / per_page)
+    pages = min(max(1, math.ceil(total_pages / workers)), settings.PDF_CHUNK_PAGES)
+    bounds = []
+    start, stop = 0, first + (pages - 1) * per_page
+    while start < n:
+        bounds.append((start, min(stop, n)))
+        start, stop = stop, stop + pages * per_page
+    return bounds
+
+
+def render_chunk(
+    req: ReportRequest, start: int, stop: int, sums: dict, offset: int
+) -> tuple[str, dict[str, float]]:
+    """Render one chunk (see ``pdf_service.create_table_chunk``) to a temp file in ``OUTPUT_DIR``.
+
+    Returns its path and stage timings.
+    """
+    from app.services import pdf_service
+
+    timing.reset()
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=settings.OUTPUT_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pdf_service.create_table_chunk(req, start, stop, f, sums, offset)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, timing.collect()
+
+
+def _stamp_page_numbers(writer: PdfWriter) -> None:
+    """Draw the footer the template leaves out of chunks, numbered across the whole document."""
+    from pypdf import PdfReader
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen import canvas
+
+    # Baseline of the template's 8px @bottom-center box, centred in the 2cm margin
+    footer_y = 1 * cm - 2
+    total = len(writer.pages)
+    buf = BytesIO()
+    c = canvas.Canvas(buf)
+    for number, page in enumerate(writer.pages, start=1):
+        width, height = float(page.mediabox.width), float(page.mediabox.height)
+        c.setPageSize((width, height))
+        c.setFont("Helvetica", 6)
+        c.setFillColor(HexColor("#b0b0b0"))
+        c.drawCentredString(width / 2, footer_y, f"Page {number} of {total}")
+        c.showPage()
+    c.save()
+    for page, stamp in zip(writer.pages, PdfReader(buf).pages):
+        page.merge_page(stamp)
+
+
+def merge(paths: list[str]) -> renderer.RenderedReport:
+    """Join chunk PDFs in order into one numbered document."""
+    from pypdf import PdfReader, PdfWriter
+
+    start = time.perf_counter()
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    metadata = PdfReader(paths[0]).metadata
+    if metadata:
+        writer.add_metadata(metadata)
+    _stamp_page_numbers(writer)
+
+    buf = BytesIO()
+    writer.write(buf)
+    report = renderer.from_buffer(buf, ReportFormat.PDF)
+    report.stages = {"merge": time.perf_counter() - start}
+    return report
+
+
+async def render(
+    req: ReportRequest, executor, progress: Callable[[float], None] | None = None
+) -> renderer.RenderedReport:
+    """Render ``req`` as parallel chunks on ``executor`` and merge them.
+
+    ``progress`` is called with the fraction of chunks finished so far.
+    """
+    # One pass over the records, in a thread; for spooled records it reads the file
+    sums = await asyncio.to_thread(report_context.column_totals, req)
+    sample = _part(req, 0, _SAMPLE_ROWS)[0]
+    bounds = await executor.run(plan, sample, executor.workers, sums)
+    if len(bounds) == 1:
+        return await executor.run(renderer.render, req)
+
+    # One request never holds more than a worker's worth of chunks in flight
+    slots = asyncio.Semaphore(executor.workers)
+    done = 0
+
+    async def part(start: int, stop: int) -> tuple[str, dict[str, float]]:
+        nonlocal done
+        async with slots:
+            # Sliced only once a slot is free, so at most a worker's worth of slices exist
+            chunk_req, lo, hi, offset = _part(req, start, stop)
+            result = await executor.run(render_chunk, chunk_req, lo, hi, sums, offset)
+        done += 1
+        if progress:
+            progress(done / len(bounds))
+        return result
+
+    results = await asyncio.gather(*(part(a, b) for a, b in bounds), return_exceptions=True)
+    paths = [r[0] for r in results if not isinstance(r, BaseException)]
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        report = await executor.run(merge, paths)
+        # Chunk stages are summed, so they add up to worker time rather than wall time
+        for _, stages in results:
+            for name, seconds in stages.items():
+                report.stages[name] = report.stages.get(name, 0.0) + seconds
+        return report
+    finally:
+        for path in paths:
+            os.remove(path)
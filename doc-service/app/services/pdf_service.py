@@ -4,191 +4,117 @@ from __future__ import annotations
 
 import os
 from datetime import datetime, timezone
+from functools import lru_cache
+from io import BytesIO
+from typing import BinaryIO
 
-import markdown
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from weasyprint import CSS, HTML, default_url_fetcher
+from weasyprint.text.fonts import FontConfiguration
 
-from app.models.schemas import BrandConfig, ReportRequest, ReportType, TemplateDesign
+from app.config import settings
+from app.models.schemas import ReportRequest, ReportType, TemplateDesign
+from app.services import assets, report_context
+from app.services.prepared import PreparedTable
+from app.timing import stage
 
 _TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "..", "templates")
-_env = Environment(loader=FileSystemLoader(_TEMPLATE_DIR), autoescape=True)
-
-
-def _brand_context(req: ReportRequest) -> dict:
-    """Extract brand CSS variables from request, falling back to defaults."""
-    bc = req.brand_config or BrandConfig()
-    design = req.template_design
-    ctx = {
-        "brand_primary": bc.primary_color,
-        "brand_secondary": bc.secondary_color,
-        "brand_accent": bc.accent_color,
-        "brand_neutral": bc.neutral_color,
-        "template_design": design.value,
-    }
-    # Plain design suppresses logo
-    if bc.logo_header_url and design != TemplateDesign.PLAIN:
-        ctx["logo_header_url"] = bc.logo_header_url
-    return ctx
+_env = Environment(
+    loader=FileSystemLoader(_TEMPLATE_DIR),
+    autoescape=True,
+    # Shared on disk so freshly spawned workers skip template compilation
+    bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR or None),
+)
+
+_TEMPLATES = ("report", "analysis", "working_hours")
+
+# Chunks of a split report leave page numbers to pdf_chunks, which stamps them after merging
+_CHUNK_CSS = "@page { @bottom-center { content: none } }"
+
+
+def _url_fetcher(url: str, timeout: int = 10, ssl_context=None) -> dict:
+    """WeasyPrint url_fetcher that serves http(s) assets from the shared asset cache."""
+    if url.startswith(("http://", "https://")):
+        asset = assets.fetcher.fetch(url)
+        if asset is None:
+            raise ValueError(f"Asset unavailable: {url}")
+        return {"string": asset.content, "mime_type": asset.content_type, "redirected_url": url}
+    return default_url_fetcher(url, timeout=timeout, ssl_context=ssl_context)
+
+
+@lru_cache(maxsize=64)
+def _brand_sheet(primary: str, secondary: str, accent: str) -> CSS:
+    """The only per-brand CSS — the variables the design stylesheets refer to."""
+    return CSS(
+        string=f":root {{ --brand-primary: {primary}; --brand-secondary: {secondary}; --brand-accent: {accent}; }}"
+    )
+
+
+class WeasyRenderer:
+    """WeasyPrint state kept warm for the life of a worker process.
+
+    Each template's stylesheet is rendered and parsed once per
+    ``TemplateDesign``, and one ``FontConfiguration`` serves every document,
+    so a report only pays for its own HTML and layout.
+    """
+
+    def __init__(self):
+        self.font_config = FontConfiguration()
+        self._sheets: dict[tuple[str, TemplateDesign], CSS] = {}
+        self._chunk_sheet = CSS(string=_CHUNK_CSS)
+        self._warm = False
+
+    def stylesheet(self, template: str, design: TemplateDesign) -> CSS:
+        sheet = self._sheets.get((template, design))
+        if sheet is None:
+            css = _env.get_template(f"styles/{template}.css").render(template_design=design.value)
+            sheet = CSS(string=css, font_config=self.font_config)
+            self._sheets[(template, design)] = sheet
+        return sheet
+
+    def document(self, template: str, ctx: dict, chunk: bool = False):
+        """Lay out ``<template>.html`` with ``ctx`` (which must include the brand context)."""
+        with stage("template"):
+            html_str = _env.get_template(f"{template}.html").render(**ctx)
+        sheets = [
+            _brand_sheet(ctx["brand_primary"], ctx["brand_secondary"], ctx["brand_accent"]),
+            self.stylesheet(template, TemplateDesign(ctx["template_design"])),
+        ]
+        if chunk:
+            sheets.append(self._chunk_sheet)
+        with stage("layout"):
+            return HTML(string=html_str, url_fetcher=_url_fetcher).render(
+                stylesheets=sheets, font_config=self.font_config
+            )
+
+    def write_pdf(self, template: str, ctx: dict, output: str | BinaryIO, chunk: bool = False) -> None:
+        document = self.document(template, ctx, chunk)
+        with stage("serialize"):
+            document.write_pdf(output)
+
+    def warm_up(self) -> None:
+        """Parse every stylesheet and lay out a tiny page so fonts are loaded before the first report."""
+        if self._warm:
+            return
+        for template in _TEMPLATES:
+            _env.get_template(f"{template}.html")
+            for design in TemplateDesign:
+                self.stylesheet(template, design)
+        HTML(string="<p>warm-up</p>").write_pdf(
+            BytesIO(), stylesheets=[self.stylesheet("report", TemplateDesign.CLASSIC)], font_config=self.font_config
+        )
+        self._warm = True
+
 
+weasy = WeasyRenderer()
 
-def _build_staff_shifts_context(req: ReportRequest) -> dict:
-    columns = [
-        {"key": "date", "label": "Date", "align": "left"},
-        {"key": "eventName", "label": "Event", "align": "left"},
-        {"key": "clientName", "label": "Client", "align": "left"},
-        {"key": "venueName", "label": "Venue", "align": "left"},
-        {"key": "role", "label": "Role", "align": "left"},
-        {"key": "clockIn", "label": "Clock In", "align": "left"},
-        {"key": "clockOut", "label": "Clock Out", "align": "left"},
-        {"key": "hoursWorked", "label": "Hours", "align": "right"},
-        {"key": "hourlyRate", "label": "Rate", "align": "right"},
-        {"key": "earnings", "label": "Earnings", "align": "right"},
-    ]
-    summary_items = [
-        {"label": "Total Shifts", "value": req.summary.get("totalShifts", len(req.records))},
-        {"label": "Total Hours", "value": req.summary.get("totalHours", 0)},
-        {"label": "Total Earnings", "value": f"${req.summary.get('totalEarnings', 0):,.2f}"},
-    ]
-    totals = {
-        "date": "TOTAL",
-        "hoursWorked": req.summary.get("totalHours", 0),
-        "earnings": f"${req.summary.get('totalEarnings', 0):,.2f}",
-    }
-    # Format earnings in rows
-    rows = []
-    for r in req.records:
-        row = dict(r)
-        row["earnings"] = f"${row.get('earnings', 0):,.2f}"
-        row["hourlyRate"] = f"${row.get('hourlyRate', 0):,.2f}"
-        rows.append(row)
-    return {"columns": columns, "rows": rows, "summary_items": summary_items, "totals": totals}
-
-
-def _build_payroll_context(req: ReportRequest) -> dict:
-    columns = [
-        {"key": "name", "label": "Staff Name", "align": "left"},
-        {"key": "email", "label": "Email", "align": "left"},
-        {"key": "shifts", "label": "Shifts", "align": "right"},
-        {"key": "hours", "label": "Hours", "align": "right"},
-        {"key": "averageRate", "label": "Avg Rate", "align": "right"},
-        {"key": "totalPay", "label": "Total Pay", "align": "right"},
-    ]
-    summary_items = [
-        {"label": "Staff Count", "value": req.summary.get("staffCount", len(req.records))},
-        {"label": "Total Hours", "value": req.summary.get("totalHours", 0)},
-        {"label": "Total Payroll", "value": f"${req.summary.get('totalPayroll', 0):,.2f}"},
-    ]
-    totals = {
-        "name": "TOTAL",
-        "shifts": sum(r.get("shifts", 0) for r in req.records),
-        "hours": req.summary.get("totalHours", 0),
-        "totalPay": f"${req.summary.get('totalPayroll', 0):,.2f}",
-    }
-    rows = []
-    for r in req.records:
-        row = dict(r)
-        row["averageRate"] = f"${row.get('averageRate', 0):,.2f}"
-        row["totalPay"] = f"${row.get('totalPay', 0):,.2f}"
-        rows.append(row)
-    return {"columns": columns, "rows": rows, "summary_items": summary_items, "totals": totals}
-
-
-def _build_attendance_context(req: ReportRequest) -> dict:
-    columns = [
-        {"key": "date", "label": "Date", "align": "left"},
-        {"key": "eventName", "label": "Event", "align": "left"},
-        {"key": "staffName", "label": "Staff", "align": "left"},
-        {"key": "role", "label": "Role", "align": "left"},
-        {"key": "scheduledStart", "label": "Sched. Start", "align": "left"},
-        {"key": "scheduledEnd", "label": "Sched. End", "align": "left"},
-        {"key": "clockIn", "label": "Clock In", "align": "left"},
-        {"key": "clockOut", "label": "Clock Out", "align": "left"},
-        {"key": "hoursWorked", "label": "Hours", "align": "right"},
-        {"key": "status", "label": "Status", "align": "left"},
-    ]
-    summary_items = [
-        {"label": "Total Records", "value": req.summary.get("totalRecords", len(req.records))},
-        {"label": "Total Hours", "value": req.summary.get("totalHours", 0)},
-    ]
-    totals = {
-        "date": "TOTAL",
-        "hoursWorked": req.summary.get("totalHours", 0),
-    }
-    return {"columns": columns, "rows": req.records, "summary_items": summary_items, "totals": totals}
-
-
-_CONTEXT_BUILDERS = {
-    ReportType.STAFF_SHIFTS: _build_staff_shifts_context,
-    ReportType.PAYROLL: _build_payroll_context,
-    ReportType.ATTENDANCE: _build_attendance_context,
-}
-
-
-def _build_ai_analysis_context(req: ReportRequest) -> dict:
-    """Build context for AI analysis reports — renders markdown content to HTML."""
-    md_text = ""
-    if req.records and len(req.records) > 0:
-        md_text = req.records[0].get("content", "")
-
-    analysis_html = markdown.markdown(md_text, extensions=["tables", "fenced_code"])
-
-    summary_items = []
-    if req.summary:
-        if "totalEvents" in req.summary:
-            summary_items.append({"label": "Events", "value": req.summary["totalEvents"]})
-        if "totalStaffHours" in req.summary:
-            summary_items.append({"label": "Staff Hours", "value": req.summary["totalStaffHours"]})
-        if "totalPayroll" in req.summary:
-            summary_items.append({"label": "Payroll", "value": f"${req.summary['totalPayroll']:,.2f}"})
-        if "fulfillmentRate" in req.summary:
-            summary_items.append({"label": "Fulfillment", "value": f"{req.summary['fulfillmentRate']}%"})
-
-    return {"analysis_html": analysis_html, "summary_items": summary_items}
-
-
-def _build_working_hours_context(req: ReportRequest) -> dict:
-    """Build context for working hours sheet — event-specific staff attendance."""
-    rows = []
-    total_hours = 0.0
-    for r in req.records:
-        hours = r.get("totalHours", 0)
-        total_hours += float(hours) if hours else 0
-        rows.append({
-            "name": r.get("name", ""),
-            "role": r.get("role", "Staff"),
-            "phone": r.get("phone", ""),
-            "companyId": r.get("companyId", ""),
-            "scheduledIn": r.get("scheduledIn", ""),
-            "scheduledOut": r.get("scheduledOut", ""),
-            "clockIn": r.get("clockIn", ""),
-            "clockOut": r.get("clockOut", ""),
-            "breakDuration": r.get("breakDuration", ""),
-            "totalHours": r.get("totalHours", ""),
-        })
-
-    totals = {"totalHours": round(total_hours, 1)} if rows else None
-
-    return {
-        "rows": rows,
-        "totals": totals,
-        "event_client": req.summary.get("client", ""),
-        "event_name": req.summary.get("eventName", ""),
-        "event_date": req.summary.get("date", ""),
-        "event_start": req.summary.get("startTime", ""),
-        "event_end": req.summary.get("endTime", ""),
-        "event_venue": req.summary.get("venue", ""),
-        "staff_count": len(rows),
-        "notes": req.summary.get("notes", ""),
-    }
-
-
-def create_report(req: ReportRequest, output_path: str) -> None:
-    brand = _brand_context(req)
+
+def create_report(req: ReportRequest, output: str | BinaryIO, prepared: PreparedTable | None = None) -> None:
+    brand = report_context.brand_context(req)
 
     # Working hours uses its own landscape template
     if req.report_type == ReportType.WORKING_HOURS:
-        ctx = _build_working_hours_context(req)
+        ctx = report_context.build_working_hours_context(req)
         ctx.update(
             {
                 "title": req.title,
@@ -197,14 +123,12 @@ def create_report(req: ReportRequest, output_path: str) -> None:
             }
         )
         ctx.update(brand)
-        template = _env.get_template("working_hours.html")
-        html_str = template.render(**ctx)
-        HTML(string=html_str).write_pdf(output_path)
+        weasy.write_pdf("working_hours", ctx, output)
         return
 
     # AI analysis uses a different template
     if req.report_type == ReportType.AI_ANALYSIS:
-        ctx = _build_ai_analysis_context(req)
+        ctx = report_context.build_ai_analysis_context(req)
         ctx.update(
             {
                 "title": req.title,
@@ -214,26 +138,65 @@ def create_report(req: ReportRequest, output_path: str) -> None:
             }
         )
         ctx.update(brand)
-        template = _env.get_template("analysis.html")
-        html_str = template.render(**ctx)
-        HTML(string=html_str).write_pdf(output_path)
+        weasy.write_pdf("analysis", ctx, output)
         return
 
-    builder = _CONTEXT_BUILDERS.get(req.report_type)
+    weasy.write_pdf("report", _table_context(req, prepared=prepared), output)
+
+
+def _table_context(
+    req: ReportRequest,
+    start: int = 0,
+    stop: int | None = None,
+    chunk: dict | None = None,
+    prepared: PreparedTable | None = None,
+    sums: dict | None = None,
+) -> dict:
+    """``report.html`` context for rows ``start:stop``; ``chunk`` marks one part of a chunked render."""
+    builder = report_context.CONTEXT_BUILDERS.get(req.report_type)
     if not builder:
         raise ValueError(f"Unknown report type: {req.report_type}")
 
-    ctx = builder(req)
+    ctx = builder(req, start, stop, prepared, sums)
     ctx.update(
         {
             "title": req.title,
             "company_name": req.company_name,
             "period_label": req.period.label,
             "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+            "chunk": chunk,
         }
     )
-    ctx.update(brand)
+    ctx.update(report_context.brand_context(req))
+    return ctx
+
 
-    template = _env.get_template("report.html")
-    html_str = template.render(**ctx)
-    HTML(string=html_str).write_pdf(output_path)
+def measure_table_rows(req: ReportRequest, sample: int, sums: dict | None = None) -> tuple[int, int]:
+    """Rows that fit on the first page and on every following page of ``report.html``.
+
+    Lays out the first ``sample`` records with an anchor on every row and counts
+    the anchors per page. Rows differ in height when text wraps, so the
+    following-page figure is the fewest rows any full page of the sample held.
+    Returns ``(0, 0)`` if the sample fits on two pages.
+    """
+    chunk = {"first": True, "last": False, "start": 0, "anchors": True}
+    pages = weasy.document("report", _table_context(req, 0, sample, chunk, sums=sums), chunk=True).pages
+    if len(pages) < 3:
+        return 0, 0
+    return len(pages[0].anchors), min(len(page.anchors) for page in pages[1:-1])
+
+
+def create_table_chunk(
+    req: ReportRequest, start: int, stop: int, output: str | BinaryIO, sums: dict, offset: int = 0
+) -> None:
+    """Render rows ``start:stop`` of ``req.records`` without page numbers.
+
+    ``req`` may carry only a slice of the report's records, beginning at
+    record ``offset``; ``sums`` are the whole report's
+    ``report_context.column_totals``. The header and summary are only drawn
+    on the chunk starting at the first record, the totals and footer only on
+    the chunk ending at the last.
+    """
+    first, last = offset + start, offset + stop
+    chunk = {"first": first == 0, "last": last >= sums["count"], "start": first, "anchors": False}
+    weasy.write_pdf("report", _table_context(req, start, stop, chunk, sums=sums), output, chunk=True)
@@ -0,0 +1,138 @@
+"""Table report records, validated and formatted once for every engine.
+
+The PDF, DOCX and XLSX engines all used to walk ``req.records`` and format
+the currency columns on their own. A ``PreparedTable`` holds each column of a
+staff-shift, payroll or attendance report as typed raw values (for
+spreadsheets) and display strings (for documents), so a request rendered in
+several formats pays for that pass once.
+
+Columns come from the registry in ``app.services.columns``, typed after the
+record models in ``app.models.schemas``. ``prepare`` coerces every column to
+its field type in one pass: numeric columns become NumPy arrays, missing
+values take the model's default, and a record missing a required field or
+holding a non-numeric value in a numeric one raises ``RecordError``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Iterator
+
+import numpy as np
+
+from app.models.schemas import ReportRequest
+from app.services.columns import COLUMNS, ColumnSpec, format_column, money, number
+from app.services.records import RecordColumns, RecordError
+from app.timing import timed
+
+# Records prepared at a time by the row-streaming writers
+BLOCK_ROWS = 10_000
+
+
+def _coerce(col: list, offset: int, column: ColumnSpec):
+    """One key's values as the field's type, with the model default where a record has none."""
+    if column.required and None in col:
+        raise RecordError(f"Record {offset + col.index(None) + 1}: {column.key} is required")
+    if column.kind is str:
+        default = column.default
+        return [default if v is None else v if v.__class__ is str else str(v) for v in col]
+
+    try:
+        # None becomes NaN here and is then replaced by the default
+        arr = np.array(col, dtype=np.float64)
+    except (TypeError, ValueError):
+        for i, v in enumerate(col):
+            try:
+                float(0 if v is None else v)
+            except (TypeError, ValueError):
+                raise RecordError(f"Record {offset + i + 1}: {column.key} must be a number, got {v!r}") from None
+        raise
+    arr[np.isnan(arr)] = column.default
+    if column.kind is int:
+        fractional = np.flatnonzero(arr != np.floor(arr))
+        if fractional.size:
+            i = int(fractional[0])
+            raise RecordError(f"Record {offset + i + 1}: {column.key} must be a whole number, got {col[i]!r}")
+        return arr.astype(np.int64)
+    return arr
+
+
+def _text(column: ColumnSpec, values) -> list[str]:
+    if column.kind is str:
+        return values
+    if column.money:
+        return format_column(values, money)
+    return format_column(values, str if column.kind is int else number)
+
+
+def _plain(values) -> list:
+    return values.tolist() if isinstance(values, np.ndarray) else values
+
+
+@dataclass
+class PreparedTable:
+    columns: tuple[ColumnSpec, ...]
+    # Keys found in at least one record — spreadsheets only get these columns
+    present: frozenset[str]
+    # Typed value per key and record: NumPy arrays for numeric fields, lists of str otherwise
+    values: dict[str, np.ndarray | list[str]]
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        return tuple(c.key for c in self.columns)
+
+    @cached_property
+    def text(self) -> dict[str, list[str]]:
+        """Display string per key and record, currency as "$1,234.50"; built on first use."""
+        return {c.key: _text(c, self.values[c.key]) for c in self.columns}
+
+    def __len__(self) -> int:
+        return len(self.values[self.columns[0].key])
+
+    def text_rows(self, keys=None, start: int = 0, stop: int | None = None) -> Iterator[tuple[str, ...]]:
+        return zip(*(self.text[k][start:stop] for k in keys or self.keys))
+
+    def rows(self, start: int = 0, stop: int | None = None) -> list[dict[str, str]]:
+        """Display rows as dicts keyed like the records, the shape the templates iterate over."""
+        return [dict(zip(self.keys, row)) for row in self.text_rows(None, start, stop)]
+
+    def value_rows(self, keys=None) -> Iterator[tuple]:
+        """Raw values per record as plain Python types, for writers that reject NumPy scalars."""
+        return zip(*(_plain(self.values[k]) for k in keys or self.keys))
+
+
+@timed("prepare")
+def prepare(req: ReportRequest, start: int = 0, stop: int | None = None) -> PreparedTable:
+    """Validate and prepare ``req.records[start:stop]`` of a table report."""
+    columns = COLUMNS.get(req.report_type)
+    if columns is None:
+        raise ValueError(f"Not a table report: {req.report_type}")
+
+    if isinstance(req.records, RecordColumns):
+        # Columnar upload: slice the columns, no record dicts
+        seen = set(req.records.columns)
+        raw = {c.key: req.records.column(c.key, start, stop) for c in columns}
+    else:
+        records = req.records[start:stop]
+        seen: set[str] = set()
+        for r in records:
+            seen.update(r)
+        raw = {c.key: [r.get(c.key) for r in records] for c in columns}
+    values = {c.key: _coerce(raw[c.key], start, c) for c in columns}
+    return PreparedTable(columns=columns, present=frozenset(seen.intersection(raw)), values=values)
+
+
+def iter_value_rows(req: ReportRequest, keys, prepared: PreparedTable | None = None) -> Iterator[tuple]:
+    """Validated raw values of ``keys`` per record, for the row-streaming writers.
+
+    Records are prepared ``BLOCK_ROWS`` at a time, so only one block is ever
+    held in memory (records spooled from an NDJSON upload are never all
+    loaded), and a streamed response starts after the first block rather
+    than after the whole table.
+    """
+    if prepared is not None:
+        yield from prepared.value_rows(keys)
+    else:
+        for start in range(0, len(req.records), BLOCK_ROWS):
+            yield from prepare(req, start, start + BLOCK_ROWS).value_rows(keys)
@@ -0,0 +1,123 @@
+"""Alternative containers for ``ReportRequest.records`` of large uploads.
+
+``RecordFile`` stands in for the list when a request was uploaded as NDJSON:
+``len()`` and slicing work like on a list, but records are parsed from the
+spool file as they are iterated, so the streaming XLSX, CSV and chunked PDF
+paths never hold the whole list. It pickles as a path and a sparse line
+index, which is all a rendering worker receives.
+
+``RecordColumns`` holds a columnar (msgpack) upload as one list per key.
+``prepare`` slices the columns directly; per-record dicts are only built if
+something indexes it like a list.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterator
+
+# A byte offset is kept for every INDEX_STEP-th record, so a chunk seeks to
+# within this many lines of its first record
+INDEX_STEP = 1024
+
+
+class RecordError(ValueError):
+    """An NDJSON record line that is not a JSON object."""
+
+
+@dataclass(eq=False)
+class RecordFile(Sequence):
+    path: str
+    count: int
+    # Byte offset of records 0, INDEX_STEP, 2 * INDEX_STEP, ...
+    offsets: list[int] = field(default_factory=list)
+    # SHA-256 of the record lines, used for the report cache key
+    digest: str = ""
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.iter(0, self.count)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if step != 1:
+                raise ValueError("RecordFile slices cannot have a step")
+            return list(self.iter(start, stop))
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("record index out of range")
+        return next(self.iter(index, index + 1))
+
+    def iter(self, start: int = 0, stop: int | None = None) -> Iterator[dict]:
+        """Parse records ``start:stop`` one at a time."""
+        stop = self.count if stop is None else min(stop, self.count)
+        if start >= stop:
+            return
+        block = start // INDEX_STEP
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[block])
+            lines = islice(f, start - block * INDEX_STEP, stop - block * INDEX_STEP)
+            for number, line in enumerate(lines, start=start + 1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise RecordError(f"Record {number} is not valid JSON: {exc.msg}") from None
+                if not isinstance(record, dict):
+                    raise RecordError(f"Record {number} is not a JSON object")
+                yield record
+
+
+@dataclass(eq=False)
+class RecordColumns(Sequence):
+    # Record key -> one value per record; every column has ``count`` entries
+    columns: dict[str, list]
+    count: int
+    # SHA-256 of the uploaded body, used for the report cache key
+    digest: str = ""
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            return [self._record(i) for i in range(start, stop, step)]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("record index out of range")
+        return self._record(index)
+
+    def _record(self, i: int) -> dict:
+        return {k: col[i] for k, col in self.columns.items()}
+
+    def column(self, key: str, start: int = 0, stop: int | None = None) -> list:
+        """Values of ``key`` for records ``start:stop``; None throughout if the key was not sent."""
+        stop = self.count if stop is None else min(stop, self.count)
+        col = self.columns.get(key)
+        if col is None:
+            return [None] * max(stop - start, 0)
+        return col[start:stop]
+
+
+def column(records, key: str):
+    """Every record's value for ``key`` (None where missing), without per-row dicts for columnar records."""
+    if isinstance(records, RecordColumns):
+        return records.column(key)
+    return (r.get(key) for r in records)
+
+
+def window(records, start: int, stop: int):
+    """Records ``start:stop`` in the same form: columnar records stay columnar."""
+    if isinstance(records, RecordColumns):
+        stop = min(stop, records.count)
+        columns = {k: col[start:stop] for k, col in records.columns.items()}
+        return RecordColumns(columns=columns, count=max(stop - start, 0), digest=records.digest)
+    return records[start:stop]
@@ -0,0 +1,202 @@
+"""Format dispatch for report rendering — runs inside the rendering workers.
+
+Engine modules are imported on first use, not with this module: WeasyPrint,
+ReportLab, python-docx and pandas each take a noticeable share of start-up
+time and memory, and a process only pays for the formats it renders. The API
+process never renders, so it loads none of them. Workers can import engines
+up front instead with ``settings.PRELOAD_FORMATS`` (see ``warm_up``).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import importlib
+import io
+import os
+import pstats
+import tempfile
+from dataclasses import dataclass, field
+from io import BytesIO, StringIO
+from types import ModuleType
+
+from app.config import settings
+from app.models.schemas import PdfEngine, ReportFormat, ReportRequest, ReportType
+from app.services.prepared import PreparedTable
+from app.timing import collect, reset
+
+# Engine module (in app.services) per format
+_ENGINES = {
+    ReportFormat.PDF: "pdf_service",
+    ReportFormat.DOCX: "word_service",
+    ReportFormat.XLSX: "excel_service",
+    ReportFormat.CSV: "csv_service",
+}
+
+# Report types the ReportLab PDF engine can draw
+REPORTLAB_TYPES = {
+    ReportType.STAFF_SHIFTS,
+    ReportType.PAYROLL,
+    ReportType.ATTENDANCE,
+    ReportType.WORKING_HOURS,
+}
+
+# Formats whose engines write the document row by row, so it can be sent while it grows.
+# XLSX and DOCX are zipped when the document closes and write nothing before that
+STREAMING_FORMATS = {ReportFormat.CSV}
+
+EXTENSIONS = {
+    ReportFormat.PDF: ".pdf",
+    ReportFormat.DOCX: ".docx",
+    ReportFormat.XLSX: ".xlsx",
+    ReportFormat.CSV: ".csv",
+}
+
+MEDIA_TYPES = {
+    ReportFormat.PDF: "application/pdf",
+    ReportFormat.DOCX: "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ReportFormat.XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ReportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+@dataclass
+class RenderedReport:
+    """A finished document — in memory, or spilled to ``path`` when it is large."""
+
+    size: int
+    content: bytes | None = None
+    path: str | None = None
+    # Seconds per render stage (see app.timing); empty for cached reports
+    stages: dict[str, float] = field(default_factory=dict)
+    # cProfile statistics of the render, when profiling was requested
+    profile: str | None = None
+
+
+def engine_name(req: ReportRequest) -> str | None:
+    """Name of the engine module that renders ``req``, without importing it."""
+    name = _ENGINES.get(req.report_format)
+    if name != "pdf_service" or req.report_type not in REPORTLAB_TYPES:
+        return name
+    if req.pdf_engine == PdfEngine.REPORTLAB:
+        return "reportlab_service"
+    if req.pdf_engine == PdfEngine.AUTO and len(req.records) > settings.PDF_REPORTLAB_ROWS:
+        return "reportlab_service"
+    return name
+
+
+def load_engine(name: str) -> ModuleType:
+    return importlib.import_module(f"app.services.{name}")
+
+
+def engine_for(req: ReportRequest) -> ModuleType | None:
+    name = engine_name(req)
+    return load_engine(name) if name else None
+
+
+def render(req: ReportRequest, prepared: PreparedTable | None = None, profile: bool = False) -> RenderedReport:
+    """Render ``req`` into memory with the engine for its format.
+
+    Large tabular PDFs go to the ReportLab engine (see ``engine_for``).
+    ``prepared`` is the request's table when it was prepared up front for
+    several formats.
+    Documents above ``settings.SPILL_THRESHOLD`` are written to a temp file in
+    ``settings.OUTPUT_DIR`` instead, so large outputs are not copied back to
+    the caller; whoever serves the file is responsible for deleting it.
+    With ``profile`` the render runs under cProfile and the report carries
+    the statistics as text.
+    """
+    engine = engine_for(req)
+    if not engine:
+        raise ValueError(f"Invalid report format: {req.report_format}")
+
+    reset()
+    buf = BytesIO()
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        engine.create_report(req, buf, prepared)
+    finally:
+        if profiler:
+            profiler.disable()
+    report = from_buffer(buf, req.report_format)
+    report.stages = collect()
+    if profiler:
+        report.profile = _profile_text(profiler)
+    return report
+
+
+class _FileSink(io.RawIOBase):
+    """Write-only, unseekable file target, so every byte the engine writes is final."""
+
+    def __init__(self, f):
+        self._f = f
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        n = self._f.write(data)
+        self._pos += n
+        return n
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def render_file(req: ReportRequest, path: str, prepared: PreparedTable | None = None) -> RenderedReport:
+    """Render ``req`` straight into ``path``, which another process may read while it grows.
+
+    For ``STREAMING_FORMATS`` only. Output goes to the file unbuffered as the
+    engine writes it, never through an in-memory copy of the document.
+    """
+    if req.report_format not in STREAMING_FORMATS:
+        raise ValueError(f"{req.report_format.value} output cannot be streamed")
+    engine = engine_for(req)
+
+    reset()
+    with open(path, "wb", buffering=0) as f, _FileSink(f) as sink:
+        engine.create_report(req, sink, prepared)
+    report = RenderedReport(size=os.path.getsize(path), path=path)
+    report.stages = collect()
+    return report
+
+
+def _profile_text(profiler: cProfile.Profile) -> str:
+    out = StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.PROFILE_TOP_FUNCTIONS)
+    return out.getvalue()
+
+
+def from_buffer(buf: BytesIO, report_format: ReportFormat) -> RenderedReport:
+    """Wrap a finished document, spilling it to disk above ``SPILL_THRESHOLD``."""
+    size = buf.tell()
+    if size <= settings.SPILL_THRESHOLD:
+        return RenderedReport(size=size, content=buf.getvalue())
+
+    fd, path = tempfile.mkstemp(suffix=EXTENSIONS[report_format], dir=settings.OUTPUT_DIR)
+    with os.fdopen(fd, "wb") as f:
+        f.write(buf.getbuffer())
+    return RenderedReport(size=size, path=path)
+
+
+def preload_formats() -> list[ReportFormat]:
+    value = settings.PRELOAD_FORMATS.strip().lower()
+    if value == "all":
+        return list(ReportFormat)
+    return [ReportFormat(f.strip()) for f in value.split(",") if f.strip()]
+
+
+def warm_up() -> None:
+    """Worker initializer — imports the engines of ``settings.PRELOAD_FORMATS``.
+
+    Preloading PDF loads both PDF engines and readies WeasyPrint's
+    stylesheets and fonts, so the first PDF costs no more than the next one.
+    """
+    for report_format in preload_formats():
+        load_engine(_ENGINES[report_format])
+        if report_format == ReportFormat.PDF:
+            load_engine("reportlab_service")
+            load_engine("pdf_service").weasy.warm_up()
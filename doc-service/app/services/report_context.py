@@ -0,0 +1,200 @@
+"""Template context builders shared by the PDF engines.
+
+Each builder turns a ``ReportRequest`` into the plain dict the Jinja templates
+(WeasyPrint) and the ReportLab engine both render from.
+"""
+
+from __future__ import annotations
+
+from app.models.schemas import BrandConfig, ReportRequest, ReportType, TemplateDesign
+from app.services import markdown_doc
+from app.services.columns import context_columns, event_table
+from app.services.prepared import PreparedTable, prepare
+from app.services.records import column
+from app.timing import timed
+
+
+def brand_context(req: ReportRequest) -> dict:
+    """Extract brand CSS variables from request, falling back to defaults."""
+    bc = req.brand_config or BrandConfig()
+    design = req.template_design
+    ctx = {
+        "brand_primary": bc.primary_color,
+        "brand_secondary": bc.secondary_color,
+        "brand_accent": bc.accent_color,
+        "brand_neutral": bc.neutral_color,
+        "template_design": design.value,
+    }
+    # Plain design suppresses logo
+    if bc.logo_header_url and design != TemplateDesign.PLAIN:
+        ctx["logo_header_url"] = bc.logo_header_url
+    return ctx
+
+
+def _rows(req: ReportRequest, start: int, stop: int | None, prepared: PreparedTable | None) -> list[dict]:
+    """Formatted rows ``start:stop``, from ``prepared`` when the caller already has it."""
+    if prepared is not None:
+        return prepared.rows(start, stop)
+    return prepare(req, start, stop).rows()
+
+
+def _column_total(req: ReportRequest, key: str, prepared: PreparedTable | None):
+    """Sum of ``key`` over every record; ``prepared`` always covers the whole request."""
+    if prepared is not None:
+        return prepared.values[key].sum().item()
+    return sum(v or 0 for v in column(req.records, key))
+
+
+def column_totals(req: ReportRequest, prepared: PreparedTable | None = None) -> dict:
+    """Record count and totals-row values over every record, which the summary may not carry.
+
+    A chunked render computes them once and passes them to every chunk's
+    builder as ``sums``: a chunk only receives its own slice of the records.
+    """
+    sums = {"count": len(req.records)}
+    if req.report_type == ReportType.PAYROLL:
+        sums["shifts"] = _column_total(req, "shifts", prepared)
+    return sums
+
+
+@timed("context")
+def build_staff_shifts_context(
+    req: ReportRequest,
+    start: int = 0,
+    stop: int | None = None,
+    prepared: PreparedTable | None = None,
+    sums: dict | None = None,
+) -> dict:
+    sums = sums or column_totals(req, prepared)
+    columns = context_columns(ReportType.STAFF_SHIFTS)
+    summary_items = [
+        {"label": "Total Shifts", "value": req.summary.get("totalShifts", sums["count"])},
+        {"label": "Total Hours", "value": req.summary.get("totalHours", 0)},
+        {"label": "Total Earnings", "value": f"${req.summary.get('totalEarnings', 0):,.2f}"},
+    ]
+    totals = {
+        "date": "TOTAL",
+        "hoursWorked": req.summary.get("totalHours", 0),
+        "earnings": f"${req.summary.get('totalEarnings', 0):,.2f}",
+    }
+    rows = _rows(req, start, stop, prepared)
+    return {"columns": columns, "rows": rows, "summary_items": summary_items, "totals": totals}
+
+
+@timed("context")
+def build_payroll_context(
+    req: ReportRequest,
+    start: int = 0,
+    stop: int | None = None,
+    prepared: PreparedTable | None = None,
+    sums: dict | None = None,
+) -> dict:
+    sums = sums or column_totals(req, prepared)
+    columns = context_columns(ReportType.PAYROLL)
+    summary_items = [
+        {"label": "Staff Count", "value": req.summary.get("staffCount", sums["count"])},
+        {"label": "Total Hours", "value": req.summary.get("totalHours", 0)},
+        {"label": "Total Payroll", "value": f"${req.summary.get('totalPayroll', 0):,.2f}"},
+    ]
+    totals = {
+        "name": "TOTAL",
+        "shifts": sums["shifts"],
+        "hours": req.summary.get("totalHours", 0),
+        "totalPay": f"${req.summary.get('totalPayroll', 0):,.2f}",
+    }
+    rows = _rows(req, start, stop, prepared)
+    return {"columns": columns, "rows": rows, "summary_items": summary_items, "totals": totals}
+
+
+@timed("context")
+def build_attendance_context(
+    req: ReportRequest,
+    start: int = 0,
+    stop: int | None = None,
+    prepared: PreparedTable | None = None,
+    sums: dict | None = None,
+) -> dict:
+    sums = sums or column_totals(req, prepared)
+    columns = context_columns(ReportType.ATTENDANCE)
+    summary_items = [
+        {"label": "Total Records", "value": req.summary.get("totalRecords", sums["count"])},
+        {"label": "Total Hours", "value": req.summary.get("totalHours", 0)},
+    ]
+    if "totalEvents" in req.summary:
+        summary_items.append({"label": "Events", "value": req.summary["totalEvents"]})
+    totals = {
+        "date": "TOTAL",
+        "hoursWorked": req.summary.get("totalHours", 0),
+    }
+    rows = _rows(req, start, stop, prepared)
+    header, event_rows = event_table(req.summary)
+    events = {"header": header, "rows": event_rows} if event_rows else None
+    return {"columns": columns, "rows": rows, "summary_items": summary_items, "totals": totals, "events": events}
+
+
+# Table report builders; ``start``/``stop`` limit the formatted rows to one
+# slice of ``req.records`` while summary and totals still cover all of them.
+# ``prepared`` is the whole request's PreparedTable when one was already built.
+# ``sums`` are the ``column_totals`` of the whole request; they are required
+# when ``req`` only carries one chunk's records.
+CONTEXT_BUILDERS = {
+    ReportType.STAFF_SHIFTS: build_staff_shifts_context,
+    ReportType.PAYROLL: build_payroll_context,
+    ReportType.ATTENDANCE: build_attendance_context,
+}
+
+
+@timed("context")
+def build_ai_analysis_context(req: ReportRequest) -> dict:
+    """Build context for AI analysis reports — renders markdown content to HTML."""
+    analysis_html = markdown_doc.to_html(markdown_doc.analysis(req))
+
+    summary_items = []
+    if req.summary:
+        if "totalEvents" in req.summary:
+            summary_items.append({"label": "Events", "value": req.summary["totalEvents"]})
+        if "totalStaffHours" in req.summary:
+            summary_items.append({"label": "Staff Hours", "value": req.summary["totalStaffHours"]})
+        if "totalPayroll" in req.summary:
+            summary_items.append({"label": "Payroll", "value": f"${req.summary['totalPayroll']:,.2f}"})
+        if "fulfillmentRate" in req.summary:
+            summary_items.append({"label": "Fulfillment", "value": f"{req.summary['fulfillmentRate']}%"})
+
+    return {"analysis_html": analysis_html, "summary_items": summary_items}
+
+
+@timed("context")
+def build_working_hours_context(req: ReportRequest) -> dict:
+    """Build context for working hours sheet — event-specific staff attendance."""
+    rows = []
+    total_hours = 0.0
+    for r in req.records:
+        hours = r.get("totalHours", 0)
+        total_hours += float(hours) if hours else 0
+        rows.append({
+            "name": r.get("name", ""),
+            "role": r.get("role", "Staff"),
+            "phone": r.get("phone", ""),
+            "companyId": r.get("companyId", ""),
+            "scheduledIn": r.get("scheduledIn", ""),
+            "scheduledOut": r.get("scheduledOut", ""),
+            "clockIn": r.get("clockIn", ""),
+            "clockOut": r.get("clockOut", ""),
+            "breakDuration": r.get("breakDuration", ""),
+            "totalHours": r.get("totalHours", ""),
+        })
+
+    totals = {"totalHours": round(total_hours, 1)} if rows else None
+
+    return {
+        "rows": rows,
+        "totals": totals,
+        "event_client": req.summary.get("client", ""),
+        "event_name": req.summary.get("eventName", ""),
+        "event_date": req.summary.get("date", ""),
+        "event_start": req.summary.get("startTime", ""),
+        "event_end": req.summary.get("endTime", ""),
+        "event_venue": req.summary.get("venue", ""),
+        "staff_count": len(rows),
+        "notes": req.summary.get("notes", ""),
+    }
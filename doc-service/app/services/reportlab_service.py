@@ -0,0 +1,524 @@
+"""Fast PDF engine for large tabular reports, built on ReportLab platypus.
+
+WeasyPrint lays out ``report.html`` as a full CSS box tree, which grows badly
+with table size. This engine draws the same context (``report_context``)
+straight onto a ReportLab canvas and mirrors the four ``TemplateDesign`` looks
+of the HTML templates: colours, font sizes (CSS px × 0.75 = pt), table rules,
+zebra rows and the "Page X of Y" footer.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import BinaryIO
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.platypus import (
+    Flowable,
+    HRFlowable,
+    Image,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+from xml.sax.saxutils import escape
+
+from app.models.schemas import ReportRequest, ReportType, TemplateDesign
+from app.services import assets, report_context
+from app.services.prepared import PreparedTable
+from app.services.renderer import REPORTLAB_TYPES
+from app.timing import stage
+
+SUPPORTED_TYPES = REPORTLAB_TYPES
+
+_FONT = "Helvetica"
+_FONT_BOLD = "Helvetica-Bold"
+
+
+def _px(value: float) -> float:
+    """CSS px to PDF points, as WeasyPrint converts them."""
+    return value * 0.75
+
+
+def _c(hex_color: str) -> colors.Color:
+    return colors.HexColor(hex_color)
+
+
+def _get_theme(req: ReportRequest, brand: dict) -> dict:
+    """Design tokens lifted from the per-design CSS blocks of the HTML templates."""
+    primary = brand["brand_primary"]
+    accent = brand["brand_accent"]
+    design = req.template_design
+
+    theme = {
+        "title_color": primary,
+        "title_size": 20,
+        "subtitle_color": "#6b7280",
+        "accent_divider": accent,
+        "top_border": None,
+        "header_rule": None,
+        "meta_bg": "#fafafa",
+        "meta_border": "#e5e7eb",
+        "meta_left_border": None,
+        "meta_radius": 6,
+        "meta_label_size": 8,
+        "meta_value_size": 15,
+        "meta_value_color": "#1a1a1a",
+        "th_bg": "#fafafa",
+        "th_fg": "#4b5563",
+        "th_size": 9,
+        "th_font": _FONT_BOLD,
+        "td_fg": "#374151",
+        "td_size": 10.5,
+        "td_rule": "#e5e7eb",
+        "td_padding": 7,
+        "zebra": "#fafbfc",
+        "totals_bg": "#f5f5f5",
+        "totals_rule": "#d1d5db",
+        "totals_fg": "#1a1a1a",
+        "footer_rule": "#e5e7eb",
+        "footer_color": "#b0b0b0",
+    }
+    if design == TemplateDesign.PLAIN:
+        theme.update(
+            title_color="#000000",
+            accent_divider=None,
+            header_rule="#d1d5db",
+            th_bg="#ffffff",
+            zebra=None,
+            meta_bg="#ffffff",
+            meta_value_color="#000000",
+            totals_bg="#f9fafb",
+            totals_rule="#9ca3af",
+        )
+    elif design == TemplateDesign.EXECUTIVE:
+        theme.update(
+            title_size=22,
+            subtitle_color="#9ca3af",
+            accent_divider=None,
+            top_border=accent,
+            th_bg="#ffffff",
+            th_fg=primary,
+            zebra="#fcfcfd",
+            meta_bg="#ffffff",
+            meta_left_border=accent,
+            meta_value_color=primary,
+            totals_bg="#fafbfc",
+            totals_rule=accent,
+        )
+    elif design == TemplateDesign.MODERN:
+        theme.update(
+            title_color="#000000",
+            title_size=21,
+            subtitle_color="#9ca3af",
+            accent_divider=None,
+            meta_bg="#f7f7f8",
+            meta_border=None,
+            meta_radius=10,
+            meta_label_size=7.5,
+            meta_value_size=14,
+            meta_value_color="#000000",
+            th_bg=None,
+            th_fg="#9ca3af",
+            th_size=8.5,
+            th_font=_FONT,
+            td_fg="#1a1a1a",
+            td_rule="#f0f0f0",
+            td_padding=9,
+            zebra="#fafafb",
+            totals_bg=None,
+            totals_fg="#000000",
+            footer_rule=None,
+            footer_color="#c0c0c0",
+        )
+    return theme
+
+
+class _NumberedCanvas(canvas.Canvas):
+    """Canvas that defers page output until the total page count is known."""
+
+    footer_size = _px(8)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._saved_pages: list[dict] = []
+
+    def showPage(self):  # noqa: N802 — ReportLab API
+        self._saved_pages.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        total = len(self._saved_pages)
+        for state in self._saved_pages:
+            self.__dict__.update(state)
+            self.setFont(_FONT, self.footer_size)
+            self.setFillColor(_c("#b0b0b0"))
+            width = self._pagesize[0]
+            self.drawCentredString(width / 2, 1 * cm, f"Page {self._pageNumber} of {total}")
+            super().showPage()
+        super().save()
+
+
+class _SmallNumberedCanvas(_NumberedCanvas):
+    footer_size = _px(7)
+
+
+def _logo(url: str | None, max_width: float, max_height: float) -> Flowable | None:
+    if not url:
+        return None
+    asset = assets.fetcher.fetch(url)
+    if asset is None:
+        return None
+    try:
+        reader = ImageReader(BytesIO(asset.content))
+        w, h = reader.getSize()
+    except Exception:
+        return None  # Not a raster image ReportLab can place — continue without it
+    scale = min(max_width / w, max_height / h, 1.0)
+    img = Image(BytesIO(asset.content), width=w * scale, height=h * scale)
+    img.hAlign = "LEFT"
+    return img
+
+
+def _header(ctx: dict, theme: dict, subtitle: str, sizes: dict) -> list[Flowable]:
+    flow: list[Flowable] = []
+    if theme["top_border"]:
+        flow.append(HRFlowable(width="100%", thickness=_px(2.5), color=_c(theme["top_border"]), spaceAfter=_px(sizes["pad_top"])))
+    else:
+        flow.append(Spacer(1, _px(sizes["pad_top"])))
+
+    logo = _logo(ctx.get("logo_header_url"), _px(sizes["logo_w"]), _px(sizes["logo_h"]))
+    if logo is not None:
+        flow.append(logo)
+        flow.append(Spacer(1, _px(sizes["logo_gap"])))
+
+    title_style = ParagraphStyle(
+        "title",
+        fontName=_FONT_BOLD,
+        fontSize=_px(theme["title_size"] * sizes["title_scale"]),
+        leading=_px(theme["title_size"] * sizes["title_scale"]) * 1.3,
+        textColor=_c(theme["title_color"]),
+    )
+    subtitle_style = ParagraphStyle(
+        "subtitle",
+        fontName=_FONT,
+        fontSize=_px(sizes["subtitle"]),
+        leading=_px(sizes["subtitle"]) * 1.4,
+        textColor=_c(theme["subtitle_color"]),
+        spaceBefore=_px(2),
+    )
+    flow.append(Paragraph(escape(ctx["title"]), title_style))
+    flow.append(Paragraph(escape(subtitle), subtitle_style))
+    flow.append(Spacer(1, _px(sizes["pad_bottom"])))
+
+    if theme["header_rule"]:
+        flow.append(HRFlowable(width="100%", thickness=_px(0.3), color=_c(theme["header_rule"]), spaceAfter=_px(sizes["divider_gap"])))
+    elif theme["accent_divider"]:
+        flow.append(HRFlowable(width="100%", thickness=_px(1.5), color=_c(theme["accent_divider"]), spaceAfter=_px(sizes["divider_gap"])))
+    return flow
+
+
+def _info_box(items: list[tuple[str, str]], theme: dict, width: float, sizes: dict) -> Table:
+    """The summary ``.meta`` / ``.event-info`` strip: small caps labels over bold values."""
+    label_style = ParagraphStyle(
+        "meta-label",
+        fontName=_FONT,
+        fontSize=_px(theme["meta_label_size"] * sizes["meta_scale"]),
+        leading=_px(theme["meta_label_size"] * sizes["meta_scale"]) * 1.4,
+        textColor=_c("#9ca3af"),
+        alignment=sizes["meta_align"],
+    )
+    value_style = ParagraphStyle(
+        "meta-value",
+        fontName=_FONT_BOLD,
+        fontSize=_px(sizes["meta_value"] or theme["meta_value_size"]),
+        leading=_px(sizes["meta_value"] or theme["meta_value_size"]) * 1.3,
+        textColor=_c(theme["meta_value_color"]),
+        alignment=sizes["meta_align"],
+    )
+    cells = [[Paragraph(escape(str(label)).upper(), label_style), Paragraph(escape(str(value)), value_style)] for label, value in items]
+    table = Table([cells or [""]], colWidths=[width / max(len(cells), 1)] * max(len(cells), 1))
+    style = [
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("TOPPADDING", (0, 0), (-1, -1), _px(sizes["meta_pad_y"])),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), _px(sizes["meta_pad_y"])),
+        ("LEFTPADDING", (0, 0), (-1, -1), _px(sizes["meta_pad_x"])),
+        ("RIGHTPADDING", (0, 0), (-1, -1), _px(sizes["meta_pad_x"])),
+        ("ROUNDEDCORNERS", [_px(theme["meta_radius"])] * 4),
+    ]
+    if theme["meta_bg"]:
+        style.append(("BACKGROUND", (0, 0), (-1, -1), _c(theme["meta_bg"])))
+    if theme["meta_border"]:
+        style.append(("BOX", (0, 0), (-1, -1), _px(0.5), _c(theme["meta_border"])))
+    if theme["meta_left_border"]:
+        style.append(("LINEBEFORE", (0, 0), (0, -1), _px(2.5), _c(theme["meta_left_border"])))
+    table.setStyle(TableStyle(style))
+    return table
+
+
+def _column_widths(header: list[str], rows: list[list[str]], available: float, font_size: float, th_size: float) -> list[float]:
+    """Share the page width by each column's widest cell, like an auto table layout."""
+    natural = [stringWidth(h, _FONT_BOLD, th_size) for h in header]
+    for row in rows:
+        for i, text in enumerate(row):
+            w = stringWidth(text, _FONT, font_size)
+            if w > natural[i]:
+                natural[i] = w
+    total = sum(natural) or 1.0
+    return [available * (w / total) for w in natural]
+
+
+def _data_table(
+    header: list[str],
+    rows: list[list[str]],
+    totals: list[str] | None,
+    aligns: list[str],
+    theme: dict,
+    available: float,
+    sizes: dict,
+    col_widths: list[float] | None = None,
+) -> Table:
+    td_size = _px(sizes["td"] or theme["td_size"])
+    th_size = _px(theme["th_size"] * sizes["th_scale"])
+    pad_x = _px(sizes["cell_pad_x"])
+    if col_widths is None:
+        col_widths = _column_widths(header, rows, available - pad_x * 2 * len(header), td_size, th_size)
+        col_widths = [w + pad_x * 2 for w in col_widths]
+
+    # Plain strings draw fastest; only cells too wide for their column are wrapped
+    wrap_style = ParagraphStyle("cell", fontName=_FONT, fontSize=td_size, leading=td_size * 1.3, textColor=_c(theme["td_fg"]))
+    limits = [w - pad_x * 2 for w in col_widths]
+    data: list[list] = [[h.upper() for h in header]]
+    for row in rows:
+        out = list(row)
+        for i, text in enumerate(row):
+            if len(text) * td_size * 0.4 > limits[i] and stringWidth(text, _FONT, td_size) > limits[i]:
+                out[i] = Paragraph(escape(text), wrap_style)
+        data.append(out)
+    if totals is not None:
+        data.append(totals)
+
+    last_body = len(data) - (2 if totals is not None else 1)
+    style = [
+        ("FONT", (0, 0), (-1, 0), theme["th_font"], th_size),
+        ("TEXTCOLOR", (0, 0), (-1, 0), _c(theme["th_fg"])),
+        ("FONT", (0, 1), (-1, -1), _FONT, td_size),
+        ("TEXTCOLOR", (0, 1), (-1, -1), _c(theme["td_fg"])),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("LEFTPADDING", (0, 0), (-1, -1), pad_x),
+        ("RIGHTPADDING", (0, 0), (-1, -1), pad_x),
+        ("TOPPADDING", (0, 0), (-1, -1), _px(theme["td_padding"] * sizes["pad_scale"])),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), _px(theme["td_padding"] * sizes["pad_scale"])),
+        ("LINEBELOW", (0, 0), (-1, 0), _px(0.5), _c("#d1d5db" if theme["th_bg"] != "#ffffff" or theme["header_rule"] else "#e5e7eb")),
+        ("LINEBELOW", (0, 1), (-1, -1), _px(0.3), _c(theme["td_rule"])),
+    ]
+    if theme["th_bg"]:
+        style.append(("BACKGROUND", (0, 0), (-1, 0), _c(theme["th_bg"])))
+    if theme["zebra"] and last_body >= 1:
+        style.append(("ROWBACKGROUNDS", (0, 1), (-1, last_body), [colors.white, _c(theme["zebra"])]))
+    for i, align in enumerate(aligns):
+        if align != "left":
+            style.append(("ALIGN", (i, 0), (i, -1), align.upper()))
+    if totals is not None:
+        style += [
+            ("FONT", (0, -1), (-1, -1), _FONT_BOLD, td_size),
+            ("TEXTCOLOR", (0, -1), (-1, -1), _c(theme["totals_fg"])),
+            ("LINEABOVE", (0, -1), (-1, -1), _px(0.5), _c(theme["totals_rule"])),
+        ]
+        if theme["totals_bg"]:
+            style.append(("BACKGROUND", (0, -1), (-1, -1), _c(theme["totals_bg"])))
+
+    table = Table(data, colWidths=col_widths, repeatRows=1)
+    table.setStyle(TableStyle(style))
+    return table
+
+
+def _footer(text: str, theme: dict, size: float) -> list[Flowable]:
+    flow: list[Flowable] = [Spacer(1, _px(24))]
+    if theme["footer_rule"]:
+        flow.append(HRFlowable(width="100%", thickness=_px(0.3), color=_c(theme["footer_rule"]), spaceAfter=_px(8)))
+    style = ParagraphStyle("footer", fontName=_FONT, fontSize=_px(size), leading=_px(size) * 1.4, textColor=_c(theme["footer_color"]), alignment=TA_CENTER)
+    flow.append(Paragraph(escape(text), style))
+    return flow
+
+
+_REPORT_SIZES = {
+    "pad_top": 20, "pad_bottom": 16, "logo_w": 280, "logo_h": 100, "logo_gap": 14, "title_scale": 1.0,
+    "subtitle": 11, "divider_gap": 20, "meta_scale": 1.0, "meta_value": None, "meta_align": TA_CENTER,
+    "meta_pad_x": 18, "meta_pad_y": 14, "td": None, "th_scale": 1.0, "cell_pad_x": 10, "pad_scale": 1.0,
+}
+
+_WORKING_HOURS_SIZES = {
+    "pad_top": 14, "pad_bottom": 12, "logo_w": 250, "logo_h": 90, "logo_gap": 12, "title_scale": 17 / 20,
+    "subtitle": 10, "divider_gap": 14, "meta_scale": 7.5 / 8, "meta_value": 11.5, "meta_align": TA_LEFT,
+    "meta_pad_x": 14, "meta_pad_y": 10, "td": 9.5, "th_scale": 8 / 9, "cell_pad_x": 5, "pad_scale": 1.0,
+}
+
+
+def _build_table_report(req: ReportRequest, ctx: dict, theme: dict, available: float) -> list[Flowable]:
+    flow = _header(ctx, theme, f"{ctx['company_name']} — {ctx['period_label']}", _REPORT_SIZES)
+    flow.append(_info_box([(i["label"], i["value"]) for i in ctx["summary_items"]], theme, available, _REPORT_SIZES))
+    flow.append(Spacer(1, _px(20)))
+
+    columns = ctx["columns"]
+    rows = [["" if (v := row.get(c["key"], "")) is None else str(v) for c in columns] for row in ctx["rows"]]
+    totals = ctx.get("totals")
+    totals_row = [str(totals.get(c["key"], "")) for c in columns] if totals else None
+    flow.append(
+        _data_table(
+            [c["label"] for c in columns], rows, totals_row, [c["align"] for c in columns],
+            theme, available, _REPORT_SIZES,
+        )
+    )
+
+    # Per-event breakdown of an aggregated attendance report (report.html's "By Event")
+    events = ctx.get("events")
+    if events:
+        heading_style = ParagraphStyle(
+            "section-title",
+            fontName=_FONT_BOLD,
+            fontSize=_px(13),
+            leading=_px(13) * 1.3,
+            textColor=_c(ctx["brand_primary"]),
+            spaceBefore=_px(10),
+            spaceAfter=_px(8),
+        )
+        flow.append(Paragraph("By Event", heading_style))
+        header = events["header"]
+        rows = [[str(v) for v in row] for row in events["rows"]]
+        aligns = ["left", "left"] + ["right"] * (len(header) - 2)
+        flow.append(_data_table(header, rows, None, aligns, theme, available, _REPORT_SIZES))
+
+    flow += _footer(f"Generated by {ctx['company_name']} Document Service — {ctx['generated_at']}", theme, 8)
+    return flow
+
+
+# Column widths of working_hours.html, in percent of the table width
+_WORKING_HOURS_WIDTHS = [3, 15, 9, 9, 8, 8, 8, 8, 8, 6, 7, 11]
+_WORKING_HOURS_KEYS = [
+    "name", "role", "phone", "companyId", "scheduledIn", "scheduledOut",
+    "clockIn", "clockOut", "breakDuration", "totalHours",
+]
+
+
+def _build_working_hours_report(req: ReportRequest, ctx: dict, theme: dict, available: float) -> list[Flowable]:
+    flow = _header(ctx, theme, f"{ctx['company_name']} — Working Hours Sheet", _WORKING_HOURS_SIZES)
+    info = [
+        ("Client", ctx["event_client"]),
+        ("Event / Shift", ctx["event_name"]),
+        ("Date", ctx["event_date"]),
+        ("Scheduled", f"{ctx['event_start']} – {ctx['event_end']}"),
+        ("Venue", ctx["event_venue"]),
+        ("Staff Count", ctx["staff_count"]),
+    ]
+    flow.append(_info_box(info, theme, available, _WORKING_HOURS_SIZES))
+    flow.append(Spacer(1, _px(14)))
+
+    header = ["#", "Staff Name", "Role", "Phone", "Company ID", "Sched. In", "Sched. Out",
+              "Clock In", "Clock Out", "Break", "Total Hrs", "Signature"]
+    rows = [
+        [str(idx + 1)] + ["" if row.get(k) is None else str(row.get(k)) for k in _WORKING_HOURS_KEYS] + [""]
+        for idx, row in enumerate(ctx["rows"])
+    ]
+    totals = ctx.get("totals")
+    totals_row = ["TOTAL"] + [""] * 9 + [str(totals["totalHours"]), ""] if totals else None
+    aligns = ["left"] * 5 + ["center"] * 6 + ["left"]
+    widths = [available * w / sum(_WORKING_HOURS_WIDTHS) for w in _WORKING_HOURS_WIDTHS]
+    table = _data_table(header, rows, totals_row, aligns, theme, available, _WORKING_HOURS_SIZES, col_widths=widths)
+    extra = [
+        ("FONT", (1, 1), (1, -1), _FONT_BOLD),
+        ("FONT", (10, 1), (10, -1), _FONT_BOLD),
+        ("LINEBELOW", (11, 1), (11, -2 if totals else -1), 1, _c("#c0c0c0"), None, (1, 2)),
+    ]
+    if totals:
+        extra += [("SPAN", (0, -1), (9, -1)), ("ALIGN", (0, -1), (9, -1), "RIGHT")]
+    table.setStyle(TableStyle(extra))
+    flow.append(table)
+
+    if ctx.get("notes"):
+        notes_style = ParagraphStyle("notes", fontName=_FONT, fontSize=_px(9), leading=_px(9) * 1.4)
+        notes = Table([[Paragraph(f"<b>Notes:</b> {escape(ctx['notes'])}", notes_style)]], colWidths=[available])
+        notes.setStyle(TableStyle([
+            ("BACKGROUND", (0, 0), (-1, -1), _c("#fafafa")),
+            ("BOX", (0, 0), (-1, -1), _px(0.5), _c("#e5e7eb")),
+            ("ROUNDEDCORNERS", [_px(4)] * 4),
+        ]))
+        flow += [Spacer(1, _px(2)), notes]
+
+    # Sign-off blocks
+    muted = TemplateDesign(ctx["template_design"]) == TemplateDesign.MODERN
+    label_style = ParagraphStyle("sign-label", fontName=_FONT, fontSize=_px(9), leading=_px(9) * 1.4,
+                                 textColor=_c("#9ca3af" if muted else "#6b7280"))
+    hint_style = ParagraphStyle("sign-hint", fontName=_FONT, fontSize=_px(7.5), leading=_px(7.5) * 1.4,
+                                textColor=_c("#d1d5db" if muted else "#b0b0b0"))
+    line_color = _c("#d1d5db" if muted else "#b0b0b0")
+    block_w = (available - _px(40)) / 2
+
+    def block(label: str) -> list[Flowable]:
+        return [
+            Paragraph(label, label_style),
+            Spacer(1, _px(20)),
+            HRFlowable(width=block_w, thickness=_px(0.3), color=line_color, spaceAfter=_px(4), hAlign="LEFT"),
+            Paragraph("Name / Date", hint_style),
+        ]
+
+    sign_off = Table([[block("Manager Signature"), "", block("Client Representative")]],
+                     colWidths=[block_w, _px(40), block_w])
+    sign_off.setStyle(TableStyle([("LEFTPADDING", (0, 0), (-1, -1), 0), ("RIGHTPADDING", (0, 0), (-1, -1), 0)]))
+    flow += [Spacer(1, _px(24)), sign_off]
+
+    flow += _footer(f"Generated by {ctx['company_name']} — {ctx['generated_at']}", theme, 7.5)
+    return flow
+
+
+def create_report(req: ReportRequest, output: str | BinaryIO, prepared: PreparedTable | None = None) -> None:
+    if req.report_type not in SUPPORTED_TYPES:
+        raise ValueError(f"Report type not supported by the ReportLab engine: {req.report_type}")
+
+    brand = report_context.brand_context(req)
+    theme = _get_theme(req, brand)
+    generated_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+    if req.report_type == ReportType.WORKING_HOURS:
+        ctx = report_context.build_working_hours_context(req)
+        ctx.update({"title": req.title, "company_name": req.company_name, "generated_at": generated_at})
+        ctx.update(brand)
+        pagesize, margin, canvasmaker = landscape(A4), 1.5 * cm, _SmallNumberedCanvas
+        build = _build_working_hours_report
+    else:
+        ctx = report_context.CONTEXT_BUILDERS[req.report_type](req, prepared=prepared)
+        ctx.update(
+            {
+                "title": req.title,
+                "company_name": req.company_name,
+                "period_label": req.period.label,
+                "generated_at": generated_at,
+            }
+        )
+        ctx.update(brand)
+        pagesize, margin, canvasmaker = A4, 2 * cm, _NumberedCanvas
+        build = _build_table_report
+
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=pagesize,
+        leftMargin=margin,
+        rightMargin=margin,
+        topMargin=margin,
+        bottomMargin=margin,
+        title=req.title,
+        author=req.company_name,
+    )
+    # ReportLab lays out and writes each page in the same pass
+    with stage("layout"):
+        doc.build(build(req, ctx, theme, doc.width), canvasmaker=canvasmaker)
@@ -2,22 +2,45 @@
 
 from __future__ import annotations
 
-import tempfile
+import copy
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
 from io import BytesIO
-from urllib.request import urlopen
+from typing import BinaryIO
 
 from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Inches, Pt, RGBColor
 
+from app.config import settings
 from app.models.schemas import BrandConfig, ReportRequest, ReportType, TemplateDesign
+from app.services import assets, markdown_doc
+from app.services.columns import COLUMNS, event_table, format_column, number
+from app.services.docx_table import TableBuilder
+from app.services.prepared import PreparedTable, prepare
+from app.timing import stage
 
 _HEADER_BG = RGBColor(0x1E, 0x29, 0x3B)
 _HEADER_FG = RGBColor(0xFF, 0xFF, 0xFF)
 _ALT_ROW_BG = RGBColor(0xF8, 0xF9, 0xFA)  # Fixed light gray — never brand-neutral
 _BORDER_COLOR = RGBColor(0xE5, 0xE7, 0xEB)  # Thinner, lighter borders
+_BASE_DOCUMENTS: OrderedDict[tuple, Document] = OrderedDict()
+_BASE_LOCK = threading.Lock()
+_DEFAULT_TABLE_COLORS = {"header_bg": _HEADER_BG, "header_fg": _HEADER_FG, "alt_row_bg": _ALT_ROW_BG, "use_zebra": True}
+
+# Named styles of the base document (see ``_add_styles``)
+_TITLE = "Report Title"
+_SUBTITLE = "Report Subtitle"
+_SECTION = "Report Section"
+_FOOTER = "Report Footer"
+_CODE_BLOCK = "Report Code Block"
+_TEXT = "Report Text"
+_LABEL = "Report Label"
+_STRONG = "Report Strong"
+_CODE = "Report Code"
 
 
 def _hex_to_rgb(hex_color: str) -> RGBColor:
@@ -82,88 +105,34 @@ def _get_colors(req: ReportRequest) -> dict[str, RGBColor]:
     return _get_theme_config(req)
 
 
-def _set_cell_shading(cell, color: RGBColor):
-    from docx.oxml import OxmlElement
-    from docx.oxml.ns import qn
-
-    shading = OxmlElement("w:shd")
-    shading.set(qn("w:fill"), str(color))
-    shading.set(qn("w:val"), "clear")
-    cell._tc.get_or_add_tcPr().append(shading)
+def _new_table(doc: Document, cols: list[str], colors: dict | None) -> TableBuilder:
+    table = doc.add_table(rows=0, cols=len(cols))
+    table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    builder = TableBuilder(table, {**_DEFAULT_TABLE_COLORS, **(colors or {})})
+    builder.add_header(cols)
+    return builder
 
 
-def _style_header_row(row, columns: list[str], colors: dict[str, RGBColor] | None = None):
-    bg = (colors or {}).get("header_bg", _HEADER_BG)
-    fg = (colors or {}).get("header_fg", _HEADER_FG)
-    for i, cell in enumerate(row.cells):
-        cell.text = columns[i]
-        for p in cell.paragraphs:
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-            for run in p.runs:
-                run.font.bold = True
-                run.font.size = Pt(9)
-                run.font.color.rgb = fg
-        _set_cell_shading(cell, bg)
-
-
-def _add_data_row(table, values: list[str], row_idx: int, colors: dict | None = None):
-    alt_bg = (colors or {}).get("alt_row_bg", _ALT_ROW_BG)
-    use_zebra = (colors or {}).get("use_zebra", True)
-    row = table.add_row()
-    for i, cell in enumerate(row.cells):
-        cell.text = str(values[i])
-        for p in cell.paragraphs:
-            for run in p.runs:
-                run.font.size = Pt(9)
-    if use_zebra and row_idx % 2 == 0:
-        for cell in row.cells:
-            _set_cell_shading(cell, alt_bg)
-    return row
-
-
-def _add_summary_section(doc: Document, items: list[tuple[str, str]], colors: dict[str, RGBColor] | None = None):
-    heading_color = (colors or {}).get("header_bg", _HEADER_BG)
+def _add_heading(doc: Document, text: str):
     doc.add_paragraph()
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    run = p.add_run("Summary")
-    run.font.size = Pt(13)
-    run.font.bold = True
-    run.font.color.rgb = heading_color
+    doc.add_paragraph(text, style=_SECTION)
+
+
+def _add_summary_section(doc: Document, items: list[tuple[str, str]]):
+    _add_heading(doc, "Summary")
 
     for label, value in items:
         p = doc.add_paragraph()
-        run_label = p.add_run(f"{label}: ")
-        run_label.font.bold = True
-        run_label.font.size = Pt(10)
-        run_val = p.add_run(str(value))
-        run_val.font.size = Pt(10)
+        p.add_run(f"{label}: ", _LABEL)
+        p.add_run(str(value), _TEXT)
 
 
-def _build_staff_shifts(doc: Document, req: ReportRequest, colors: dict[str, RGBColor] | None = None):
-    cols = ["Date", "Event", "Client", "Venue", "Role", "Clock In", "Clock Out", "Hours", "Rate", "Earnings"]
-    table = doc.add_table(rows=1, cols=len(cols))
-    table.alignment = WD_TABLE_ALIGNMENT.CENTER
-    _style_header_row(table.rows[0], cols, colors)
+def _build_staff_shifts(doc: Document, req: ReportRequest, colors: dict[str, RGBColor], prepared: PreparedTable):
+    table = _new_table(doc, [c.label for c in COLUMNS[ReportType.STAFF_SHIFTS]], colors)
 
-    for idx, r in enumerate(req.records):
-        _add_data_row(
-            table,
-            [
-                r.get("date", ""),
-                r.get("eventName", ""),
-                r.get("clientName", ""),
-                r.get("venueName", ""),
-                r.get("role", ""),
-                r.get("clockIn", ""),
-                r.get("clockOut", ""),
-                str(r.get("hoursWorked", 0)),
-                f"${r.get('hourlyRate', 0):,.2f}",
-                f"${r.get('earnings', 0):,.2f}",
-            ],
-            idx,
-            colors,
-        )
+    for row in prepared.text_rows():
+        table.add_row(row)
+    table.close()
 
     _add_summary_section(
         doc,
@@ -172,30 +141,15 @@ def _build_staff_shifts(doc: Document, req: ReportRequest, colors: dict[str, RGB
             ("Total Hours", str(req.summary.get("totalHours", 0))),
             ("Total Earnings", f"${req.summary.get('totalEarnings', 0):,.2f}"),
         ],
-        colors,
     )
 
 
-def _build_payroll(doc: Document, req: ReportRequest, colors: dict[str, RGBColor] | None = None):
-    cols = ["Staff Name", "Email", "Shifts", "Hours", "Avg Rate", "Total Pay"]
-    table = doc.add_table(rows=1, cols=len(cols))
-    table.alignment = WD_TABLE_ALIGNMENT.CENTER
-    _style_header_row(table.rows[0], cols, colors)
+def _build_payroll(doc: Document, req: ReportRequest, colors: dict[str, RGBColor], prepared: PreparedTable):
+    table = _new_table(doc, [c.label for c in COLUMNS[ReportType.PAYROLL]], colors)
 
-    for idx, r in enumerate(req.records):
-        _add_data_row(
-            table,
-            [
-                r.get("name", ""),
-                r.get("email", ""),
-                str(r.get("shifts", 0)),
-                str(r.get("hours", 0)),
-                f"${r.get('averageRate', 0):,.2f}",
-                f"${r.get('totalPay', 0):,.2f}",
-            ],
-            idx,
-            colors,
-        )
+    for row in prepared.text_rows():
+        table.add_row(row)
+    table.close()
 
     _add_summary_section(
         doc,
@@ -204,34 +158,22 @@ def _build_payroll(doc: Document, req: ReportRequest, colors: dict[str, RGBColor
             ("Total Hours", str(req.summary.get("totalHours", 0))),
             ("Total Payroll", f"${req.summary.get('totalPayroll', 0):,.2f}"),
         ],
-        colors,
     )
 
 
-def _build_attendance(doc: Document, req: ReportRequest, colors: dict[str, RGBColor] | None = None):
-    cols = ["Date", "Event", "Staff", "Role", "Sched. Start", "Sched. End", "Clock In", "Clock Out", "Hours", "Status"]
-    table = doc.add_table(rows=1, cols=len(cols))
-    table.alignment = WD_TABLE_ALIGNMENT.CENTER
-    _style_header_row(table.rows[0], cols, colors)
+def _one_decimal(value) -> str:
+    # Python's round, not numpy's: halves like 0.05 round the way the per-cell code did
+    return number(round(float(value), 1))
 
-    for idx, r in enumerate(req.records):
-        _add_data_row(
-            table,
-            [
-                r.get("date", ""),
-                r.get("eventName", ""),
-                r.get("staffName", ""),
-                r.get("role", ""),
-                r.get("scheduledStart", ""),
-                r.get("scheduledEnd", ""),
-                r.get("clockIn", ""),
-                r.get("clockOut", ""),
-                str(round(r.get("hoursWorked", 0), 1)),
-                r.get("status", ""),
-            ],
-            idx,
-            colors,
-        )
+
+def _build_attendance(doc: Document, req: ReportRequest, colors: dict[str, RGBColor], prepared: PreparedTable):
+    table = _new_table(doc, [c.label for c in COLUMNS[ReportType.ATTENDANCE]], colors)
+
+    # Hours are shown to one decimal here, unlike the raw values in the PDF
+    hours = format_column(prepared.values["hoursWorked"], _one_decimal)
+    for row, h in zip(prepared.text_rows(), hours):
+        table.add_row([*row[:8], h, row[9]])
+    table.close()
 
     _add_summary_section(
         doc,
@@ -239,9 +181,17 @@ def _build_attendance(doc: Document, req: ReportRequest, colors: dict[str, RGBCo
             ("Total Records", str(req.summary.get("totalRecords", len(req.records)))),
             ("Total Hours", str(req.summary.get("totalHours", 0))),
         ],
-        colors,
     )
 
+    # Per-event breakdown, when the service aggregated raw shifts
+    header, rows = event_table(req.summary)
+    if rows:
+        _add_heading(doc, "By Event")
+        table = _new_table(doc, header, colors)
+        for row in rows:
+            table.add_row([number(v) for v in row])
+        table.close()
+
 
 _BUILDERS = {
     ReportType.STAFF_SHIFTS: _build_staff_shifts,
@@ -250,52 +200,116 @@ _BUILDERS = {
 }
 
 
-def _build_ai_analysis(doc: Document, req: ReportRequest, colors: dict[str, RGBColor] | None = None):
-    """Render AI analysis markdown as Word paragraphs."""
-    header_bg = (colors or {}).get("header_bg", _HEADER_BG)
-    secondary = (colors or {}).get("secondary", RGBColor(0x33, 0x41, 0x55))
-    md_text = ""
-    if req.records and len(req.records) > 0:
-        md_text = req.records[0].get("content", "")
-
-    for line in md_text.split("\n"):
-        stripped = line.strip()
-        if not stripped:
-            doc.add_paragraph()
+_LIST_STYLES = {"bullet_list": "List Bullet", "ordered_list": "List Number"}
+_CODE_FONT = "Courier New"
+
+
+def _add_inlines(p, nodes, header_bg: RGBColor, bold=False, italic=False, underline=False):
+    """Append markdown inline nodes to paragraph ``p`` as formatted runs."""
+    for node in nodes:
+        if node.kind == "break":
+            p.add_run().add_break()
+            continue
+        if node.kind in ("strong", "em", "link"):
+            _add_inlines(
+                p,
+                node.children,
+                header_bg,
+                bold or node.kind == "strong",
+                italic or node.kind == "em",
+                underline or node.kind == "link",
+            )
             continue
-        if stripped.startswith("### "):
-            h = doc.add_heading(stripped[4:], level=3)
-            for run in h.runs:
-                run.font.color.rgb = RGBColor(0x47, 0x55, 0x69)
-        elif stripped.startswith("## "):
-            h = doc.add_heading(stripped[3:], level=2)
-            for run in h.runs:
-                run.font.color.rgb = secondary
-        elif stripped.startswith("# "):
-            h = doc.add_heading(stripped[2:], level=1)
-            for run in h.runs:
+        text = markdown_doc.plain_text(node)
+        if node.kind != "code":
+            # Source line breaks inside a paragraph are spaces, as in HTML
+            text = text.replace("\n", " ")
+        if not text:
+            continue
+        if node.kind == "code":
+            run = p.add_run(text, _CODE)
+            if bold:
+                run.font.bold = True
                 run.font.color.rgb = header_bg
-        elif stripped.startswith("- ") or stripped.startswith("* "):
-            p = doc.add_paragraph(stripped[2:], style="List Bullet")
-            for run in p.runs:
-                run.font.size = Pt(10)
         else:
-            # Handle **bold** segments
-            p = doc.add_paragraph()
-            parts = stripped.split("**")
-            for i, part in enumerate(parts):
-                if not part:
-                    continue
-                run = p.add_run(part)
-                run.font.size = Pt(10)
-                if i % 2 == 1:
-                    run.font.bold = True
-                    run.font.color.rgb = header_bg
+            run = p.add_run(text, _STRONG if bold else _TEXT)
+        if italic:
+            run.font.italic = True
+        if underline:
+            run.font.underline = True
+
+
+def _add_list(doc: Document, node, colors: dict, depth: int):
+    # python-docx's default template has list styles for three levels
+    level = f" {min(depth, 2) + 1}" if depth else ""
+    style = _LIST_STYLES[node.kind] + level
+    for item in node.children:
+        inline = [child for child in item.children if child.kind not in markdown_doc.BLOCKS]
+        first = True
+        if inline:
+            _add_inlines(doc.add_paragraph(style=style), inline, colors["header_bg"])
+            first = False
+        for child in item.children:
+            if child.kind == "paragraph":
+                # Later paragraphs of a loose item continue it without a new bullet
+                p = doc.add_paragraph(style=style if first else "List Continue" + level)
+                _add_inlines(p, child.children, colors["header_bg"])
+                first = False
+            elif child.kind in _LIST_STYLES:
+                _add_list(doc, child, colors, depth + 1)
+            elif child.kind in markdown_doc.BLOCKS:
+                _add_markdown_block(doc, child, colors)
+
+
+def _add_markdown_block(doc: Document, node, colors: dict):
+    kind = node.kind
+    if kind == "heading":
+        doc.add_paragraph(markdown_doc.plain_text(node), style=f"Report Heading {node.level}")
+    elif kind == "paragraph":
+        _add_inlines(doc.add_paragraph(), node.children, colors["header_bg"])
+    elif kind in _LIST_STYLES:
+        _add_list(doc, node, colors, 0)
+    elif kind == "table":
+        header = [row for row in node.children if row.kind == "header"]
+        rows = [row for row in node.children if row.kind == "row"]
+        width = max(len(row.children) for row in node.children)
+        labels = [markdown_doc.plain_text(cell) for cell in header[0].children] if header else []
+        table = _new_table(doc, labels + [""] * (width - len(labels)), colors)
+        for row in rows:
+            values = [markdown_doc.plain_text(cell) for cell in row.children]
+            table.add_row(values + [""] * (width - len(values)))
+        table.close()
+    elif kind == "code_block":
+        doc.add_paragraph(style=_CODE_BLOCK).add_run(node.text.rstrip("\n"))
+    elif kind == "quote":
+        for child in node.children:
+            if child.kind == "paragraph":
+                _add_inlines(doc.add_paragraph(style="Quote"), child.children, colors["header_bg"])
+            else:
+                _add_markdown_block(doc, child, colors)
+    elif kind == "rule":
+        doc.add_paragraph()
+    else:
+        text = markdown_doc.plain_text(node).strip()
+        if text:
+            doc.add_paragraph().add_run(text, _TEXT)
+
+
+def _build_ai_analysis(doc: Document, req: ReportRequest, colors: dict[str, RGBColor] | None = None):
+    """Render AI analysis markdown as Word paragraphs, lists and tables.
+
+    Walks the same parsed tree (``markdown_doc``) the PDF template is rendered
+    from, so tables and code blocks come out in both formats.
+    """
+    colors = {**_DEFAULT_TABLE_COLORS, **(colors or {})}
+    for i, node in enumerate(markdown_doc.analysis(req).children):
+        if i:
+            doc.add_paragraph()
+        _add_markdown_block(doc, node, colors)
 
 
 def _build_working_hours(doc: Document, req: ReportRequest, colors: dict[str, RGBColor] | None = None):
     """Build working hours sheet table for Word."""
-    header_bg = (colors or {}).get("header_bg", _HEADER_BG)
     # Event info block
     summary = req.summary or {}
     info_items = [
@@ -310,27 +324,20 @@ def _build_working_hours(doc: Document, req: ReportRequest, colors: dict[str, RG
         if not value or value == " – ":
             continue
         p = doc.add_paragraph()
-        run_label = p.add_run(f"{label}: ")
-        run_label.font.bold = True
-        run_label.font.size = Pt(10)
-        run_label.font.color.rgb = header_bg
-        run_val = p.add_run(str(value))
-        run_val.font.size = Pt(10)
+        p.add_run(f"{label}: ", _STRONG)
+        p.add_run(str(value), _TEXT)
 
     doc.add_paragraph()
 
     cols = ["#", "Staff Name", "Role", "Phone", "ID", "Sched In", "Sched Out",
             "Clock In", "Clock Out", "Break", "Hours", "Signature"]
-    table = doc.add_table(rows=1, cols=len(cols))
-    table.alignment = WD_TABLE_ALIGNMENT.CENTER
-    _style_header_row(table.rows[0], cols, colors)
+    table = _new_table(doc, cols, colors)
 
     total_hours = 0.0
     for idx, r in enumerate(req.records):
         hours = r.get("totalHours", 0)
         total_hours += float(hours) if hours else 0
-        _add_data_row(
-            table,
+        table.add_row(
             [
                 str(idx + 1),
                 r.get("name", ""),
@@ -344,60 +351,131 @@ def _build_working_hours(doc: Document, req: ReportRequest, colors: dict[str, RG
                 r.get("breakDuration", ""),
                 str(r.get("totalHours", "")),
                 "",  # Signature — blank for manual entry
-            ],
-            idx,
-            colors,
+            ]
         )
 
     # Totals row
-    totals_row = table.add_row()
-    for i, cell in enumerate(totals_row.cells):
-        if i == 0:
-            cell.text = ""
-        elif i == 1:
-            cell.text = "TOTAL"
-            for p in cell.paragraphs:
-                for run in p.runs:
-                    run.font.bold = True
-                    run.font.size = Pt(9)
-        elif i == 10:
-            cell.text = str(round(total_hours, 1))
-            for p in cell.paragraphs:
-                for run in p.runs:
-                    run.font.bold = True
-                    run.font.size = Pt(9)
-        else:
-            cell.text = ""
-        _set_cell_shading(cell, RGBColor(0xF1, 0xF5, 0xF9))
+    totals = [""] * len(cols)
+    totals[1] = "TOTAL"
+    totals[10] = str(round(total_hours, 1))
+    table.add_totals(totals, bold={1, 10})
+    table.close()
 
     # Sign-off section
     doc.add_paragraph()
     doc.add_paragraph()
-    p = doc.add_paragraph()
-    run = p.add_run("Manager Signature: ")
-    run.font.size = Pt(10)
-    run.font.bold = True
-    p.add_run("_" * 40).font.size = Pt(10)
+    for label in ("Manager Signature: ", "Client Representative: "):
+        p = doc.add_paragraph()
+        p.add_run(label, _LABEL)
+        p.add_run("_" * 40, _TEXT)
 
-    p2 = doc.add_paragraph()
-    run2 = p2.add_run("Client Representative: ")
-    run2.font.size = Pt(10)
-    run2.font.bold = True
-    p2.add_run("_" * 40).font.size = Pt(10)
 
+def _add_logo(doc: Document, logo_url: str) -> bool:
+    """Fetch logo (via the shared asset cache) and insert into document header area.
 
-def _add_logo(doc: Document, logo_url: str) -> None:
-    """Download logo from URL and insert into document header area."""
+    Returns False when the logo could not be fetched, so callers can retry later.
+    """
+    asset = assets.fetcher.fetch(logo_url)
+    if asset is None:
+        return False  # Logo fetch failed — continue without it
     try:
-        with urlopen(logo_url) as resp:
-            logo_data = resp.read()
-        stream = BytesIO(logo_data)
-        doc.add_picture(stream, width=Inches(3.5))
+        doc.add_picture(BytesIO(asset.content), width=Inches(3.5))
     except Exception:
-        pass  # Logo fetch failed — continue without it
+        pass  # Not a usable image — continue without it
+    return True
 
 
-def create_report(req: ReportRequest, output_path: str) -> None:
+def _add_style(doc: Document, name: str, base: str, kind=WD_STYLE_TYPE.PARAGRAPH, /, **font):
+    style = doc.styles.add_style(name, kind)
+    style.base_style = doc.styles[base]
+    for attr, value in font.items():
+        if attr == "color":
+            style.font.color.rgb = value
+        else:
+            setattr(style.font, attr, value)
+    return style
+
+
+def _add_styles(doc: Document, theme: dict) -> None:
+    """Named paragraph and character styles in ``theme``'s colors, so requests only add text."""
+    heading = theme["header_bg"]
+    _add_style(doc, _TITLE, "Heading 1", color=theme.get("title_color", RGBColor(0x1A, 0x1A, 0x1A)))
+    _add_style(doc, _SUBTITLE, "Normal", size=Pt(11), color=RGBColor(0x64, 0x74, 0x8B))
+    section = _add_style(doc, _SECTION, "Normal", size=Pt(13), bold=True, color=heading)
+    section.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.LEFT
+    footer = _add_style(doc, _FOOTER, "Normal", size=Pt(8), color=RGBColor(0x94, 0xA3, 0xB8))
+    footer.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    _add_style(doc, _CODE_BLOCK, "Normal", size=Pt(9), name=_CODE_FONT)
+
+    # Markdown headings: level 1 in the table header color, level 2 in the theme's secondary
+    levels = {1: heading, 2: theme.get("secondary", RGBColor(0x33, 0x41, 0x55))}
+    for level in range(1, 7):
+        color = levels.get(level, RGBColor(0x47, 0x55, 0x69))
+        _add_style(doc, f"Report Heading {level}", f"Heading {level}", color=color)
+
+    character = WD_STYLE_TYPE.CHARACTER
+    _add_style(doc, _TEXT, "Default Paragraph Font", character, size=Pt(10))
+    _add_style(doc, _LABEL, _TEXT, character, bold=True)
+    _add_style(doc, _STRONG, _TEXT, character, bold=True, color=heading)
+    _add_style(doc, _CODE, _TEXT, character, name=_CODE_FONT)
+
+
+def _build_base(req: ReportRequest, theme: dict) -> tuple[Document, bool]:
+    """Build the request-independent part of a document; False if it must not be cached.
+
+    That is the styles, the logo, the empty title and subtitle paragraphs and,
+    after them, the empty footer paragraphs that ``create_report`` moves
+    below the content.
+    """
+    doc = Document()
+    _add_styles(doc, theme)
+    cacheable = True
+
+    # Logo (gated on theme)
+    bc = req.brand_config
+    if bc and bc.logo_header_url and theme.get("show_logo", True):
+        cacheable = _add_logo(doc, bc.logo_header_url)
+
+    doc.add_paragraph(style=_TITLE)
+    doc.add_paragraph(style=_SUBTITLE)
+    doc.add_paragraph()
+    doc.add_paragraph()
+    doc.add_paragraph(style=_FOOTER)
+    return doc, cacheable
+
+
+def _new_document(req: ReportRequest, theme: dict) -> Document:
+    """Return a private copy of the base document for this request's theme and brand.
+
+    ``Document()`` unzips and parses python-docx's default template on every
+    call; the styles part alone is ~350 KB of XML. Bases are built once per
+    ``(TemplateDesign, BrandConfig)`` and copied per request. The styles
+    element is never modified after the base is built, so copies share it
+    instead of deep-copying it.
+    """
+    key = (req.template_design, (req.brand_config or BrandConfig()).model_dump_json())
+    with _BASE_LOCK:
+        base = _BASE_DOCUMENTS.get(key)
+        if base is not None:
+            _BASE_DOCUMENTS.move_to_end(key)
+    if base is None:
+        base, cacheable = _build_base(req, theme)
+        if not cacheable:
+            return base
+        with _BASE_LOCK:
+            _BASE_DOCUMENTS[key] = base
+            while len(_BASE_DOCUMENTS) > settings.DOCX_BASE_CACHE_SIZE:
+                _BASE_DOCUMENTS.popitem(last=False)
+
+    styles = base.styles.element
+    doc = copy.deepcopy(base, {id(styles): styles})
+    # Document caches a wrapper of <w:body>, which deepcopy copied apart from
+    # the document tree; drop it so content goes into the tree that is saved
+    doc._Document__body = None
+    return doc
+
+
+def create_report(req: ReportRequest, output: str | BinaryIO, prepared: PreparedTable | None = None) -> None:
     colors = _get_colors(req)
     theme = _get_theme_config(req)
 
@@ -412,38 +490,26 @@ def create_report(req: ReportRequest, output_path: str) -> None:
         if not builder:
             raise ValueError(f"Unknown report type: {req.report_type}")
 
-    doc = Document()
+    # Fresh copy of the cached per-theme base (styles, logo, title and footer skeleton)
+    doc = _new_document(req, theme)
+    title, subtitle, _, *footer = doc.paragraphs[-5:]
+    title.add_run(req.title)
+    subtitle.add_run(f"{req.company_name}  |  {req.period.label}")
 
-    # Logo (gated on theme)
-    bc = req.brand_config
-    if bc and bc.logo_header_url and theme.get("show_logo", True):
-        _add_logo(doc, bc.logo_header_url)
-
-    # Title — use theme-specific title color
-    title_color = theme.get("title_color", RGBColor(0x1A, 0x1A, 0x1A))
-    title_para = doc.add_heading(req.title, level=1)
-    for run in title_para.runs:
-        run.font.color.rgb = title_color
-
-    # Subtitle with period
-    subtitle = doc.add_paragraph()
-    run = subtitle.add_run(f"{req.company_name}  |  {req.period.label}")
-    run.font.size = Pt(11)
-    run.font.color.rgb = RGBColor(0x64, 0x74, 0x8B)
-
-    doc.add_paragraph()
-
-    builder(doc, req, colors)
+    with stage("layout"):
+        if req.report_type in _BUILDERS:
+            builder(doc, req, colors, prepared or prepare(req))
+        else:
+            builder(doc, req, colors)
 
-    # Footer
-    doc.add_paragraph()
-    footer = doc.add_paragraph()
-    footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = footer.add_run(
+    # Footer: the base's spacer and footer paragraphs go after the content
+    body = doc.element.body
+    for p in footer:
+        body.sectPr.addprevious(p._p)
+    footer[-1].add_run(
         f"Generated by {req.company_name} Document Service — "
         f"{datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}"
     )
-    run.font.size = Pt(8)
-    run.font.color.rgb = RGBColor(0x94, 0xA3, 0xB8)
 
-    doc.save(output_path)
+    with stage("serialize"):
+        doc.save(output)
@@ -0,0 +1,100 @@
+"""Send a document while a rendering worker is still writing it.
+
+The worker renders into a file in ``settings.OUTPUT_DIR`` with
+``renderer.render_file``. ``RenderStream`` reads the file from the event loop
+as it grows and yields each new piece to a ``StreamingResponse``, which goes
+out with chunked transfer encoding. Neither process holds the whole
+document, and the first bytes leave once the engine has written them, not
+after the last row.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import AsyncIterator, Callable
+
+from app.services.renderer import RenderedReport
+
+_READ_CHUNK = 256 * 1024
+# The response starts once this much is written, or the render ends. A render
+# that fails on its first rows (bad records, say) still gets an error status
+_FIRST_BYTES = 64 * 1024
+# How often the file is checked for new output while the worker writes it
+_POLL_SECONDS = 0.02
+
+
+class RenderStream:
+    """The bytes of ``path`` as the render in ``task`` writes them.
+
+    Await :meth:`first` before sending the response: it raises if the render
+    failed before writing ``_FIRST_BYTES``, so the error still gets a proper
+    status. A later failure ends the body early, and the client sees a
+    truncated transfer. ``on_done`` gets the finished report. ``path`` and
+    every path in ``cleanup`` are deleted once the render is over, even if
+    the client leaves first.
+    """
+
+    def __init__(self, path: str, task: asyncio.Future, on_done: Callable[[RenderedReport], None] | None = None):
+        self.path = path
+        self.task = task
+        self.on_done = on_done
+        self.cleanup = [path]
+        self._file = open(path, "rb")
+        self._head = b""
+
+    async def _read(self) -> bytes:
+        """The next piece of output; empty once the render is over and the file read to its end."""
+        while True:
+            # Checked before reading, so bytes written just before the render ended are not missed
+            done = self.task.done()
+            data = self._file.read(_READ_CHUNK)
+            if data or done:
+                return data
+            await asyncio.sleep(_POLL_SECONDS)
+
+    async def first(self) -> None:
+        """Wait for ``_FIRST_BYTES`` of output or the end of the render; re-raises a render failure."""
+        try:
+            while True:
+                done = self.task.done()
+                self._head += self._file.read(_FIRST_BYTES - len(self._head))
+                if done:
+                    self.task.result()
+                    return
+                if len(self._head) >= _FIRST_BYTES:
+                    return
+                await asyncio.sleep(_POLL_SECONDS)
+        except BaseException:
+            self.close()
+            raise
+
+    def _finish(self) -> None:
+        report = self.task.result()
+        if self.on_done:
+            self.on_done(report)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            if self._head:
+                yield self._head
+            while data := await self._read():
+                yield data
+            self._finish()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        if self.task.done():
+            self._remove(self.task)
+        else:
+            self.task.add_done_callback(self._remove)
+
+    def _remove(self, task: asyncio.Future) -> None:
+        if not task.cancelled():
+            # Retrieved so a render that failed after the client left is not reported as unhandled
+            task.exception()
+        for path in self.cleanup:
+            if os.path.exists(path):
+                os.remove(path)
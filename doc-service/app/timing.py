@@ -0,0 +1,73 @@
+"""Per-render stage timings, recorded inside the rendering workers.
+
+The engines mark their phases with ``stage("template")``, ``stage("layout")``
+and so on; ``renderer.render`` resets the recorder before a report and
+collects the totals after it, and they travel back on the ``RenderedReport``.
+
+Stages may nest: time spent in an inner stage is charged to it alone, so the
+totals never count the same second twice. ``prepare`` called from a context
+builder, for instance, is not also counted as ``context``. The recorder is
+thread-local, so it works the same under the thread executor.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+_local = threading.local()
+
+
+def _state() -> tuple[dict[str, float], list[list]]:
+    try:
+        return _local.totals, _local.stack
+    except AttributeError:
+        _local.totals, _local.stack = {}, []
+        return _local.totals, _local.stack
+
+
+def reset() -> None:
+    _local.totals, _local.stack = {}, []
+
+
+def collect() -> dict[str, float]:
+    """Seconds spent per stage since the last ``reset``; resets the recorder."""
+    totals, _ = _state()
+    reset()
+    return totals
+
+
+@contextmanager
+def stage(name: str):
+    totals, stack = _state()
+    now = time.perf_counter()
+    if stack:
+        # Pause the enclosing stage while this one runs
+        outer = stack[-1]
+        totals[outer[0]] = totals.get(outer[0], 0.0) + now - outer[1]
+    entry = [name, now]
+    stack.append(entry)
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        totals[name] = totals.get(name, 0.0) + now - entry[1]
+        stack.pop()
+        if stack:
+            stack[-1][1] = now
+
+
+def timed(name: str):
+    """Decorator form of ``stage``."""
+
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,90 @@
+"""Payload size and ingest time of a staff-shifts export: JSON records vs msgpack columns.
+
+Both paths end at a ``PreparedTable``, the point where every engine starts
+rendering: the JSON body is parsed, validated as a ``ReportRequest`` and
+prepared from its record dicts; the msgpack body is unpacked into
+``RecordColumns`` and prepared straight from the column arrays.
+
+Usage (from doc-service/):
+
+    python -m benchmarks.columnar_input --rows 100000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+
+import msgpack
+
+from app.ingest import unpack_columns
+from app.models.schemas import ReportRequest, ReportType
+from app.services.columns import TABLE_KEYS
+from app.services.prepared import prepare
+
+_META = {
+    "report_type": "staff-shifts",
+    "report_format": "xlsx",
+    "title": "Shift History",
+    "period": {"start": "2025-01-01", "end": "2025-03-31", "label": "Q1 2025"},
+    "summary": {"totalShifts": 0, "totalHours": 0, "totalEarnings": 0},
+}
+
+
+def _records(rows: int) -> list[dict]:
+    return [
+        {
+            "date": f"2025-{i % 3 + 1:02d}-{i % 28 + 1:02d}",
+            "eventName": f"Corporate Gala {i % 250}",
+            "clientName": f"Client {i % 40}",
+            "venueName": f"Venue {i % 25}",
+            "role": ("Server", "Bartender", "Chef", "Captain")[i % 4],
+            "clockIn": "17:00",
+            "clockOut": "23:30",
+            "hoursWorked": 6.5,
+            "hourlyRate": 22.0 + i % 5,
+            "earnings": 6.5 * (22.0 + i % 5),
+        }
+        for i in range(rows)
+    ]
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = _records(args.rows)
+    keys = TABLE_KEYS[ReportType.STAFF_SHIFTS]
+    json_body = json.dumps({**_META, "records": records}).encode()
+    columns = {k: [r[k] for r in records] for k in keys}
+    msgpack_body = msgpack.packb({**_META, "columns": columns})
+
+    def ingest_json():
+        prepare(ReportRequest.model_validate(json.loads(json_body)))
+
+    def ingest_msgpack():
+        prepare(unpack_columns(msgpack_body))
+
+    json_s = _time(ingest_json, args.repeat)
+    msgpack_s = _time(ingest_msgpack, args.repeat)
+    print(f"rows={args.rows} (median of {args.repeat})")
+    print(f"  json records    {len(json_body) / 1e6:8.2f} MB   {json_s * 1000:8.1f} ms")
+    print(f"  msgpack columns {len(msgpack_body) / 1e6:8.2f} MB   {msgpack_s * 1000:8.1f} ms")
+    print(f"  size x{len(json_body) / len(msgpack_body):.1f}   time x{json_s / msgpack_s:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark for excel_service._style_sheet against the old per-cell styling.
+
+Usage (from doc-service/):
+
+    python -m benchmarks.excel_styling --rows 20000 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from app.services.excel_service import _style_sheet
+
+_BRAND = {"header_bg": "#FAFAFA", "header_fg": "#4B5563", "neutral": "#FAFBFC", "use_zebra": True}
+
+
+def _legacy_style_sheet(workbook, worksheet, df: pd.DataFrame, bc: dict) -> None:
+    """The pre-optimization implementation, kept here as the comparison baseline."""
+    header_fmt = workbook.add_format({"bold": True, "bg_color": bc["header_bg"], "font_color": bc["header_fg"]})
+    for col_num, col_name in enumerate(df.columns):
+        worksheet.write(1, col_num, col_name, header_fmt)
+    for col_num, col_name in enumerate(df.columns):
+        max_len = max(
+            len(str(col_name)),
+            df.iloc[:, col_num].astype(str).str.len().max() if len(df) > 0 else 0,
+        )
+        worksheet.set_column(col_num, col_num, min(max_len + 4, 30))
+    alt_fmt = workbook.add_format({"bg_color": bc["neutral"]})
+    for row_idx in range(len(df)):
+        if row_idx % 2 == 0:
+            for col_idx in range(len(df.columns)):
+                worksheet.write(row_idx + 2, col_idx, df.iloc[row_idx, col_idx], alt_fmt)
+
+
+def _attendance_frame(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = random.Random(seed)
+    return pd.DataFrame(
+        {
+            "Date": [f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(rows)],
+            "Event": [f"Event {rng.randint(1, 400)}" for _ in range(rows)],
+            "Staff": [f"Staff Member {rng.randint(1, 900)}" for _ in range(rows)],
+            "Role": [rng.choice(["Server", "Bartender", "Chef", "Host"]) for _ in range(rows)],
+            "Sched. Start": ["17:00"] * rows,
+            "Sched. End": ["23:00"] * rows,
+            "Clock In": [f"17:{rng.randint(0, 59):02d}" for _ in range(rows)],
+            "Clock Out": [f"23:{rng.randint(0, 59):02d}" for _ in range(rows)],
+            "Hours": [round(rng.uniform(3, 9), 1) for _ in range(rows)],
+            "Status": [rng.choice(["clocked", "pending", "absent"]) for _ in range(rows)],
+        }
+    )
+
+
+def _time_styling(style_fn, df: pd.DataFrame, repeat: int) -> tuple[float, float]:
+    """Return (best styling-only seconds, best end-to-end seconds incl. to_excel + close)."""
+    best_style = best_total = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with pd.ExcelWriter(BytesIO(), engine="xlsxwriter") as writer:
+            df.to_excel(writer, sheet_name="Sheet", index=False, startrow=1)
+            t0 = time.perf_counter()
+            style_fn(writer.book, writer.sheets["Sheet"], df, _BRAND)
+            styled = time.perf_counter() - t0
+        best_style = min(best_style, styled)
+        best_total = min(best_total, time.perf_counter() - start)
+    return best_style, best_total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = _attendance_frame(args.rows)
+    legacy_style, legacy_total = _time_styling(_legacy_style_sheet, df, args.repeat)
+    new_style, new_total = _time_styling(_style_sheet, df, args.repeat)
+
+    print(f"rows={args.rows} cols={len(df.columns)} (best of {args.repeat})")
+    print(f"  legacy   styling {legacy_style * 1000:9.1f} ms   workbook {legacy_total * 1000:9.1f} ms")
+    print(f"  current  styling {new_style * 1000:9.1f} ms   workbook {new_total * 1000:9.1f} ms")
+    print(f"  speedup  styling {legacy_style / new_style:8.1f}x   workbook {legacy_total / new_total:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
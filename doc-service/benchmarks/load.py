@@ -0,0 +1,375 @@
+"""Closed-loop load test of the HTTP service with a weighted mix of reports.
+
+``--concurrency`` simulated users each send a report request, wait for the
+document, and immediately send the next, until ``--requests`` have been sent
+or ``--duration`` seconds have passed. Requests are drawn from ``--mix``, a
+comma-separated list of ``type:format:records[:weight]`` entries, with
+payloads from ``benchmarks.payloads``. Each request gets a unique title so it
+misses the report cache, as distinct exports at month end would; pass
+``--cacheable`` to send repeatable bodies instead.
+
+Targets:
+
+* in-process (default): the FastAPI app is driven directly over ASGI, with
+  its lifespan, so the real render executor and job queue are exercised
+  without a network hop;
+* ``--url http://127.0.0.1:5000``: a running uvicorn. Pass ``--pid`` with the
+  server's process id to sample its memory.
+
+``--api sync`` posts to ``/generate-report``; ``--api jobs`` submits to
+``/jobs``, polls the job and fetches the result, with latency measured from
+submission to the last result byte.
+
+The report covers throughput, p50/p95/p99 latency overall and per mix entry,
+the error rate, the rejection rates (429 from the job API, 503 from a full
+render queue), and the resident memory of the service process and its
+rendering workers over time (Linux ``/proc``). In-process runs include the
+load generator itself in that figure.
+
+Usage (from doc-service/):
+
+    python -m benchmarks.load --concurrency 50 --duration 60
+    python -m benchmarks.load --url http://127.0.0.1:5000 --pid 1234 --api jobs \\
+        --mix payroll:xlsx:2000:3,staff-shifts:pdf:300:2,attendance:csv:20000:1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from app.config import settings
+from app.models.schemas import ReportFormat, ReportType, TemplateDesign
+from benchmarks import payloads
+
+# Month end: payroll and shift exports dominate, with a few large spreadsheets and analyses
+DEFAULT_MIX = (
+    "payroll:xlsx:300:4,payroll:pdf:300:3,staff-shifts:pdf:200:3,staff-shifts:xlsx:5000:2,"
+    "staff-shifts:csv:20000:1,attendance:docx:200:1,working-hours:pdf:40:2,ai-analysis:pdf:60:1"
+)
+
+# Distinct payloads generated per mix entry; requests cycle through them
+_VARIANTS = 4
+
+
+@dataclass
+class MixEntry:
+    name: str
+    bodies: list[bytes]
+    weight: float
+
+
+@dataclass
+class Sample:
+    entry: str
+    started: float
+    seconds: float
+    status: int
+    size: int = 0
+
+
+def _parse_mix(spec: str, seed: int) -> list[MixEntry]:
+    entries = []
+    rng = random.Random(seed)
+    for item in spec.split(","):
+        parts = item.strip().split(":")
+        if len(parts) not in (3, 4):
+            raise SystemExit(f"Bad mix entry {item!r}; expected type:format:records[:weight]")
+        report_type, report_format, records = ReportType(parts[0]), ReportFormat(parts[1]), int(parts[2])
+        weight = float(parts[3]) if len(parts) == 4 else 1.0
+        bodies = []
+        for variant in range(_VARIANTS):
+            design = rng.choice(list(TemplateDesign))
+            payload = payloads.payload(report_type, report_format, design, records, seed + variant)
+            bodies.append(json.dumps(payload).encode())
+        entries.append(MixEntry(f"{report_type.value}:{report_format.value}:{records}", bodies, weight))
+    return entries
+
+
+def _retitle(body: bytes, n: int) -> bytes:
+    # Later keys win in JSON objects, so appending a title makes the request unique cheaply
+    return body[:-1] + b', "title": "Load test ' + str(n).encode() + b'"}'
+
+
+# ── clients ──────────────────────────────────────────────────────────────
+
+
+class AsgiClient:
+    """Calls the ASGI app directly, in this event loop."""
+
+    def __init__(self, app, headers: dict[str, str]):
+        self.app = app
+        self.headers = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> tuple[int, bytes]:
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"loadtest"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *self.headers,
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("loadtest", 80),
+        }
+        delivered = False
+        status = 0
+        chunks = []
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The client never disconnects; this waits until the response is done
+            await asyncio.Event().wait()
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+
+class HttpClient:
+    """Plain HTTP/1.1 to a running server, one blocking connection per request on a thread pool."""
+
+    def __init__(self, url: str, headers: dict[str, str], concurrency: int):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.headers = {"Content-Type": "application/json", **headers}
+        self._threads = ThreadPoolExecutor(max_workers=concurrency + 1, thread_name_prefix="load")
+
+    def _send(self, method: str, path: str, body: bytes) -> tuple[int, bytes]:
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=600)
+        try:
+            conn.request(method, path, body=body or None, headers=self.headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> tuple[int, bytes]:
+        return await asyncio.get_running_loop().run_in_executor(self._threads, self._send, method, path, body)
+
+
+# ── one request per API ──────────────────────────────────────────────────
+
+
+async def _sync(client, body: bytes) -> tuple[int, int]:
+    status, content = await client.request("POST", "/generate-report", body)
+    return status, len(content)
+
+
+async def _job(client, body: bytes) -> tuple[int, int]:
+    status, content = await client.request("POST", "/jobs", body)
+    if status != 202:
+        return status, 0
+    job_id = json.loads(content)["id"]
+    while True:
+        await asyncio.sleep(0.2)
+        status, content = await client.request("GET", f"/jobs/{job_id}")
+        if status != 200:
+            return status, 0
+        state = json.loads(content)["status"]
+        if state == "failed":
+            return 500, 0
+        if state == "done":
+            status, content = await client.request("GET", f"/jobs/{job_id}/result")
+            return status, len(content)
+
+
+# ── memory ───────────────────────────────────────────────────────────────
+
+
+def _rss_tree(pid: int) -> int | None:
+    """Resident bytes of ``pid`` and all its descendants (the rendering workers), from /proc."""
+    parents: dict[int, list[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after its closing ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+
+    total, todo = 0, [pid]
+    page = os.sysconf("SC_PAGE_SIZE")
+    while todo:
+        current = todo.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page
+        except (OSError, IndexError, ValueError):
+            if current == pid:
+                return None
+        todo.extend(parents.get(current, ()))
+    return total
+
+
+async def _sample_memory(pid: int, interval: float, samples: list[tuple[float, int]], start: float) -> None:
+    while True:
+        rss = _rss_tree(pid)
+        if rss is not None:
+            samples.append((time.perf_counter() - start, rss))
+        await asyncio.sleep(interval)
+
+
+# ── report ───────────────────────────────────────────────────────────────
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def _latency_line(label: str, samples: list[Sample]) -> str:
+    ok = sorted(s.seconds for s in samples if 200 <= s.status < 300)
+    return (
+        f"  {label:<32} {len(samples):>6} {len(ok):>6}"
+        f" {_percentile(ok, 50) * 1000:>9.0f} {_percentile(ok, 95) * 1000:>9.0f}"
+        f" {_percentile(ok, 99) * 1000:>9.0f} {(ok[-1] if ok else 0) * 1000:>9.0f}"
+    )
+
+
+def _report(samples: list[Sample], elapsed: float, memory: list[tuple[float, int]], entries: list[MixEntry]) -> None:
+    statuses = Counter(s.status for s in samples)
+    total = len(samples)
+    ok = sum(n for status, n in statuses.items() if 200 <= status < 300)
+    errors = sum(n for status, n in statuses.items() if status == 0 or (status >= 500 and status != 503))
+    print(f"\n{total} requests in {elapsed:.1f} s — {ok / elapsed:.2f} documents/s, "
+          f"{sum(s.size for s in samples) / elapsed / 1e6:.2f} MB/s")
+    print(f"  ok {ok / total:.1%}   errors {errors / total:.1%}   "
+          f"429 {statuses[429] / total:.1%}   503 {statuses[503] / total:.1%}")
+    print("  status counts: " + ", ".join(f"{status or 'exception'}={n}" for status, n in sorted(statuses.items())))
+
+    print(f"\n  {'latency (ms, ok only)':<32} {'sent':>6} {'ok':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    print(_latency_line("all", samples))
+    for entry in entries:
+        print(_latency_line(entry.name, [s for s in samples if s.entry == entry.name]))
+
+    if memory:
+        first, peak, last = memory[0][1], max(rss for _, rss in memory), memory[-1][1]
+        print(f"\n  memory (service + workers): start {first / 2**20:.0f} MB, peak {peak / 2**20:.0f} MB, "
+              f"end {last / 2**20:.0f} MB, growth {(last - first) / 2**20:+.0f} MB")
+        step = max(1, len(memory) // 10)
+        print("  " + "  ".join(f"{t:5.0f}s {rss / 2**20:5.0f}MB" for t, rss in memory[::step]))
+
+
+# ── driver ───────────────────────────────────────────────────────────────
+
+
+async def _run(args, client, pid: int | None) -> None:
+    entries = _parse_mix(args.mix, args.seed)
+    weights = [e.weight for e in entries]
+    send = _job if args.api == "jobs" else _sync
+    rng = random.Random(args.seed)
+    samples: list[Sample] = []
+    memory: list[tuple[float, int]] = []
+    sent = 0
+    start = time.perf_counter()
+    deadline = start + args.duration if args.duration else None
+
+    def next_request() -> tuple[MixEntry, bytes] | None:
+        nonlocal sent
+        if args.requests and sent >= args.requests or deadline and time.perf_counter() >= deadline:
+            return None
+        sent += 1
+        entry = rng.choices(entries, weights)[0]
+        body = entry.bodies[sent % len(entry.bodies)]
+        return entry, body if args.cacheable else _retitle(body, sent)
+
+    async def user() -> None:
+        while (item := next_request()) is not None:
+            entry, body = item
+            began = time.perf_counter()
+            try:
+                status, size = await send(client, body)
+            except Exception:
+                status, size = 0, 0
+            samples.append(Sample(entry.name, began - start, time.perf_counter() - began, status, size))
+            if args.progress and len(samples) % args.progress == 0:
+                print(f"  {len(samples)} done, {time.perf_counter() - start:.0f} s", flush=True)
+
+    sampler = asyncio.create_task(_sample_memory(pid, args.sample_interval, memory, start)) if pid else None
+    try:
+        await asyncio.gather(*(user() for _ in range(args.concurrency)))
+    finally:
+        if sampler:
+            sampler.cancel()
+    _report(samples, time.perf_counter() - start, memory, entries)
+
+
+async def _in_process(args) -> None:
+    from app.main import app
+
+    client = AsgiClient(app, _auth_headers(args))
+    async with app.router.lifespan_context(app):
+        await _run(args, client, os.getpid())
+
+
+def _auth_headers(args) -> dict[str, str]:
+    secret = args.secret if args.secret is not None else settings.SERVICE_SECRET
+    return {"X-Service-Secret": secret} if secret else {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running service; in-process when omitted")
+    parser.add_argument("--pid", type=int, help="service process id to sample memory from (with --url)")
+    parser.add_argument("--secret", help="X-Service-Secret; defaults to DOC_SERVICE_SECRET")
+    parser.add_argument("--api", choices=("sync", "jobs"), default="sync")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="type:format:records[:weight],...")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests")
+    parser.add_argument("--duration", type=float, default=0, help="stop sending after this many seconds")
+    parser.add_argument("--cacheable", action="store_true", help="repeat identical bodies so the report cache can hit")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="seconds between memory samples")
+    parser.add_argument("--progress", type=int, default=0, help="print progress every N completed requests")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not args.requests and not args.duration:
+        args.requests = 200
+
+    if args.url:
+        asyncio.run(_run(args, HttpClient(args.url, _auth_headers(args), args.concurrency), args.pid))
+    else:
+        asyncio.run(_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Seeded synthetic ``ReportRequest`` payloads for every report type.
+
+The same ``(report_type, records, seed)`` always yields the same payload, so
+benchmark runs on different days and machines render identical documents.
+``records`` is the number of table rows; for ``ai-analysis`` it is the number
+of rows in the markdown tables, spread over sections of about 20 rows each.
+"""
+
+from __future__ import annotations
+
+import random
+
+from app.models.schemas import ReportFormat, ReportType, TemplateDesign
+
+_EVENTS = ("Corporate Gala", "Wedding Reception", "Product Launch", "Charity Dinner", "Conference Lunch", "Awards Night")
+_CLIENTS = ("Acme Corp", "Globex", "Initech", "Umbrella Events", "Stark Industries", "Wayne Foundation")
+_VENUES = ("Grand Hall", "Riverside Pavilion", "City Museum", "Harbour Hotel", "Rooftop Terrace")
+_ROLES = ("Server", "Bartender", "Chef", "Captain", "Runner", "Host")
+_STATUSES = ("present", "present", "present", "late", "absent", "left early")
+_FIRST = ("Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn")
+_LAST = ("Smith", "Garcia", "Chen", "Okafor", "Novak", "Silva", "Kim", "Müller", "Rossi", "Dubois")
+
+PERIOD = {"start": "2025-01-01", "end": "2025-03-31", "label": "Q1 2025"}
+
+
+def _name(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(_FIRST)} {rng.choice(_LAST)} {i}"
+
+
+def _time(hour: int, minute: int) -> str:
+    return f"{hour % 24:02d}:{minute:02d}"
+
+
+def _date(rng: random.Random) -> str:
+    return f"2025-{rng.randint(1, 3):02d}-{rng.randint(1, 28):02d}"
+
+
+def staff_shifts(rng: random.Random, n: int) -> tuple[list[dict], dict]:
+    records = []
+    for _ in range(n):
+        start = rng.randint(8, 18)
+        hours = rng.choice((4, 5.5, 6, 6.5, 8))
+        rate = rng.choice((18.0, 20.0, 22.5, 25.0, 30.0))
+        records.append({
+            "date": _date(rng),
+            "eventName": f"{rng.choice(_EVENTS)} {rng.randint(1, 300)}",
+            "clientName": rng.choice(_CLIENTS),
+            "venueName": rng.choice(_VENUES),
+            "role": rng.choice(_ROLES),
+            "clockIn": _time(start, rng.choice((0, 15, 30, 45))),
+            "clockOut": _time(start + int(hours), rng.choice((0, 15, 30, 45))),
+            "hoursWorked": hours,
+            "hourlyRate": rate,
+            "earnings": round(hours * rate, 2),
+        })
+    summary = {
+        "totalShifts": n,
+        "totalHours": sum(r["hoursWorked"] for r in records),
+        "totalEarnings": round(sum(r["earnings"] for r in records), 2),
+    }
+    return records, summary
+
+
+def payroll(rng: random.Random, n: int) -> tuple[list[dict], dict]:
+    records = []
+    for i in range(n):
+        shifts = rng.randint(1, 24)
+        hours = round(shifts * rng.uniform(4, 8), 2)
+        rate = rng.choice((18.0, 20.0, 22.5, 25.0, 30.0))
+        records.append({
+            "name": _name(rng, i),
+            "email": f"staff{i}@example.com",
+            "shifts": shifts,
+            "hours": hours,
+            "averageRate": rate,
+            "totalPay": round(hours * rate, 2),
+        })
+    summary = {
+        "staffCount": n,
+        "totalHours": round(sum(r["hours"] for r in records), 2),
+        "totalPayroll": round(sum(r["totalPay"] for r in records), 2),
+    }
+    return records, summary
+
+
+def attendance(rng: random.Random, n: int) -> tuple[list[dict], dict]:
+    records = []
+    for i in range(n):
+        start = rng.randint(8, 18)
+        status = rng.choice(_STATUSES)
+        worked = status != "absent"
+        records.append({
+            "date": _date(rng),
+            "eventName": f"{rng.choice(_EVENTS)} {rng.randint(1, 300)}",
+            "staffName": _name(rng, i % 500),
+            "role": rng.choice(_ROLES),
+            "scheduledStart": _time(start, 0),
+            "scheduledEnd": _time(start + 6, 0),
+            "clockIn": _time(start, rng.randint(0, 20)) if worked else "",
+            "clockOut": _time(start + 6, rng.randint(0, 30)) if worked else "",
+            "hoursWorked": round(rng.uniform(4, 7), 1) if worked else 0,
+            "status": status,
+        })
+    summary = {"totalRecords": n, "totalHours": round(sum(r["hoursWorked"] for r in records), 1)}
+    return records, summary
+
+
+def working_hours(rng: random.Random, n: int) -> tuple[list[dict], dict]:
+    records = []
+    for i in range(n):
+        start = rng.randint(14, 18)
+        records.append({
+            "name": _name(rng, i),
+            "role": rng.choice(_ROLES),
+            "phone": f"+1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+            "companyId": f"EMP-{rng.randint(10000, 99999)}",
+            "scheduledIn": _time(start, 0),
+            "scheduledOut": _time(start + 6, 0),
+            "clockIn": _time(start, rng.randint(0, 15)),
+            "clockOut": _time(start + 6, rng.randint(0, 30)),
+            "breakDuration": rng.choice(("0:15", "0:30", "0:45")),
+            "totalHours": round(rng.uniform(5, 6.5), 2),
+        })
+    summary = {
+        "client": rng.choice(_CLIENTS),
+        "eventName": rng.choice(_EVENTS),
+        "date": _date(rng),
+        "startTime": "16:00",
+        "endTime": "23:00",
+        "venue": rng.choice(_VENUES),
+        "notes": "Black tie. Staff entrance on the east side.",
+    }
+    return records, summary
+
+
+def ai_analysis(rng: random.Random, n: int) -> tuple[list[dict], dict]:
+    """One markdown document: a section with a paragraph, a list and a table per ~20 rows."""
+    parts = ["# Quarterly Staffing Analysis", "", "Key findings for the period, generated from event data.", ""]
+    for section in range(max(1, -(-n // 20))):
+        rows = min(20, n - section * 20) if n else 0
+        parts += [
+            f"## {rng.choice(_EVENTS)} series {section + 1}",
+            "",
+            f"Fulfillment reached **{rng.randint(80, 100)}%** with {rng.randint(5, 60)} staff across "
+            f"{rng.randint(2, 12)} events. Overtime was concentrated in *{rng.choice(_ROLES).lower()}* shifts.",
+            "",
+            f"- Average shift length: {rng.uniform(4, 8):.1f} hours",
+            f"- No-show rate: {rng.uniform(0, 6):.1f}%",
+            f"- Payroll variance: {rng.uniform(-5, 5):+.1f}% against budget",
+            "",
+        ]
+        if rows:
+            parts += ["| Staff | Role | Events | Hours | Pay |", "|---|---|---:|---:|---:|"]
+            for i in range(rows):
+                hours = rng.uniform(10, 60)
+                parts.append(
+                    f"| {_name(rng, section * 20 + i)} | {rng.choice(_ROLES)} | {rng.randint(1, 12)} "
+                    f"| {hours:.1f} | ${hours * rng.choice((18, 20, 22.5, 25)):,.2f} |"
+                )
+            parts.append("")
+    summary = {
+        "totalEvents": rng.randint(20, 200),
+        "totalStaffHours": rng.randint(1_000, 20_000),
+        "totalPayroll": round(rng.uniform(20_000, 400_000), 2),
+        "fulfillmentRate": rng.randint(85, 99),
+    }
+    return [{"content": "\n".join(parts)}], summary
+
+
+GENERATORS = {
+    ReportType.STAFF_SHIFTS: staff_shifts,
+    ReportType.PAYROLL: payroll,
+    ReportType.ATTENDANCE: attendance,
+    ReportType.WORKING_HOURS: working_hours,
+    ReportType.AI_ANALYSIS: ai_analysis,
+}
+
+_TITLES = {
+    ReportType.STAFF_SHIFTS: "Shift History",
+    ReportType.PAYROLL: "Payroll Summary",
+    ReportType.ATTENDANCE: "Attendance Report",
+    ReportType.WORKING_HOURS: "Working Hours Sheet",
+    ReportType.AI_ANALYSIS: "Staffing Analysis",
+}
+
+
+def payload(
+    report_type: ReportType, report_format: ReportFormat, design: TemplateDesign, records: int, seed: int = 0
+) -> dict:
+    """A ``ReportRequest`` body; the records depend only on type, count and seed."""
+    rng = random.Random(f"{seed}:{report_type.value}:{records}")
+    rows, summary = GENERATORS[report_type](rng, records)
+    return {
+        "report_type": report_type.value,
+        "report_format": report_format.value,
+        "title": _TITLES[report_type],
+        "period": PERIOD,
+        "records": rows,
+        "summary": summary,
+        "company_name": "Benchmark Events Co.",
+        "template_design": design.value,
+    }
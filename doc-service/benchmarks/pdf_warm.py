@@ -0,0 +1,67 @@
+"""Fixed per-report latency of WeasyPrint PDFs: cold renderer vs the warm shared one.
+
+"Cold" builds a fresh ``WeasyRenderer`` for every report, which re-parses the
+design stylesheet and rebuilds the font configuration the way every call did
+before stylesheets moved out of the templates. "Warm" reuses ``pdf_service.weasy``
+after its boot-time warm-up.
+
+Usage (from doc-service/):
+
+    python -m benchmarks.pdf_warm --rows 20 --repeat 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from io import BytesIO
+
+from app.models.schemas import ReportRequest, TemplateDesign
+from app.services import pdf_service
+
+
+def _request(rows: int, design: TemplateDesign) -> ReportRequest:
+    return ReportRequest(
+        report_type="payroll",
+        report_format="pdf",
+        pdf_engine="weasyprint",
+        title="Payroll",
+        period={"start": "2025-01-01", "end": "2025-01-31", "label": "January 2025"},
+        records=[
+            {"name": f"Staff Member {i}", "email": f"staff{i}@example.com", "shifts": 4,
+             "hours": 28.5, "averageRate": 21.0, "totalPay": 598.5}
+            for i in range(rows)
+        ],
+        summary={"staffCount": rows, "totalHours": 28.5 * rows, "totalPayroll": 598.5 * rows},
+        template_design=design,
+    )
+
+
+def _time(renderer_for, req: ReportRequest, repeat: int) -> float:
+    """Median seconds for one ``report.html`` render."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        renderer_for().write_pdf("report", pdf_service._table_context(req), BytesIO())
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    pdf_service.weasy.warm_up()
+    print(f"rows={args.rows} (median of {args.repeat})")
+    for design in TemplateDesign:
+        req = _request(args.rows, design)
+        cold = _time(pdf_service.WeasyRenderer, req, args.repeat)
+        warm = _time(lambda: pdf_service.weasy, req, args.repeat)
+        print(f"  {design.value:<10} cold {cold * 1000:8.1f} ms   warm {warm * 1000:8.1f} ms   saved {(cold - warm) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
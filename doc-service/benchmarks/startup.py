@@ -0,0 +1,97 @@
+"""Cold-start benchmark: API process import and rendering worker start-up.
+
+Each measurement runs in a fresh interpreter, so nothing is already imported:
+
+* ``import app.main`` — wall time, peak RSS and which engine libraries it
+  pulled in (the API process should load none of them);
+* a rendering worker's initializer (``renderer.warm_up``) under each
+  ``DOC_PRELOAD_FORMATS`` value, then its first render of every format —
+  the first-report latency that preloading trades against start-up time.
+
+Usage (from doc-service/):
+
+    python -m benchmarks.startup --repeat 5 --preload "" pdf all
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY = ("weasyprint", "reportlab", "docx", "xlsxwriter", "pandas", "pypdf", "numpy", "markdown")
+
+_IMPORT = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+"""
+
+_WORKER = """
+import json, os, resource, time
+from app.config import settings
+from app.models.schemas import ReportFormat, ReportRequest, ReportType, TemplateDesign
+from benchmarks import payloads
+os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+start = time.perf_counter()
+from app.services import renderer
+renderer.warm_up()
+result = {"seconds": time.perf_counter() - start}
+result["start_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+for report_format in ReportFormat:
+    body = payloads.payload(ReportType.PAYROLL, report_format, TemplateDesign.CLASSIC, 10)
+    req = ReportRequest.model_validate(body)
+    start = time.perf_counter()
+    report = renderer.render(req)
+    result[report_format.value] = time.perf_counter() - start
+    if report.path:
+        os.remove(report.path)
+result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(result))
+"""
+
+
+def _run(code: str, env: dict | None = None) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", code], env={**os.environ, **(env or {})}, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _median(runs: list[dict], key: str) -> float:
+    return statistics.median(r[key] for r in runs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--preload", nargs="+", default=["", "pdf", "all"], help='DOC_PRELOAD_FORMATS values ("" for none)'
+    )
+    args = parser.parse_args()
+
+    runs = [_run(_IMPORT % (HEAVY,)) for _ in range(args.repeat)]
+    print(f"import app.main: {_median(runs, 'seconds') * 1000:.0f} ms, {_median(runs, 'peak_rss_mb'):.0f} MB")
+    print(f"  engine libraries loaded: {', '.join(runs[-1]['loaded']) or 'none'}")
+
+    formats = ("pdf", "docx", "xlsx", "csv")
+    print(f"\n  {'preload':<10} {'start':>9} {'rss':>7}  " + "".join(f"{'first ' + f:>12}" for f in formats) + f"{'peak':>8}")
+    for preload in args.preload:
+        runs = [_run(_WORKER, {"DOC_PRELOAD_FORMATS": preload}) for _ in range(args.repeat)]
+        firsts = "".join(f"{_median(runs, f) * 1000:9.0f} ms" for f in formats)
+        print(
+            f"  {preload or 'none':<10} {_median(runs, 'seconds') * 1000:6.0f} ms "
+            f"{_median(runs, 'start_rss_mb'):4.0f} MB  {firsts}{_median(runs, 'peak_rss_mb'):5.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Render benchmark matrix: report type × format × template design × record count.
+
+Every cell renders a seeded payload from ``benchmarks.payloads`` through
+``renderer.render``, the call the rendering workers make (AUTO PDF engine
+choice included), in a fresh process. Per cell it records:
+
+* the median wall time of ``--repeat`` renders, after one small untimed
+  render of the same type, format and design has warmed the engine up;
+* the peak RSS of that process — imports, payload and renders included;
+* the output size, and the stage split of the last render (``app.timing``).
+
+CSV ignores the template design, so it only runs with ``classic``. XLSX and
+CSV exist for the table reports only, so working-hours and ai-analysis skip
+them. The full default matrix takes a long time at 100k records; narrow it
+with ``--types``, ``--formats``, ``--designs`` and ``--sizes``.
+
+A run can be saved as a baseline, thresholds included, and later runs checked
+against it:
+
+    python -m benchmarks.suite --sizes 10 1000 --save benchmarks/baseline.json
+    python -m benchmarks.suite --sizes 10 1000 --compare benchmarks/baseline.json
+
+``--compare`` exits with status 1 when any cell is slower than its baseline by
+more than the time ratio (and by more than ``min_time_delta`` seconds, so tiny
+cells don't fail on noise), or its peak RSS or output size grew past their
+ratios. Baselines are only meaningful on the machine that took them; the file
+records the host and library versions, and a mismatch is reported.
+
+Usage (from doc-service/):
+
+    python -m benchmarks.suite --formats pdf docx xlsx --sizes 10 100 1000 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+
+from app.models.schemas import ReportFormat, ReportRequest, ReportType, TemplateDesign
+from app.services.columns import TABLE_KEYS
+from benchmarks import payloads
+
+SIZES = (10, 100, 1_000, 10_000, 100_000)
+
+THRESHOLDS = {
+    # A cell regresses when it is this many times slower than its baseline...
+    "time_ratio": 1.25,
+    # ...and slower by at least this many seconds
+    "min_time_delta": 0.02,
+    "rss_ratio": 1.20,
+    "size_ratio": 1.10,
+}
+
+_LIBRARIES = ("weasyprint", "reportlab", "python-docx", "XlsxWriter", "pandas", "numpy", "Jinja2", "markdown")
+
+
+def _key(report_type: ReportType, report_format: ReportFormat, design: TemplateDesign, records: int) -> str:
+    return f"{report_type.value}/{report_format.value}/{design.value}/{records}"
+
+
+def _cells(args) -> list[tuple[ReportType, ReportFormat, TemplateDesign, int]]:
+    cells = []
+    for report_type in args.types:
+        for report_format in args.formats:
+            if report_format in (ReportFormat.XLSX, ReportFormat.CSV) and report_type not in TABLE_KEYS:
+                continue
+            designs = [TemplateDesign.CLASSIC] if report_format == ReportFormat.CSV else args.designs
+            for design in designs:
+                for records in args.sizes:
+                    cells.append((report_type, report_format, design, records))
+    return cells
+
+
+def _measure(
+    report_type: ReportType, report_format: ReportFormat, design: TemplateDesign, records: int, repeat: int, seed: int
+) -> dict:
+    """One cell, run in its own process so ``ru_maxrss`` is this cell's peak."""
+    from app.config import settings
+    from app.services import renderer
+
+    os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+    renderer.warm_up()
+    warm = ReportRequest.model_validate(payloads.payload(report_type, report_format, design, 10, seed))
+    _discard(renderer.render(warm))
+
+    req = ReportRequest.model_validate(payloads.payload(report_type, report_format, design, records, seed))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        report = renderer.render(req)
+        samples.append(time.perf_counter() - start)
+        _discard(report)
+    return {
+        "seconds": round(statistics.median(samples), 4),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "bytes": report.size,
+        "engine": renderer.engine_name(req),
+        "stages": {name: round(seconds, 4) for name, seconds in report.stages.items()},
+    }
+
+
+def _discard(report) -> None:
+    if report.path:
+        os.remove(report.path)
+
+
+def _machine() -> dict:
+    versions = {}
+    for name in _LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "libraries": versions,
+    }
+
+
+def _regressions(result: dict, base: dict, thresholds: dict) -> list[str]:
+    problems = []
+    slower = result["seconds"] - base["seconds"]
+    if result["seconds"] > base["seconds"] * thresholds["time_ratio"] and slower > thresholds["min_time_delta"]:
+        problems.append(f"time {base['seconds'] * 1000:.1f} -> {result['seconds'] * 1000:.1f} ms")
+    if result["peak_rss_mb"] > base["peak_rss_mb"] * thresholds["rss_ratio"]:
+        problems.append(f"rss {base['peak_rss_mb']:.0f} -> {result['peak_rss_mb']:.0f} MB")
+    if result["bytes"] > base["bytes"] * thresholds["size_ratio"]:
+        problems.append(f"size {base['bytes']} -> {result['bytes']} bytes")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--types", nargs="+", type=ReportType, default=list(ReportType))
+    parser.add_argument("--formats", nargs="+", type=ReportFormat, default=list(ReportFormat))
+    parser.add_argument("--designs", nargs="+", type=TemplateDesign, default=list(TemplateDesign))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="check the results against a saved baseline")
+    for name, default in THRESHOLDS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, help=f"override the threshold (default {default})")
+    args = parser.parse_args()
+
+    baseline = None
+    thresholds = dict(THRESHOLDS)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        thresholds.update(baseline.get("thresholds", {}))
+        if baseline.get("machine") != _machine():
+            print(f"warning: {args.compare} was recorded on a different host or library set", file=sys.stderr)
+    thresholds.update({name: getattr(args, name) for name in THRESHOLDS if getattr(args, name) is not None})
+
+    cells = _cells(args)
+    results = {}
+    failed = []
+    spawn = multiprocessing.get_context("spawn")
+    print(f"{len(cells)} cells, median of {args.repeat}, seed {args.seed}")
+    print(f"  {'cell':<38} {'engine':<17} {'time':>10} {'peak rss':>10} {'output':>11}")
+    for cell in cells:
+        key = _key(*cell)
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            result = pool.submit(_measure, *cell, args.repeat, args.seed).result()
+        results[key] = result
+        line = (
+            f"  {key:<38} {result['engine']:<17} {result['seconds'] * 1000:7.1f} ms "
+            f"{result['peak_rss_mb']:7.1f} MB {result['bytes'] / 1024:8.1f} KiB"
+        )
+        base = baseline["cells"].get(key) if baseline else None
+        if base:
+            line += f"   x{result['seconds'] / base['seconds']:.2f}" if base["seconds"] else ""
+            problems = _regressions(result, base, thresholds)
+            if problems:
+                failed.append(key)
+                line += "   REGRESSED: " + "; ".join(problems)
+        print(line, flush=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "machine": _machine(),
+                    "seed": args.seed,
+                    "repeat": args.repeat,
+                    "thresholds": thresholds,
+                    "cells": results,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        print(f"baseline written to {args.save}")
+    if baseline is not None:
+        missing = len([k for k in results if k not in baseline["cells"]])
+        print(f"{len(failed)} regressed, {len(results) - len(failed) - missing} within thresholds, {missing} not in baseline")
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.cache import ReportCache
+from app.executor import RenderExecutor
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    """A thread executor in place of the service's process pool."""
+    executor = RenderExecutor("thread", workers=2, max_queue=4)
+    monkeypatch.setattr(main, "executor", executor)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def client(executor, monkeypatch, tmp_path):
+    """The app without its lifespan, rendering on ``executor`` with no report cache."""
+    monkeypatch.setattr(main, "report_cache", ReportCache(max_bytes=0, ttl=0))
+    monkeypatch.setattr(main.settings, "OUTPUT_DIR", str(tmp_path))
+    return TestClient(main.app, headers={"X-Service-Secret": main.settings.SERVICE_SECRET})
@@ -0,0 +1,151 @@
+"""Rows and totals computed from raw shift records (``app.services.aggregate``)."""
+
+from __future__ import annotations
+
+import os
+import zipfile
+from io import BytesIO
+
+import pytest
+from docx import Document
+from jinja2 import Environment, FileSystemLoader
+from pypdf import PdfReader
+
+from app.models.schemas import ReportRequest
+from app.services import aggregate, excel_service, report_context, reportlab_service, word_service
+
+_SHIFTS = [
+    {"date": "2025-01-01", "eventName": "Gala", "staffName": "Ana", "hoursWorked": 4, "status": "present"},
+    {"date": "2025-01-01", "eventName": "Gala", "staffName": "Ana", "hoursWorked": 2, "status": "late"},
+    {"date": "2025-01-01", "eventName": "Gala", "staffName": "Ben", "hoursWorked": 5, "status": "present"},
+    {"date": "2025-01-02", "eventName": "Gala", "staffName": "Ben", "hoursWorked": 3.5, "status": "no-show"},
+    {"date": "2025-01-01", "eventName": "Expo", "staffName": "Cy", "hoursWorked": 8},
+]
+
+
+def _attendance(report_format: str) -> ReportRequest:
+    req = ReportRequest.model_validate(
+        {
+            "report_type": "attendance",
+            "report_format": report_format,
+            "record_source": "shifts",
+            "title": "Attendance",
+            "period": {"start": "2025-01-01", "end": "2025-01-31", "label": "January 2025"},
+            "records": _SHIFTS,
+        }
+    )
+    return aggregate.resolve(req)
+
+
+def test_attendance_groups_by_event_and_date():
+    summary = _attendance("csv").summary
+    assert summary["totalRecords"] == 5
+    assert summary["totalHours"] == 22.5
+    assert summary["totalEvents"] == 3
+    assert summary["statusCounts"] == {"present": 2, "late": 1, "no-show": 1, "unknown": 1}
+    assert summary["events"][0] == {
+        "eventName": "Gala",
+        "date": "2025-01-01",
+        "staffCount": 2,
+        "totalHours": 11,
+        "statuses": {"present": 2, "late": 1, "no-show": 0, "unknown": 0},
+    }
+    assert [(e["eventName"], e["date"], e["staffCount"]) for e in summary["events"][1:]] == [
+        ("Gala", "2025-01-02", 1),
+        ("Expo", "2025-01-01", 1),
+    ]
+
+
+def test_caller_summary_wins():
+    req = ReportRequest.model_validate(
+        {
+            "report_type": "attendance",
+            "report_format": "csv",
+            "record_source": "shifts",
+            "title": "Attendance",
+            "period": {"start": "a", "end": "b", "label": "c"},
+            "records": _SHIFTS,
+            "summary": {"totalHours": 20},
+        }
+    )
+    summary = aggregate.resolve(req).summary
+    assert summary["totalHours"] == 20
+    assert summary["totalEvents"] == 3
+
+
+def test_non_text_names_and_emails():
+    shifts = [
+        {"date": "2025-01-01", "eventName": "Gala", "staffName": 1042, "email": None, "hoursWorked": 4},
+        {"date": "2025-01-01", "eventName": "Gala", "staffName": None, "email": 7, "hoursWorked": 2},
+        {"date": 20250102, "eventName": 5, "staffName": "Ben", "email": "ben@example.com", "hoursWorked": 3},
+    ]
+    req = ReportRequest.model_validate(
+        {
+            "report_type": "attendance",
+            "report_format": "csv",
+            "record_source": "shifts",
+            "title": "Attendance",
+            "period": {"start": "a", "end": "b", "label": "c"},
+            "records": shifts,
+        }
+    )
+    resolved = aggregate.resolve(req)
+    assert resolved.records.column("staffName") == ["1042", "Unknown", "Ben"]
+    assert [(e["eventName"], e["date"], e["staffCount"]) for e in resolved.summary["events"]] == [
+        ("Gala", "2025-01-01", 2),
+        ("5", "20250102", 1),
+    ]
+
+
+def test_event_breakdown_in_pdf_html():
+    req = _attendance("pdf")
+    ctx = report_context.CONTEXT_BUILDERS[req.report_type](req)
+    env = Environment(loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), "..", "app", "templates")))
+    html = env.get_template("report.html").render(**ctx)
+    assert "By Event" in html
+    assert {"label": "Events", "value": 3} in ctx["summary_items"]
+    assert ctx["events"]["rows"][0] == ["Gala", "2025-01-01", 2, 11, 2, 1, 0, 0]
+
+
+def _pdf_text(data: bytes) -> str:
+    return "\n".join(page.extract_text() for page in PdfReader(BytesIO(data)).pages)
+
+
+def test_event_breakdown_in_reportlab_pdf():
+    out = BytesIO()
+    reportlab_service.create_report(_attendance("pdf"), out)
+    text = _pdf_text(out.getvalue()).lower()
+    assert "by event" in text
+    assert "no-show" in text and "expo" in text
+
+
+def test_event_breakdown_in_weasyprint_pdf():
+    try:
+        from app.services import pdf_service
+    except (ImportError, OSError) as exc:
+        # WeasyPrint needs Pango and friends from the system
+        pytest.skip(f"WeasyPrint unavailable: {exc}")
+    out = BytesIO()
+    pdf_service.create_report(_attendance("pdf"), out)
+    text = _pdf_text(out.getvalue()).lower()
+    assert "by event" in text
+    assert "no-show" in text and "expo" in text
+
+
+def test_event_breakdown_in_docx():
+    out = BytesIO()
+    word_service.create_report(_attendance("docx"), out)
+    table = Document(BytesIO(out.getvalue())).tables[-1]
+    rows = [[c.text for c in row.cells] for row in table.rows]
+    assert rows[0] == ["Event", "Date", "Staff", "Hours", "Present", "Late", "No-Show", "Unknown"]
+    assert rows[2] == ["Gala", "2025-01-02", "1", "3.5", "0", "0", "1", "0"]
+
+
+def test_event_breakdown_in_xlsx():
+    out = BytesIO()
+    excel_service.create_report(_attendance("xlsx"), out)
+    with zipfile.ZipFile(BytesIO(out.getvalue())) as xlsx:
+        workbook = xlsx.read("xl/workbook.xml").decode()
+        strings = xlsx.read("xl/sharedStrings.xml").decode()
+    assert 'name="By Event"' in workbook
+    assert "<t>No-Show</t>" in strings and "<t>Expo</t>" in strings
@@ -0,0 +1,197 @@
+"""Remote asset fetching (``app.services.assets``) against a local HTTP server."""
+
+from __future__ import annotations
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.assets import AssetFetcher
+
+_LOGO = b"\x89PNG logo"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves a few fixed paths and records every request it gets."""
+
+    requests: list[tuple[str, dict]] = []
+    # Answer every request with this status instead, when set
+    failing: int | None = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append((self.path, dict(self.headers)))
+        if self.failing:
+            self.send_response(self.failing)
+            self.end_headers()
+        elif self.path == "/logo.png":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self._send(_LOGO, ETag='"v1"')
+        elif self.path == "/dated.png":
+            if self.headers.get("If-Modified-Since") == "Wed, 01 Jan 2025 00:00:00 GMT":
+                self.send_response(304)
+                self.end_headers()
+                return
+            self._send(_LOGO, **{"Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"})
+        elif self.path == "/slow.png":
+            time.sleep(1)
+            self._send(_LOGO)
+        elif self.path == "/big.png":
+            self._send(b"x" * 2000)
+        elif self.path == "/big-unsized.png":
+            # No Content-Length: the cap has to hold while reading the body
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"x" * 2000)
+        elif self.path == "/moved":
+            self.send_response(302)
+            self.send_header("Location", "/logo.png")
+            self.end_headers()
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def _send(self, body: bytes, **headers):
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png; charset=binary")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    _Handler.requests = []
+    _Handler.failing = None
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _requests_to(path: str) -> list[dict]:
+    return [headers for p, headers in _Handler.requests if p == path]
+
+
+def test_fetch_and_cache(server):
+    fetcher = AssetFetcher()
+    asset = fetcher.fetch(f"{server}/logo.png")
+    assert asset.content == _LOGO
+    assert asset.content_type == "image/png"
+    assert asset.etag == '"v1"'
+    assert fetcher.fetch(f"{server}/logo.png") is asset
+    assert len(_requests_to("/logo.png")) == 1
+
+
+def test_stale_entry_revalidated_with_etag(server):
+    fetcher = AssetFetcher(ttl=0.1)
+    first = fetcher.fetch(f"{server}/logo.png")
+    time.sleep(0.15)
+    again = fetcher.fetch(f"{server}/logo.png")
+    assert again is first
+    assert again.content == _LOGO
+    requests = _requests_to("/logo.png")
+    assert len(requests) == 2
+    assert requests[1]["If-None-Match"] == '"v1"'
+    # The 304 restarted the TTL
+    assert fetcher.fetch(f"{server}/logo.png") is first
+    assert len(_requests_to("/logo.png")) == 2
+
+
+def test_stale_entry_revalidated_with_last_modified(server):
+    fetcher = AssetFetcher(ttl=0)
+    first = fetcher.fetch(f"{server}/dated.png")
+    assert fetcher.fetch(f"{server}/dated.png") is first
+    assert _requests_to("/dated.png")[1]["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+def test_read_timeout(server):
+    fetcher = AssetFetcher(read_timeout=0.2)
+    started = time.monotonic()
+    assert fetcher.fetch(f"{server}/slow.png") is None
+    assert time.monotonic() - started < 0.9
+
+
+def test_connect_refused():
+    fetcher = AssetFetcher()
+    # Port 9 (discard) is not listening on the loopback interface here
+    assert fetcher.fetch("http://127.0.0.1:9/logo.png") is None
+
+
+@pytest.mark.parametrize("path", ["/big.png", "/big-unsized.png"])
+def test_size_cap(server, path):
+    fetcher = AssetFetcher(max_bytes=1000)
+    assert fetcher.fetch(f"{server}{path}") is None
+    assert AssetFetcher(max_bytes=2000).fetch(f"{server}{path}").content == b"x" * 2000
+
+
+def test_failures_are_remembered(server):
+    fetcher = AssetFetcher(negative_ttl=0.2)
+    assert fetcher.fetch(f"{server}/missing.png") is None
+    assert fetcher.fetch(f"{server}/missing.png") is None
+    assert len(_requests_to("/missing.png")) == 1
+    time.sleep(0.25)
+    assert fetcher.fetch(f"{server}/missing.png") is None
+    assert len(_requests_to("/missing.png")) == 2
+
+
+def test_failed_revalidation_serves_stale_copy(server):
+    fetcher = AssetFetcher(ttl=0, negative_ttl=60)
+    url = f"{server}/logo.png"
+    first = fetcher.fetch(url)
+    _Handler.failing = 503
+    assert fetcher.fetch(url) is first
+    # Remembered as failed, so the server is not asked again yet
+    _Handler.failing = None
+    assert fetcher.fetch(url) is first
+    assert len(_requests_to("/logo.png")) == 2
+
+
+def test_revalidation_timeout_serves_stale_copy(server):
+    fetcher = AssetFetcher(ttl=0, negative_ttl=0, read_timeout=0.2)
+    first = fetcher.fetch(f"{server}/logo.png")
+    fetcher._cache[f"{server}/slow.png"] = first
+    assert fetcher.fetch(f"{server}/slow.png") is first
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_gone_asset_dropped(server, status):
+    fetcher = AssetFetcher(ttl=0, negative_ttl=60)
+    url = f"{server}/logo.png"
+    assert fetcher.fetch(url) is not None
+    _Handler.failing = status
+    assert fetcher.fetch(url) is None
+    _Handler.failing = None
+    assert fetcher.fetch(url) is None
+    assert len(_requests_to("/logo.png")) == 2
+
+
+def test_redirect_followed(server):
+    asset = AssetFetcher().fetch(f"{server}/moved")
+    assert asset.content == _LOGO
+    assert [p for p, _ in _Handler.requests] == ["/moved", "/logo.png"]
+
+
+def test_unsupported_scheme():
+    assert AssetFetcher().fetch("ftp://example.com/logo.png") is None
+
+
+def test_lru_eviction(server):
+    fetcher = AssetFetcher(max_entries=1)
+    fetcher.fetch(f"{server}/logo.png")
+    fetcher.fetch(f"{server}/dated.png")
+    fetcher.fetch(f"{server}/logo.png")
+    assert len(_requests_to("/logo.png")) == 2
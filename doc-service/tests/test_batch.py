@@ -0,0 +1,66 @@
+"""Batch endpoint ``/generate-reports``: the streamed ZIP and its manifest."""
+
+from __future__ import annotations
+
+import io
+import json
+import threading
+import zipfile
+
+from app.config import settings
+
+_PERIOD = {"start": "a", "end": "b", "label": "March"}
+_PAYROLL = {
+    "report_type": "payroll",
+    "title": "Payroll",
+    "period": _PERIOD,
+    "records": [{"name": "Ana", "email": "ana@x", "shifts": 2, "hours": 3, "totalPay": 12}],
+}
+
+
+def _zip(response) -> tuple[zipfile.ZipFile, list[dict]]:
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    return archive, json.loads(archive.read("manifest.json"))["reports"]
+
+
+def test_zip_and_manifest(client):
+    items = [
+        {**_PAYROLL, "report_format": "csv"},
+        {**_PAYROLL, "report_format": "docx"},
+        {"report_type": "payroll", "report_format": "csv"},
+        {**_PAYROLL, "report_format": "csv", "report_formats": ["csv", "xlsx"]},
+    ]
+    archive, manifest = _zip(client.post("/generate-reports", json={"reports": items}))
+
+    assert [e["index"] for e in manifest] == [0, 1, 2, 3]
+    assert [e["status"] for e in manifest] == ["ok", "ok", "error", "error"]
+    assert manifest[0]["filename"] == "0000_payroll.csv"
+    assert manifest[1]["filename"] == "0001_payroll.docx"
+    assert "title" in manifest[2]["error"]
+    assert "report_formats" in manifest[3]["error"]
+    assert sorted(archive.namelist()) == ["0000_payroll.csv", "0001_payroll.docx", "manifest.json"]
+    csv = archive.read("0000_payroll.csv").decode()
+    assert "Ana" in csv
+    assert manifest[0]["size"] == len(archive.read("0000_payroll.csv"))
+
+
+def test_waits_for_a_full_queue(client, executor):
+    # Every worker and queue slot taken by other requests until the timer frees them
+    executor.max_queue = 0
+    executor._pending = executor.workers
+    timer = threading.Timer(0.3, setattr, (executor, "_pending", 0))
+    timer.start()
+    response = client.post("/generate-reports", json={"reports": [{**_PAYROLL, "report_format": "csv"}]})
+    archive, manifest = _zip(response)
+    timer.join()
+    assert manifest[0]["status"] == "ok"
+    assert "0000_payroll.csv" in archive.namelist()
+
+
+def test_empty_and_oversized_batches(client, monkeypatch):
+    assert client.post("/generate-reports", json={"reports": []}).status_code == 422
+    monkeypatch.setattr(settings, "BATCH_MAX_REPORTS", 1)
+    response = client.post("/generate-reports", json={"reports": [_PAYROLL, _PAYROLL]})
+    assert response.status_code == 413
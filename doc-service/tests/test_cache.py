@@ -0,0 +1,86 @@
+"""Report cache keys and tiers (``app.cache``)."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+from app.cache import ReportCache, cache_key
+from app.models.schemas import ReportRequest
+
+
+def _request(**fields) -> ReportRequest:
+    body = {
+        "report_type": "payroll",
+        "report_format": "csv",
+        "title": "Payroll",
+        "period": {"start": "a", "end": "b", "label": "c"},
+        "records": [{"name": "Ana", "totalPay": 10}],
+        **fields,
+    }
+    return ReportRequest.model_validate(body)
+
+
+def test_key_ignores_key_order():
+    reordered = _request(
+        records=[{"totalPay": 10, "name": "Ana"}],
+        period={"label": "c", "end": "b", "start": "a"},
+    )
+    assert cache_key(reordered) == cache_key(_request())
+    assert cache_key(_request(records=[{"name": "Ana", "totalPay": 11}])) != cache_key(_request())
+    assert cache_key(_request(report_format="xlsx")) != cache_key(_request())
+
+
+def test_memory_hit_and_miss():
+    async def run():
+        cache = ReportCache(max_bytes=100, ttl=60)
+        assert await cache.get("a") is None
+        cache.put("a", b"report")
+        assert await cache.get("a") == b"report"
+        # Past the byte limit the least recently used entry goes
+        cache.put("b", b"x" * 60)
+        cache.put("c", b"y" * 60)
+        assert await cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+
+    asyncio.run(run())
+
+
+def test_memory_entries_expire():
+    async def run():
+        cache = ReportCache(max_bytes=100, ttl=0.1)
+        cache.put("a", b"report")
+        await asyncio.sleep(0.15)
+        assert await cache.get("a") is None
+
+    asyncio.run(run())
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    async def run():
+        cache = ReportCache(max_bytes=0, ttl=60, disk_dir=str(tmp_path), disk_max_bytes=1000)
+        cache.put("a", b"report")
+        assert os.listdir(tmp_path) == ["a"]
+
+        restarted = ReportCache(max_bytes=100, ttl=60, disk_dir=str(tmp_path), disk_max_bytes=1000)
+        assert restarted.stats()["disk_entries"] == 1
+        assert await restarted.get("a") == b"report"
+        # Promoted to the memory tier
+        assert restarted.stats()["memory_entries"] == 1
+
+    asyncio.run(run())
+
+
+def test_expired_disk_entry_removed(tmp_path):
+    async def run():
+        cache = ReportCache(max_bytes=0, ttl=60, disk_dir=str(tmp_path), disk_max_bytes=1000)
+        cache.put("a", b"report")
+        old = time.time() - 120
+        os.utime(tmp_path / "a", (old, old))
+        assert await cache.get("a") is None
+        assert os.listdir(tmp_path) == []
+        assert cache.stats()["disk_bytes"] == 0
+
+    asyncio.run(run())
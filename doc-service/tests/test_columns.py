@@ -0,0 +1,61 @@
+"""Column formatting in ``app.services.columns``."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.services.columns import format_column, money, number
+from app.services.word_service import _one_decimal
+
+# Hours and rates as the backend's JSON sends them: whole values as ints
+_RATES = [15, 18.5, 22.75, 1234.5, 0, 18.5, 15, 15]
+_HOURS = [8, 7.5, 8, 4.25, 8, 12, 7.5, 0]
+
+
+def _repeated(values: list, n: int = 200) -> list:
+    return [values[i % len(values)] for i in range(n)]
+
+
+@pytest.mark.parametrize(
+    "values", [_repeated(_RATES), [i * 1.37 for i in range(200)], [1e7 / 3]], ids=["repeated", "unique", "single"]
+)
+def test_money_matches_per_cell_formatting(values):
+    column = np.array(values, dtype=np.float64)
+    assert format_column(column, money) == [f"${v:,.2f}" for v in values]
+
+
+@pytest.mark.parametrize(
+    "values", [_repeated(_HOURS), [i // 4 if i % 4 == 0 else i / 4 for i in range(200)]], ids=["repeated", "unique"]
+)
+def test_number_matches_json_values(values):
+    column = np.array(values, dtype=np.float64)
+    assert format_column(column, number) == [str(v) for v in values]
+
+
+def test_attendance_hours_match_rounded_cells():
+    values = _repeated([8, 7.46, 4.24, 12, 0.05, 2.25])
+    column = np.array(values, dtype=np.float64)
+    assert format_column(column, _one_decimal) == [str(round(v, 1)) for v in values]
+
+
+def test_int_and_text_columns():
+    shifts = _repeated([1, 2, 3, 10])
+    assert format_column(np.array(shifts, dtype=np.int64), str) == [str(v) for v in shifts]
+    names = _repeated(["Ana", "Ben", "Cy"])
+    assert format_column(np.array(names, dtype=object), str) == names
+
+
+def test_formats_each_distinct_value_once():
+    calls = []
+
+    def fmt(value):
+        calls.append(value)
+        return money(value)
+
+    format_column(np.array(_repeated(_RATES), dtype=np.float64), fmt)
+    assert sorted(calls) == sorted(set(map(float, _RATES)))
+
+
+def test_empty_column():
+    assert format_column(np.array([], dtype=np.float64), money) == []
@@ -0,0 +1,57 @@
+"""Large CSV reports sent while they render (``settings.STREAM_MIN_RECORDS``)."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from app import main
+
+_REQUEST = {
+    "report_type": "payroll",
+    "report_format": "csv",
+    "title": "Payroll",
+    "period": {"start": "a", "end": "b", "label": "March"},
+    "records": [
+        {"name": f"Staff {i}", "email": f"s{i}@x", "shifts": i % 5, "hours": i * 1.5, "totalPay": i * 27.75}
+        for i in range(500)
+    ],
+}
+
+
+@pytest.fixture
+def buffered(client, monkeypatch):
+    """The report rendered whole, with streaming turned off."""
+    monkeypatch.setattr(main.settings, "STREAM_MIN_RECORDS", 0)
+    response = client.post("/generate-report", json=_REQUEST)
+    assert response.headers["x-cache"] == "MISS"
+    return response.content
+
+
+def test_streamed_csv_matches_buffered(client, buffered, monkeypatch, tmp_path):
+    monkeypatch.setattr(main.settings, "STREAM_MIN_RECORDS", 100)
+    response = client.post("/generate-report", json=_REQUEST)
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "BYPASS"
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].endswith('.csv"')
+    assert "content-length" not in response.headers
+    assert response.content == buffered
+    assert response.content.startswith(b"\xef\xbb\xbfStaff Name,")
+    # The file the worker wrote into is gone once the body is sent
+    assert os.listdir(tmp_path) == []
+
+
+def test_below_threshold_not_streamed(client, monkeypatch):
+    monkeypatch.setattr(main.settings, "STREAM_MIN_RECORDS", len(_REQUEST["records"]) + 1)
+    response = client.post("/generate-report", json=_REQUEST)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.headers["content-length"] == str(len(response.content))
+
+
+def test_other_formats_not_streamed(client, monkeypatch):
+    monkeypatch.setattr(main.settings, "STREAM_MIN_RECORDS", 1)
+    response = client.post("/generate-report", json={**_REQUEST, "report_format": "xlsx"})
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "MISS"
@@ -0,0 +1,111 @@
+"""XLSX export (``app.services.excel_service``): the pandas and the constant-memory paths."""
+
+from __future__ import annotations
+
+import re
+import zipfile
+from io import BytesIO
+from xml.etree import ElementTree
+
+from app.config import settings
+from app.models.schemas import ReportRequest
+from app.services import excel_service
+
+_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+_RELS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+
+
+def _payroll(count: int) -> ReportRequest:
+    records = [
+        {
+            "name": f"Staff {i}",
+            "email": f"s{i}@x",
+            "shifts": i % 4,
+            "hours": i / 2,
+            "averageRate": 20,
+            "totalPay": i * 10,
+        }
+        for i in range(count)
+    ]
+    return ReportRequest.model_validate(
+        {
+            "report_type": "payroll",
+            "report_format": "xlsx",
+            "title": "Payroll",
+            "period": {"start": "a", "end": "b", "label": "March"},
+            "records": records,
+            "summary": {"totalHours": 12, "totalPayroll": 340},
+        }
+    )
+
+
+def _sheets(req: ReportRequest) -> dict[str, dict[str, str]]:
+    """Cell values as text, by sheet name and cell reference."""
+    out = BytesIO()
+    excel_service.create_report(req, out)
+    with zipfile.ZipFile(out) as xlsx:
+        strings = []
+        if "xl/sharedStrings.xml" in xlsx.namelist():
+            root = ElementTree.fromstring(xlsx.read("xl/sharedStrings.xml"))
+            strings = ["".join(t.text or "" for t in si.iter(f"{{{_NS['m']}}}t")) for si in root]
+        workbook = ElementTree.fromstring(xlsx.read("xl/workbook.xml"))
+        rels = ElementTree.fromstring(xlsx.read("xl/_rels/workbook.xml.rels"))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels}
+        sheets = {}
+        for sheet in workbook.iterfind("m:sheets/m:sheet", _NS):
+            root = ElementTree.fromstring(xlsx.read(f"xl/{targets[sheet.get(_RELS)]}"))
+            cells = {}
+            for c in root.iterfind(".//m:c", _NS):
+                if c.get("t") == "s":
+                    value = strings[int(c.find("m:v", _NS).text)]
+                elif c.get("t") == "inlineStr":
+                    value = "".join(t.text or "" for t in c.iter(f"{{{_NS['m']}}}t"))
+                elif c.find("m:v", _NS) is not None:
+                    value = c.find("m:v", _NS).text
+                else:
+                    continue
+                cells[c.get("r")] = value
+            sheets[sheet.get("name")] = cells
+    return sheets
+
+
+def _rows(cells: dict[str, str]) -> dict[int, list[str]]:
+    rows: dict[int, list[str]] = {}
+    for ref in sorted(cells, key=lambda r: (int(re.sub(r"\D", "", r)), len(r), r)):
+        rows.setdefault(int(re.sub(r"\D", "", ref)), []).append(cells[ref])
+    return rows
+
+
+def test_streaming_matches_pandas(monkeypatch):
+    req = _payroll(30)
+    framed = _sheets(req)
+    monkeypatch.setattr(settings, "XLSX_STREAMING_ROWS", 0)
+    streamed = _sheets(req)
+
+    assert list(streamed) == list(framed) == ["Payroll Report", "Info"]
+    assert _rows(streamed["Payroll Report"]) == _rows(framed["Payroll Report"])
+    rows = _rows(streamed["Payroll Report"])
+    assert rows[2][:2] == ["Staff Name", "Email"]
+    assert rows[3][:2] == ["Staff 0", "s0@x"]
+    # TOTAL row with the shifts summed over every record
+    assert rows[34][0] == "TOTAL"
+    assert rows[34][1] == str(sum(i % 4 for i in range(30)))
+
+
+def test_rolls_over_to_new_sheets(monkeypatch):
+    monkeypatch.setattr(settings, "XLSX_STREAMING_ROWS", 0)
+    monkeypatch.setattr(excel_service, "_ROWS_PER_SHEET", 10)
+    sheets = _sheets(_payroll(25))
+
+    assert list(sheets) == ["Payroll Report", "Payroll Report (2)", "Payroll Report (3)", "Info"]
+    names = [
+        [row[0] for n, row in _rows(sheets[name]).items() if 3 <= n <= 12 and row[0].startswith("Staff")]
+        for name in list(sheets)[:3]
+    ]
+    assert [len(n) for n in names] == [10, 10, 5]
+    assert names[1][0] == "Staff 10"
+    # The TOTAL row only goes on the last sheet, and covers every sheet's records
+    assert all("TOTAL" not in sheets[name].values() for name in list(sheets)[:2])
+    last = _rows(sheets["Payroll Report (3)"])
+    assert last[9][0] == "TOTAL"
+    assert last[9][1] == str(sum(i % 4 for i in range(25)))
@@ -0,0 +1,64 @@
+"""Render executor (``app.executor``) limits and recovery."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.executor import RenderExecutor, RenderQueueFull
+
+
+def test_rejects_past_queue_limit():
+    async def run():
+        executor = RenderExecutor("thread", workers=1, max_queue=1)
+        release = threading.Event()
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert executor.depth == 2
+        with pytest.raises(RenderQueueFull):
+            await executor.run(release.wait)
+        release.set()
+        assert await asyncio.gather(*running) == [True, True]
+        assert executor.depth == 0
+        executor.shutdown()
+
+    asyncio.run(run())
+
+
+def test_full_queue_answers_503(monkeypatch):
+    executor = RenderExecutor("thread", workers=1, max_queue=0)
+    executor._pending = 1
+    monkeypatch.setattr(main, "executor", executor)
+    body = {
+        "report_type": "payroll",
+        "report_format": "docx",
+        "title": "Queue full",
+        "period": {"start": "a", "end": "b", "label": "c"},
+        "records": [{"name": "Ana", "totalPay": 10}],
+    }
+    response = TestClient(main.app).post(
+        "/generate-report", json=body, headers={"X-Service-Secret": main.settings.SERVICE_SECRET}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    executor.shutdown()
+
+
+def test_dead_worker_fails_only_its_call():
+    async def run():
+        executor = RenderExecutor("process", workers=1, max_queue=4)
+        executor.start()
+        broken = executor._pool
+        with pytest.raises(BrokenProcessPool):
+            await executor.run(os._exit, 1)
+        assert executor._pool is not broken
+        assert await executor.run(abs, -3) == 3
+        executor.shutdown()
+
+    asyncio.run(run())
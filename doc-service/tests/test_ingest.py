@@ -0,0 +1,145 @@
+"""NDJSON and msgpack uploads (``app.ingest``) against the JSON request they stand for."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+import msgpack
+import pytest
+
+from app.config import settings
+from app.ingest import IngestError, spool, unpack_columns
+from app.models.schemas import ReportRequest
+from app.services import renderer
+from app.services.records import RecordColumns, RecordFile
+
+_META = {
+    "report_type": "staff-shifts",
+    "report_format": "csv",
+    "title": "Shifts",
+    "period": {"start": "2025-03-01", "end": "2025-03-31", "label": "March"},
+}
+_RECORDS = [
+    {"date": "2025-03-0%d" % (i % 9 + 1), "eventName": f"Gala {i}", "hoursWorked": i / 4, "earnings": i * 5.5}
+    for i in range(25)
+]
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "OUTPUT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _chunks(data: bytes, size: int):
+    async def body():
+        for i in range(0, len(data), size):
+            yield data[i : i + size]
+
+    return body()
+
+
+def _spool(data: bytes, size: int = 64, meta_header: str | None = None) -> ReportRequest:
+    return asyncio.run(spool(_chunks(data, size), meta_header))
+
+
+def _ndjson(records, meta=_META) -> bytes:
+    lines = [json.dumps(meta)] if meta else []
+    return "\n".join(lines + [json.dumps(r) for r in records]).encode() + b"\n"
+
+
+def _csv(req: ReportRequest) -> bytes:
+    return renderer.render(req).content
+
+
+def test_ndjson_matches_json_request():
+    expected = ReportRequest.model_validate({**_META, "records": _RECORDS})
+    # Chunk sizes that split lines anywhere, and one chunk for the whole body
+    for size in (7, 64, 1 << 20):
+        req = _spool(_ndjson(_RECORDS), size)
+        assert isinstance(req.records, RecordFile)
+        assert list(req.records) == _RECORDS
+        assert _csv(req) == _csv(expected)
+        os.remove(req.records.path)
+
+
+def test_metadata_in_header():
+    req = _spool(_ndjson(_RECORDS, meta=None), meta_header=json.dumps(_META))
+    assert req.title == "Shifts"
+    assert list(req.records) == _RECORDS
+
+
+def test_line_variants():
+    data = (
+        json.dumps(_META).encode()
+        + b"\r\n\r\n"
+        + b'  {"eventName": "A"}  \r\n'
+        + b"\n\n"
+        + b'{"eventName": "B"}'
+    )
+    req = _spool(data, size=5)
+    assert list(req.records) == [{"eventName": "A"}, {"eventName": "B"}]
+    # The digest only covers the records as stored, not blank lines or padding
+    same = _spool(_ndjson([{"eventName": "A"}, {"eventName": "B"}]))
+    assert req.records.digest == same.records.digest
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b"", "Missing report metadata"),
+        (b"\n\n", "Missing report metadata"),
+        (b"[1, 2]\n", "must be a JSON object"),
+        (b"{not json\n", "not valid JSON"),
+        (json.dumps({**_META, "records": []}).encode() + b"\n", "their own lines"),
+    ],
+)
+def test_bad_metadata(output_dir, data, message):
+    with pytest.raises(IngestError, match=message):
+        _spool(data)
+    assert os.listdir(output_dir) == []
+
+
+def test_line_too_long(output_dir, monkeypatch):
+    monkeypatch.setattr(settings, "NDJSON_MAX_LINE_BYTES", 100)
+    with pytest.raises(IngestError, match="Line longer than 100 bytes"):
+        _spool(_ndjson([{"eventName": "x" * 200}]), size=16)
+    assert os.listdir(output_dir) == []
+
+
+def _msgpack(records, **meta) -> bytes:
+    keys = sorted({k for r in records for k in r})
+    columns = {k: [r.get(k) for r in records] for k in keys}
+    return msgpack.packb({**_META, **meta, "columns": columns})
+
+
+@pytest.mark.parametrize("report_format", ["csv", "xlsx", "docx"])
+def test_msgpack_matches_json_request(report_format):
+    expected = ReportRequest.model_validate({**_META, "report_format": report_format, "records": _RECORDS})
+    req = unpack_columns(_msgpack(_RECORDS, report_format=report_format))
+    assert isinstance(req.records, RecordColumns)
+    # Keys missing from a record come back as None, which every engine treats as absent
+    assert [{k: v for k, v in r.items() if v is not None} for r in req.records] == _RECORDS
+    if report_format == "csv":
+        assert _csv(req) == _csv(expected)
+    else:
+        assert renderer.render(req).size > 0
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        (b"\xc1", "not valid msgpack"),
+        (msgpack.packb([1, 2]), "must be a msgpack map"),
+        (msgpack.packb({**_META, "records": []}), "columns map"),
+        (msgpack.packb({**_META, "columns": {"a": 1}}), "map of record key"),
+        (msgpack.packb({**_META, "columns": {"a": [1], "b": [1, 2]}}), "same length"),
+        (msgpack.packb({**_META, "report_type": "ai-analysis", "report_format": "docx", "columns": {}}), "table"),
+    ],
+    ids=["garbage", "not a map", "records", "column not an array", "ragged", "not a table report"],
+)
+def test_bad_msgpack(body, message):
+    with pytest.raises(IngestError, match=message):
+        unpack_columns(body)
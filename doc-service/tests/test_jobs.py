@@ -0,0 +1,84 @@
+"""Retention of finished jobs in ``app.jobs.JobQueue``."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+
+from app.jobs import DONE, JobQueue
+from app.models.schemas import ReportRequest
+from app.services.renderer import RenderedReport
+
+_REQUEST = ReportRequest.model_validate(
+    {
+        "report_type": "payroll",
+        "report_format": "csv",
+        "title": "Payroll",
+        "period": {"start": "a", "end": "b", "label": "c"},
+        "records": [{"name": "Ana", "totalPay": 10}],
+    }
+)
+
+
+async def _render(job):
+    content = b"x" * 100
+    job.files = [("payroll.csv", RenderedReport(size=len(content), content=content))]
+
+
+def _queue(tmp_path, **limits) -> JobQueue:
+    options = {"ttl": 900, "max_retained": 100, "max_retained_bytes": 10_000, **limits}
+    return JobQueue(concurrency=1, max_queued=10, spill_dir=str(tmp_path), **options)
+
+
+async def _finish(queue: JobQueue, count: int) -> list:
+    submitted = [queue.submit(_REQUEST) for _ in range(count)]
+    await queue._queue.join()
+    return submitted
+
+
+def test_finished_results_are_spilled_to_files(tmp_path):
+    async def run():
+        queue = _queue(tmp_path)
+        queue.start(_render)
+        (job,) = await _finish(queue, 1)
+        assert job.status == DONE
+        _, report = job.files[0]
+        assert report.content is None
+        with open(report.path, "rb") as f:
+            assert f.read() == b"x" * 100
+        assert job.request.records == []
+        await queue.stop()
+        assert not os.path.exists(report.path)
+
+    asyncio.run(run())
+
+
+def test_oldest_jobs_dropped_past_count_and_byte_limits(tmp_path):
+    async def run():
+        queue = _queue(tmp_path, max_retained=3)
+        queue.start(_render)
+        jobs = await _finish(queue, 5)
+        assert [queue.get(job.id) is not None for job in jobs] == [False, False, True, True, True]
+        assert len(os.listdir(tmp_path)) == 3
+
+        queue.max_retained_bytes = 150
+        more = await _finish(queue, 1)
+        assert [queue.get(job.id) is not None for job in jobs[2:] + more] == [False, False, False, True]
+        await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_expired_without_further_requests(tmp_path):
+    async def run():
+        queue = _queue(tmp_path, ttl=0.5)
+        queue.start(_render)
+        (job,) = await _finish(queue, 1)
+        path = job.files[0][1].path
+        await asyncio.sleep(1.2)
+        # Read directly: get() would expire the job itself
+        assert job.id not in queue._jobs
+        assert not os.path.exists(path)
+        await queue.stop()
+
+    asyncio.run(run())
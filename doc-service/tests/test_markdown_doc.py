@@ -0,0 +1,53 @@
+"""AI-analysis markdown rendered through the shared tree (``app.services.markdown_doc``)."""
+
+from __future__ import annotations
+
+from io import BytesIO
+
+from docx import Document
+
+from app.models.schemas import ReportRequest
+from app.services import markdown_doc, report_context, word_service
+
+
+def _request(content: str, report_format: str) -> ReportRequest:
+    return ReportRequest.model_validate(
+        {
+            "report_type": "ai-analysis",
+            "report_format": report_format,
+            "title": "Staffing Analysis",
+            "period": {"start": "2025-01-01", "end": "2025-03-31", "label": "Q1 2025"},
+            "records": [{"content": content}],
+            "summary": {},
+            "company_name": "Test Co.",
+        }
+    )
+
+
+def test_email_autolink_in_pdf_html():
+    req = _request("Contact <ops@example.com> for details.", "pdf")
+    html = report_context.build_ai_analysis_context(req)["analysis_html"]
+    assert "\x02" not in html and "\x03" not in html
+    assert '<a href="mailto:ops@example.com">ops@example.com</a>' in html
+
+
+def test_email_autolink_in_docx():
+    req = _request("Contact <ops@example.com> for details.", "docx")
+    out = BytesIO()
+    word_service.create_report(req, out)
+    text = "\n".join(p.text for p in Document(BytesIO(out.getvalue())).paragraphs)
+    assert "Contact ops@example.com for details." in text
+
+
+def test_ampersands_survive():
+    tree = markdown_doc.parse("AT&T &amp; <https://a.example/?x=1&y=2>")
+    assert markdown_doc.plain_text(tree) == "AT&T & https://a.example/?x=1&y=2"
+    assert 'href="https://a.example/?x=1&amp;y=2"' in markdown_doc.to_html(tree)
+
+
+def test_docx_renders_markdown_tables():
+    req = _request("| Staff | Hours |\n|---|---:|\n| Alex | 12.5 |\n| Sam | 8 |", "docx")
+    out = BytesIO()
+    word_service.create_report(req, out)
+    tables = Document(BytesIO(out.getvalue())).tables
+    assert [[c.text for c in row.cells] for row in tables[0].rows] == [["Staff", "Hours"], ["Alex", "12.5"], ["Sam", "8"]]
@@ -0,0 +1,65 @@
+"""One request rendered in several formats (``report_formats``) and returned as a ZIP."""
+
+from __future__ import annotations
+
+import io
+import zipfile
+
+from docx import Document
+
+_REQUEST = {
+    "report_type": "payroll",
+    "report_format": "csv",
+    "title": "Payroll",
+    "period": {"start": "a", "end": "b", "label": "March"},
+    "records": [
+        {"name": "Ana", "email": "ana@x", "shifts": 2, "hours": 3, "averageRate": 4, "totalPay": 12},
+        {"name": "Ben", "email": "ben@x", "shifts": 1, "hours": 5, "averageRate": 4, "totalPay": 20},
+    ],
+}
+
+
+def test_zip_holds_each_format(client):
+    response = client.post("/generate-report", json={**_REQUEST, "report_formats": ["csv", "xlsx", "docx"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert response.headers["content-disposition"].endswith('.zip"')
+    assert response.headers["x-cache"] == "MISS,MISS,MISS"
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        names = archive.namelist()
+        assert [name.rsplit(".", 1)[1] for name in names] == ["csv", "xlsx", "docx"]
+        # One file id shared by every format
+        assert len({name.rsplit(".", 1)[0] for name in names}) == 1
+        files = {name.rsplit(".", 1)[1]: archive.read(name) for name in names}
+
+    # Each format comes out as it does from a single-format request
+    single = client.post("/generate-report", json=_REQUEST)
+    assert files["csv"] == single.content
+    assert zipfile.ZipFile(io.BytesIO(files["xlsx"])).testzip() is None
+    doc = Document(io.BytesIO(files["docx"]))
+    assert [c.text for c in doc.tables[0].rows[1].cells][:2] == ["Ana", "ana@x"]
+
+
+def test_aggregated_once_for_every_format(client):
+    shifts = [
+        {"date": "2025-03-01", "eventName": "Gala", "staffName": "Ana", "email": "ana@x", "hoursWorked": 4},
+        {"date": "2025-03-02", "eventName": "Expo", "staffName": "Ana", "email": "ana@x", "hoursWorked": 2},
+    ]
+    body = {**_REQUEST, "record_source": "shifts", "records": shifts, "report_formats": ["csv", "docx"]}
+    response = client.post("/generate-report", json=body)
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        csv_name, docx_name = archive.namelist()
+        csv = archive.read(csv_name).decode("utf-8-sig").splitlines()
+        doc = Document(io.BytesIO(archive.read(docx_name)))
+    # One payroll row for Ana's two shifts, in both formats
+    assert len(csv) == 2
+    assert csv[1].startswith("Ana,ana@x,2,6")
+    assert len(doc.tables[0].rows) == 2
+
+
+def test_single_format_list_is_not_zipped(client):
+    response = client.post("/generate-report", json={**_REQUEST, "report_formats": ["csv"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
@@ -0,0 +1,62 @@
+"""Chunk requests for parallel PDF rendering (``app.services.pdf_chunks``)."""
+
+from __future__ import annotations
+
+from app.models.schemas import ReportRequest
+from app.services import aggregate, pdf_chunks, report_context
+from app.services.records import RecordColumns
+
+_PERIOD = {"start": "a", "end": "b", "label": "c"}
+
+
+def _payroll(count: int) -> ReportRequest:
+    records = [
+        {"name": f"P{i}", "email": "p@x", "shifts": 2, "hours": 2, "averageRate": 3, "totalPay": 4}
+        for i in range(count)
+    ]
+    return ReportRequest(
+        report_type="payroll", report_format="pdf", title="Payroll", period=_PERIOD, records=records
+    )
+
+
+def test_chunk_carries_only_its_records():
+    req = _payroll(1000)
+    part, start, stop, offset = pdf_chunks._part(req, 600, 800)
+    assert len(part.records) == 200
+    assert (start, stop, offset) == (0, 200, 600)
+    assert part.records[0]["name"] == "P600"
+    assert len(req.records) == 1000
+
+
+def test_chunk_context_uses_whole_report_totals():
+    req = _payroll(1000)
+    sums = report_context.column_totals(req)
+    assert sums == {"count": 1000, "shifts": 2000}
+    part, start, stop, _ = pdf_chunks._part(req, 900, 1000)
+    ctx = report_context.build_payroll_context(part, start, stop, sums=sums)
+    assert ctx["totals"]["shifts"] == 2000
+    assert ctx["summary_items"][0]["value"] == 1000
+    assert [row["name"] for row in ctx["rows"]][:2] == ["P900", "P901"]
+
+
+def test_columnar_chunk_stays_columnar():
+    shifts = [
+        {"date": "2025-01-01", "eventName": "E", "staffName": f"S{i}", "hoursWorked": i, "hourlyRate": 2}
+        for i in range(50)
+    ]
+    req = aggregate.resolve(
+        ReportRequest(
+            report_type="staff-shifts",
+            report_format="pdf",
+            record_source="shifts",
+            title="Shifts",
+            period=_PERIOD,
+            records=shifts,
+        )
+    )
+    part, _, _, offset = pdf_chunks._part(req, 40, 60)
+    assert isinstance(part.records, RecordColumns)
+    assert len(part.records) == 10
+    assert offset == 40
+    assert part.records.column("hoursWorked") == list(range(40, 50))
+    assert part.records.digest == req.records.digest
@@ -0,0 +1,102 @@
+"""Record validation and coercion in ``app.services.prepared``."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.models.schemas import ReportRequest
+from app.services import prepared as prepared_module
+from app.services.prepared import iter_value_rows, prepare
+from app.services.records import RecordColumns, RecordError
+
+
+def _request(report_type: str, records) -> ReportRequest:
+    return ReportRequest.model_validate(
+        {
+            "report_type": report_type,
+            "report_format": "csv",
+            "title": "Report",
+            "period": {"start": "a", "end": "b", "label": "c"},
+            "records": records,
+        }
+    )
+
+
+def test_values_coerced_to_field_types():
+    table = prepare(
+        _request(
+            "payroll",
+            [
+                {"name": "Ana", "shifts": "3", "hours": "4.5", "totalPay": 12},
+                {"name": 42, "email": None, "shifts": 2.0, "averageRate": None},
+            ],
+        )
+    )
+    assert table.values["name"] == ["Ana", "42"]
+    # Missing or null text fields take the model default
+    assert table.values["email"] == ["", ""]
+    assert table.values["shifts"].dtype == np.int64
+    assert table.values["shifts"].tolist() == [3, 2]
+    assert table.values["hours"].tolist() == [4.5, 0.0]
+    assert table.values["averageRate"].tolist() == [0.0, 0.0]
+    assert table.present == {"name", "email", "shifts", "hours", "totalPay", "averageRate"}
+    assert list(table.value_rows(["name", "shifts"])) == [("Ana", 3), ("42", 2)]
+    assert all(type(v) is int for _, v in table.value_rows(["name", "shifts"]))
+
+
+def test_model_defaults():
+    table = prepare(_request("attendance", [{"date": "2025-01-01"}]))
+    assert table.rows()[0] == {
+        "date": "2025-01-01",
+        "eventName": "Event",
+        "staffName": "Unknown",
+        "role": "Staff",
+        "scheduledStart": "",
+        "scheduledEnd": "",
+        "clockIn": "",
+        "clockOut": "",
+        "hoursWorked": "0",
+        "status": "unknown",
+    }
+    assert table.present == {"date"}
+
+
+@pytest.mark.parametrize(
+    "records, message",
+    [
+        ([{"name": "Ana"}, {"email": "x"}], "Record 2: name is required"),
+        ([{"name": "Ana", "hours": "lots"}], "Record 1: hours must be a number, got 'lots'"),
+        ([{"name": "Ana"}, {"name": "Ben", "totalPay": [1]}], "Record 2: totalPay must be a number"),
+        ([{"name": "Ana", "shifts": 1.5}], "Record 1: shifts must be a whole number, got 1.5"),
+    ],
+)
+def test_invalid_records(records, message):
+    with pytest.raises(RecordError, match=message):
+        prepare(_request("payroll", records))
+
+
+def test_error_numbers_count_from_the_slice_start():
+    records = [{"name": "Ana"}] * 5 + [{"name": "Ben", "hours": "x"}]
+    with pytest.raises(RecordError, match="Record 6: hours"):
+        prepare(_request("payroll", records), 4, 6)
+
+
+def test_columnar_records_match_record_dicts():
+    records = [{"name": f"S{i}", "shifts": i, "totalPay": i * 2.5} for i in range(6)]
+    columns = RecordColumns(
+        columns={"name": [r["name"] for r in records], "shifts": [r["shifts"] for r in records],
+                 "totalPay": [r["totalPay"] for r in records]},
+        count=6,
+    )
+    from_dicts = prepare(_request("payroll", records), 2, 5)
+    from_columns = prepare(_request("payroll", columns), 2, 5)
+    assert list(from_columns.text_rows()) == list(from_dicts.text_rows())
+    assert from_columns.present == from_dicts.present
+
+
+def test_value_rows_streamed_in_blocks(monkeypatch):
+    monkeypatch.setattr(prepared_module, "BLOCK_ROWS", 3)
+    req = _request("payroll", [{"name": f"S{i}", "shifts": i} for i in range(8)])
+    keys = ["name", "shifts", "totalPay"]
+    assert list(iter_value_rows(req, keys)) == list(prepare(req).value_rows(keys))
@@ -0,0 +1,64 @@
+"""In-memory rendering (``app.services.renderer``) and spilling of large documents."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from app.config import settings
+from app.models.schemas import ReportRequest
+from app.services import renderer
+
+# Start of each format: ZIP for the OOXML formats, a UTF-8 BOM and the header for CSV
+_MAGIC = {"pdf": b"%PDF", "docx": b"PK\x03\x04", "xlsx": b"PK\x03\x04", "csv": b"\xef\xbb\xbfDate,"}
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "OUTPUT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _shifts(report_format: str, count: int = 20) -> ReportRequest:
+    records = [
+        {"date": "2025-03-01", "eventName": f"Gala {i}", "staffName": "Ana", "hoursWorked": 4, "earnings": 80}
+        for i in range(count)
+    ]
+    return ReportRequest.model_validate(
+        {
+            "report_type": "staff-shifts",
+            "report_format": report_format,
+            "pdf_engine": "reportlab",
+            "title": "Shifts",
+            "period": {"start": "a", "end": "b", "label": "March"},
+            "records": records,
+        }
+    )
+
+
+@pytest.mark.parametrize("report_format", list(_MAGIC))
+def test_rendered_in_memory(output_dir, report_format):
+    report = renderer.render(_shifts(report_format))
+    assert report.path is None
+    assert report.content.startswith(_MAGIC[report_format])
+    assert report.size == len(report.content)
+    assert os.listdir(output_dir) == []
+
+
+def test_streamed_xlsx_leaves_no_temp_files(output_dir, monkeypatch):
+    monkeypatch.setattr(settings, "XLSX_STREAMING_ROWS", 0)
+    report = renderer.render(_shifts("xlsx"))
+    assert report.content.startswith(b"PK\x03\x04")
+    assert os.listdir(output_dir) == []
+
+
+def test_large_document_spilled(output_dir, monkeypatch):
+    in_memory = renderer.render(_shifts("csv")).content
+    monkeypatch.setattr(settings, "SPILL_THRESHOLD", 100)
+    report = renderer.render(_shifts("csv"))
+    assert report.content is None
+    assert os.path.dirname(report.path) == str(output_dir)
+    with open(report.path, "rb") as f:
+        assert f.read() == in_memory
+    assert report.size == len(in_memory)
@@ -0,0 +1,74 @@
+"""Word reports built from the cached per-theme base (``app.services.word_service``)."""
+
+from __future__ import annotations
+
+import io
+import struct
+import zlib
+
+from docx import Document
+
+from app.models.schemas import ReportRequest
+from app.services import assets, word_service
+from app.services.assets import Asset
+
+
+def _png() -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    # One white RGB pixel
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    pixels = zlib.compress(b"\x00\xff\xff\xff")
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", pixels) + chunk(b"IEND", b"")
+
+
+def _payroll(title: str, **fields) -> ReportRequest:
+    return ReportRequest.model_validate(
+        {
+            "report_type": "payroll",
+            "report_format": "docx",
+            "title": title,
+            "company_name": "Acme",
+            "period": {"start": "a", "end": "b", "label": "March"},
+            "records": [{"name": "Ana", "email": "ana@x", "shifts": 2, "hours": 3, "totalPay": 12}],
+            "summary": {"totalHours": 3},
+            **fields,
+        }
+    )
+
+
+def _render(req: ReportRequest) -> Document:
+    out = io.BytesIO()
+    word_service.create_report(req, out)
+    out.seek(0)
+    return Document(out)
+
+
+def test_requests_fill_the_base_skeleton():
+    for title in ("First", "Second"):
+        doc = _render(_payroll(title))
+        paragraphs = [(p.style.name, p.text) for p in doc.paragraphs if p.text]
+        assert paragraphs[:2] == [("Report Title", title), ("Report Subtitle", "Acme  |  March")]
+        assert ("Report Section", "Summary") in paragraphs
+        assert paragraphs[-1][0] == "Report Footer"
+        assert paragraphs[-1][1].startswith("Generated by Acme Document Service")
+        assert len(doc.tables) == 1
+
+
+def test_styles_follow_the_theme():
+    doc = _render(_payroll("Branded", template_design="executive", brand_config={"primary_color": "#112233"}))
+    assert str(doc.styles["Report Title"].font.color.rgb) == "112233"
+    label = next(p for p in doc.paragraphs if p.text.startswith("Staff Count")).runs[0]
+    assert label.style.name == "Report Label"
+
+
+def test_content_after_logo(monkeypatch):
+    monkeypatch.setattr(assets.fetcher, "fetch", lambda url: Asset(content=_png(), content_type="image/png"))
+    req = _payroll("With logo", brand_config={"logo_header_url": "http://logo.test/logo.png"})
+    # The second render is copied from the cached base
+    for _ in range(2):
+        doc = _render(req)
+        assert len(doc.inline_shapes) == 1
+        assert len(doc.tables) == 1
+        assert doc.paragraphs[1].text == "With logo"